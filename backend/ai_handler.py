@@ -428,22 +428,15 @@ async def merge_questions(
         return static_questions + ai_questions
 
 
-async def get_ai_followup_question(
-    interview_id: str, 
-    previous_answer: str, 
-    field: str
-) -> Optional[Dict]:
+async def generate_followup_question(previous_answer: str, field: str) -> Optional[Dict]:
     """
-    Generate a follow-up question based on candidate's previous answer using Groq.
+    Generate a follow-up question for the candidate's answer using Groq (not saved).
+    The Groq call runs in a worker thread so the event loop keeps serving.
     """
     if client is None:
         logger.error("Groq client not initialized")
         return None
-    
-    db = await Database.get_db()
-    if db is None:
-        return None
-    
+
     prompt = f"""Based on this candidate's answer to a {field} interview question:
     
 "{previous_answer}"
@@ -451,7 +444,8 @@ async def get_ai_followup_question(
 Generate a relevant follow-up question to dive deeper into their knowledge. Keep it concise and technical."""
 
     try:
-        response = client.chat.completions.create(
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
             model="llama-3.3-70b-versatile",
             messages=[
                 {"role": "system", "content": "You are an expert technical interviewer conducting a follow-up."},
@@ -473,16 +467,33 @@ Generate a relevant follow-up question to dive deeper into their knowledge. Keep
             "generated_at": datetime.datetime.utcnow().isoformat(),
             "model": "groq-llama-3.3-70b"
         }
-
-        await db.interviews.update_one(
-            {"_id": interview_id},
-            {"$push": {"questions": question_obj}}
-        )
-
         logger.info(f"✅ Generated follow-up question: {question_text[:50]}...")
         return question_obj
 
     except Exception as e:
         logger.error(f"❌ Failed to generate follow-up: {e}")
         traceback.print_exc()
-        return None
\ No newline at end of file
+        return None
+
+
+async def get_ai_followup_question(
+    interview_id: str, 
+    previous_answer: str, 
+    field: str
+) -> Optional[Dict]:
+    """
+    Generate a follow-up question based on candidate's previous answer and append it to the interview.
+    """
+    db = await Database.get_db()
+    if db is None:
+        return None
+
+    question_obj = await generate_followup_question(previous_answer, field)
+    if question_obj is None:
+        return None
+
+    await db.interviews.update_one(
+        {"_id": interview_id},
+        {"$push": {"questions": question_obj}}
+    )
+    return question_obj
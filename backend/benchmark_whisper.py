@@ -0,0 +1,81 @@
+"""
+CPU benchmark for local Whisper transcription.
+
+Reports load time and real-time factor (processing seconds / audio seconds,
+lower is better; < 1.0 means faster than real time) for each model size,
+both one clip at a time and as one batched decode.
+
+Usage:
+    python benchmark_whisper.py sample.wav
+    python benchmark_whisper.py sample.webm --models tiny base small --batch 8 --threads 4
+"""
+import argparse
+import time
+
+from transcription.local_pool import SAMPLE_RATE, decode_pcm, transcribe_batch
+
+
+def benchmark_model(model_size, pcm, batch, runs):
+    import whisper
+
+    audio_seconds = len(pcm) / SAMPLE_RATE
+
+    started = time.perf_counter()
+    model = whisper.load_model(model_size, device="cpu")
+    load_seconds = time.perf_counter() - started
+
+    # Warm-up so one-time allocations don't skew the first run
+    transcribe_batch(model, [pcm], "en")
+
+    single = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        text = transcribe_batch(model, [pcm], "en")[0]
+        single.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    transcribe_batch(model, [pcm] * batch, "en")
+    batched = time.perf_counter() - started
+
+    return {
+        "model": model_size,
+        "load_s": load_seconds,
+        "rtf_single": min(single) / audio_seconds,
+        "rtf_batched": batched / (audio_seconds * batch),
+        "text": text,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local Whisper real-time factor on CPU")
+    parser.add_argument("audio", help="Any ffmpeg-readable audio file")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--batch", type=int, default=8, help="Clips per batched decode")
+    parser.add_argument("--runs", type=int, default=3, help="Single-clip runs (best is reported)")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 = library default)")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    with open(args.audio, "rb") as f:
+        pcm = decode_pcm(f.read())
+    audio_seconds = len(pcm) / SAMPLE_RATE
+    print(f"Audio: {args.audio} ({audio_seconds:.1f}s at {SAMPLE_RATE} Hz)")
+    if audio_seconds > 30:
+        print("⚠️ Clip is longer than 30s; batched numbers will use the per-clip fallback")
+
+    print(f"{'model':<10}{'load (s)':>10}{'RTF single':>12}{'RTF batch':>12}")
+    for model_size in args.models:
+        try:
+            result = benchmark_model(model_size, pcm, args.batch, args.runs)
+        except Exception as e:
+            print(f"{model_size:<10} failed: {e}")
+            continue
+        print(f"{result['model']:<10}{result['load_s']:>10.2f}{result['rtf_single']:>12.3f}{result['rtf_batched']:>12.3f}")
+        print(f"  -> {result['text'][:80]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 import os
 from dotenv import load_dotenv
 from typing import Optional
@@ -10,6 +11,68 @@ load_dotenv()
 # Get MongoDB connection details from environment variables
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "interview_bot")
+TRANSCRIPT_CACHE_TTL_SECONDS = int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+
+# collection -> indexes created at startup by Database.ensure_indexes()
+INDEXES = {
+    "interviews": [
+        # GET /api/interviews/my-interviews and filtered listings, sorted by (date, _id)
+        IndexModel([("hr_id", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)], name="hr_date"),
+        IndexModel([("candidate_id", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)], name="candidate_date"),
+    ],
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_created"),
+    ],
+    "feedback": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_created"),
+    ],
+    "systemLogs": [
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp"),
+    ],
+    "applications": [
+        # Incremental rescoring after profile / job criteria changes
+        IndexModel([("candidate_id", ASCENDING)], name="candidate"),
+        IndexModel([("job_id", ASCENDING)], name="job"),
+    ],
+    "application_cards": [
+        # GET /api/hr/applications: one indexed find per filter/sort combination
+        IndexModel([("hr_name_key", ASCENDING), ("_id", ASCENDING)], name="hr_name"),
+        IndexModel([("hr_name_key", ASCENDING), ("match_score", DESCENDING), ("_id", ASCENDING)], name="hr_name_match"),
+        IndexModel([("hr_id", ASCENDING), ("_id", ASCENDING)], name="hr_id"),
+        IndexModel([("hr_id", ASCENDING), ("match_score", DESCENDING), ("_id", ASCENDING)], name="hr_id_match"),
+        IndexModel([("candidate_id", ASCENDING), ("_id", ASCENDING)], name="candidate"),
+        IndexModel([("job_id", ASCENDING)], name="job"),
+    ],
+    "skills": [
+        # Skill resolution upserts by normalized name; unique keeps concurrent creates single
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "criteria_skills": [
+        IndexModel([("criteria_id", ASCENDING), ("skill_id", ASCENDING)], name="criteria_skill"),
+    ],
+    "interview_events": [
+        # Append-only timeline; unique guards against a sequence number being reused
+        IndexModel([("interview_id", ASCENDING), ("seq", ASCENDING)], name="interview_seq", unique=True),
+    ],
+    "idempotency_keys": [
+        # Retries are only recognised within this window
+        IndexModel([("created_at", ASCENDING)], name="created_ttl", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+    ],
+    "resume_index": [
+        # Multikey: search fetches every resume containing a query term
+        IndexModel([("terms", ASCENDING)], name="terms"),
+    ],
+    "transcript_cache": [
+        IndexModel([("created_at", ASCENDING)], name="created_ttl", expireAfterSeconds=TRANSCRIPT_CACHE_TTL_SECONDS),
+    ],
+}
+
+# collection -> index names no read path uses any more; dropped at startup so writes stop paying for them
+RETIRED_INDEXES = {
+    # Listings read application_cards now
+    "applications": ["hr_match"],
+}
 
 class Database:
     """
@@ -45,6 +108,25 @@ class Database:
             raise RuntimeError("Failed to initialize database connection")
         return cls._db
     
+    @classmethod
+    async def ensure_indexes(cls):
+        """Create the indexes hot read paths rely on. Safe to run on every startup."""
+        db = await cls.get_db()
+        for collection, indexes in INDEXES.items():
+            try:
+                await db[collection].create_indexes(indexes)
+            except Exception as e:
+                print(f"⚠️ Failed to create indexes on {collection}: {e}")
+        for collection, names in RETIRED_INDEXES.items():
+            try:
+                existing = await db[collection].index_information()
+                for name in names:
+                    if name in existing:
+                        await db[collection].drop_index(name)
+                        print(f"🧹 Dropped unused index {collection}.{name}")
+            except Exception as e:
+                print(f"⚠️ Failed to drop retired indexes on {collection}: {e}")
+
     @classmethod
     async def close_connection(cls):
         """Close the MongoDB connection."""
@@ -1,5 +1,4 @@
 from fastapi import FastAPI, UploadFile, File
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from socketio import AsyncServer, ASGIApp
 from db.database import Database
@@ -15,6 +14,18 @@ from openai import OpenAI
 
 # Import password hashing
 from utils.password_handler import get_password_hash
+from utils.http_cache import HashedStaticFiles
+from utils.resume_index import shutdown_pool as shutdown_resume_pool
+from utils.application_cards import ensure_cards as ensure_application_cards
+from utils.skill_catalog import load_skill_catalog
+from utils.presence import PresenceWriter
+from utils.room_snapshots import create_room_snapshotter
+from utils.interview_events import event_log
+from utils.room_sweeper import RoomSweeper
+from utils.deadline_scheduler import deadlines
+from utils.clock_sync import clock_telemetry
+from utils.idempotency import IdempotencyMiddleware, idempotency_store
+from utils.followup_prefetch import followups
 
 # Import routers
 from routes import auth
@@ -31,9 +42,16 @@ from routes import notifications
 from routes import applications
 from routes import interview_rooms
 from routes import interview_analysis
+from routes import resumes
 
 # Import socket handlers
-from socket_handlers import setup_socket_handlers
+from socket_handlers import (
+    setup_socket_handlers, snapshot_rooms, restore_rooms,
+    active_rooms, sweep_rooms, room_state_sizes, update_room_interview,
+)
+
+# Speech-to-text
+from transcription.service import create_transcription_service, TranscriptionError
 
 # ✅ CRITICAL: Load .env FIRST before anything else
 load_dotenv()
@@ -130,9 +148,16 @@ async def lifespan(app: FastAPI):
             print("✅ Successfully connected to MongoDB")
 
             await create_admin_user()
+            await Database.ensure_indexes()
+            print("✅ Database indexes ensured")
+            await ensure_application_cards(await Database.get_db())
+            catalog = await load_skill_catalog(await Database.get_db())
+            print(f"✅ Skill catalog loaded ({len(catalog.skills)} skills)")
             
             # Setup socket handlers - NO AWAIT!
-            setup_socket_handlers(sio, get_database)
+            setup_socket_handlers(sio, get_database, transcription_service, presence_writer)
+            presence_writer.start()
+            event_log.start()
             print("✅ Socket.IO handlers registered (including interview controls)")
             
             # ✅ CRITICAL FIX: Store sio in app.state so routes can access it
@@ -147,10 +172,47 @@ async def lifespan(app: FastAPI):
                 raise
             print(f"⚠️ Attempt {attempt + 1} failed: {e}. Retrying in {retry_delay} seconds...")
             time.sleep(retry_delay)
+
+    if room_snapshotter is not None:
+        try:
+            snapshot = await room_snapshotter.restore()
+            if snapshot:
+                print(f"✅ Restored {restore_rooms(snapshot)} live rooms from snapshot")
+        except Exception as e:
+            print(f"⚠️ Room snapshot restore failed: {e}")
+        room_snapshotter.start()
+    room_sweeper.start()
+    try:
+        print(f"✅ Tracking deadlines of {await deadlines.load(await Database.get_db())} running interviews")
+    except Exception as e:
+        print(f"⚠️ Loading interview deadlines failed: {e}")
+    deadlines.start(sio, on_change=update_room_interview)
+
+    try:
+        await transcription_service.start()
+    except Exception as e:
+        print(f"⚠️ Transcription backend '{transcription_service.backend.name}' failed to start: {e}")
     
     yield  # App runs here
     
     # Shutdown code
+    await room_sweeper.stop()
+    await deadlines.stop()
+    if room_snapshotter is not None:
+        try:
+            await room_snapshotter.stop()
+        except Exception as e:
+            print(f"⚠️ Final room snapshot failed: {e}")
+    try:
+        await presence_writer.stop()
+    except Exception as e:
+        print(f"⚠️ Final presence flush failed: {e}")
+    try:
+        await event_log.stop()
+    except Exception as e:
+        print(f"⚠️ Final interview event flush failed: {e}")
+    await transcription_service.stop()
+    shutdown_resume_pool()
     try:
         await Database.close_connection()
         print("✅ Disconnected from MongoDB")
@@ -162,6 +224,9 @@ async def lifespan(app: FastAPI):
 # ====================================================
 app = FastAPI(lifespan=lifespan)
 
+# Retries carrying an Idempotency-Key get the stored response (inside CORS, so replays keep CORS headers)
+app.add_middleware(IdempotencyMiddleware)
+
 # ====================================================
 # CORS Middleware - ADD BEFORE WRAPPING
 # ====================================================
@@ -186,6 +251,19 @@ except Exception as e:
     print(f"⚠️ Whisper client initialization failed: {e}")
     whisper_client = None
 
+# Transcription service (remote Whisper API by default, TRANSCRIBE_BACKEND=local for offline)
+transcription_service = create_transcription_service(whisper_client)
+print(f"✅ Transcription backend: {transcription_service.backend.name}")
+
+# Room participants are persisted write-behind (PRESENCE_FLUSH_INTERVAL_SECONDS)
+presence_writer = PresenceWriter(get_database)
+# Live room state survives restarts (ROOM_SNAPSHOT_STORE=file|mongo|off)
+room_snapshotter = create_room_snapshotter(get_database, snapshot_rooms)
+# Idle rooms and overdue interviews are expired every ROOM_SWEEP_INTERVAL_SECONDS
+room_sweeper = RoomSweeper(
+    get_database, lambda: list(active_rooms), sweep_rooms, room_state_sizes, on_closed=update_room_interview
+)
+
 # Client for GPT (AI questions) - using GPT_MODEL_KEY
 try:
     gpt_client = OpenAI(api_key=os.getenv("GPT_MODEL_KEY"))
@@ -212,13 +290,14 @@ app.include_router(applications.router)
 app.include_router(applications.app_router)
 app.include_router(interview_rooms.router)
 app.include_router(interview_analysis.router)
+app.include_router(resumes.router)
 
 # ====================================================
 # Static Files
 # ====================================================
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 os.makedirs(static_dir, exist_ok=True)
-app.mount("/static", StaticFiles(directory=static_dir), name="static")
+app.mount("/static", HashedStaticFiles(directory=static_dir), name="static")
 
 # ====================================================
 # Root Endpoint
@@ -328,38 +407,48 @@ async def test_generate_question(field: str = "devops"):
 @app.post("/transcribe")
 async def transcribe_audio(file: UploadFile = File(...)):
     try:
-        if whisper_client is None:
-            return {"error": "Whisper client not initialized - check OPENAI_API_KEY", "text": ""}
-            
-        # Read the audio file content
-        audio_bytes = await file.read()
-        
-        # CRITICAL FIX: Use a tuple format that OpenAI expects
-        # Format: (filename, file_content, content_type)
-        audio_file = (
-            file.filename or "audio.webm",  # Filename with extension
-            audio_bytes,                     # Raw bytes
-            file.content_type or "audio/webm"  # MIME type
-        )
-        
-        print(f"[TRANSCRIBE] Processing audio file: {file.filename}, size: {len(audio_bytes)} bytes, type: {file.content_type}")
+        if not transcription_service.available:
+            return {"error": f"Transcription backend '{transcription_service.backend.name}' not available - check OPENAI_API_KEY or TRANSCRIBE_BACKEND", "text": ""}
+
+        result = await transcription_service.transcribe_upload(file)
 
-        result = whisper_client.audio.transcriptions.create(
-            file=audio_file,
-            model="whisper-1",
-            language="en",
-            response_format="text"
-        )
-        
         print(f"[TRANSCRIBE] ✅ Success: {result[:100] if len(result) > 100 else result}")
         return {"text": result}
 
+    except TranscriptionError as e:
+        print(f"[ERROR] Transcription error: {e}")
+        return {"error": str(e), "text": ""}
     except Exception as e:
         print(f"[ERROR] Transcription error: {e}")
         import traceback
         traceback.print_exc()
         return {"error": str(e), "text": ""}
 
+@app.get("/transcribe/metrics")
+async def transcription_metrics():
+    """Transcript cache hit rate and audio seconds saved since startup."""
+    return {
+        "backend": transcription_service.backend.name,
+        "cache": transcription_service.cache.metrics() if transcription_service.cache else None,
+    }
+
+@app.get("/rooms/metrics")
+async def room_metrics():
+    """Room state sizes, sweeper reclaim counts, write-behind queues, deadlines and client RTTs."""
+    return {
+        "clock_sync": clock_telemetry.metrics(),
+        "sweeper": room_sweeper.metrics(),
+        "presence": presence_writer.metrics(),
+        "events": event_log.metrics(),
+        "deadlines": deadlines.metrics(),
+        "followups": followups.metrics(),
+    }
+
+@app.get("/idempotency/metrics")
+async def idempotency_metrics():
+    """Idempotency-Key requests, executions and replays since startup."""
+    return idempotency_store.metrics()
+
 # ====================================================
 # CRITICAL: Wrap with Socket.IO LAST
 # ====================================================
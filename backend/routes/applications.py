@@ -1,10 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import List, Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, BackgroundTasks
+from pydantic import BaseModel, Field
+from typing import List, Any, Dict, Optional, Tuple
 import re
+import csv
+import io
+import json
 from datetime import datetime
 from db.database import Database
 from bson import ObjectId
+from pymongo import UpdateOne
+from routes.notifications import create_notifications
+from utils.match_scoring import score_applications
+from utils.application_cards import INTERNAL_FIELDS, hr_name_key, refresh_cards, delete_cards
+
+VALID_STATUSES = {"Pending", "Accepted", "Rejected"}
+# Bulk endpoints: items per request / import file size
+BULK_MAX_ITEMS = 1000
+IMPORT_MAX_BYTES = 5 * 1024 * 1024
 
 router = APIRouter(prefix="/api/hr", tags=["applications"])
 app_router = APIRouter(prefix="/api", tags=["applications"])
@@ -24,6 +36,26 @@ class ApplicationCreate(BaseModel):
     job_id: str
 
 
+class BulkStatusItem(BaseModel):
+    """Either application_id, or candidate_id + job_id."""
+    application_id: Optional[str] = None
+    candidate_id: Optional[str] = None
+    job_id: Optional[str] = None
+
+
+class BulkStatusUpdate(BaseModel):
+    status: str
+    items: List[BulkStatusItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+    notify: bool = True
+
+
+def _normalize_status(status: str) -> str:
+    new_status = (status or "").strip().capitalize()
+    if new_status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    return new_status
+
+
 def _pick(obj: Dict[str, Any], keys: List[str], default: Any = None):
     for k in keys:
         v = obj.get(k)
@@ -124,106 +156,36 @@ def _normalize_profile(profile: Dict[str, Any], fallback: Dict[str, Any]) -> Dic
 @router.get("/applications")
 async def list_applications(
     hr_name: Optional[str] = Query(None, alias="hr_name"),  # Changed to Optional
-    candidate_id: Optional[str] = Query(None, alias="candidate_id")  # Added parameter
+    candidate_id: Optional[str] = Query(None, alias="candidate_id"),  # Added parameter
+    hr_id: Optional[str] = Query(None, description="Owner of the job criteria"),
+    sort: Optional[str] = Query(None, description="'match' ranks applicants by match_score")
 ) -> List[dict]:
     try:
         db = await Database.get_db()
-        apps_col = db["applications"]
-        
-        # Build the match query based on provided parameters
-        match_query = {}
-        
+        if db is None:
+            raise HTTPException(status_code=500, detail="Database unavailable")
+
+        # Served from the application_cards read model: one indexed find
+        match_query: Dict[str, Any] = {}
         if hr_name:
-            # Use regex for case-insensitive matching of hr_name
-            match_query["hr_name"] = {"$regex": re.escape(hr_name), "$options": "i"}
-        
+            match_query["hr_name_key"] = hr_name_key(hr_name)
+        if hr_id:
+            match_query["hr_id"] = hr_id
         if candidate_id:
             match_query["candidate_id"] = candidate_id
-        
+
         # Require at least one parameter for security
         if not match_query:
             raise HTTPException(
-                status_code=400, 
-                detail="Either 'hr_name' or 'candidate_id' parameter is required"
+                status_code=400,
+                detail="Either 'hr_name', 'hr_id' or 'candidate_id' parameter is required"
             )
-        
-        print(f"🔍 Querying applications with match_query: {match_query}")
-        print(f"📊 Parameters: hr_name={hr_name}, candidate_id={candidate_id}")
-
-        pipeline = [
-            {"$match": match_query},
-            {"$addFields": {
-                "candidate_oid": {"$convert": {"input": "$candidate_id", "to": "objectId", "onError": None, "onNull": None}},
-                "job_oid": {"$convert": {"input": "$job_id", "to": "objectId", "onError": None, "onNull": None}},
-            }},
-            {"$lookup": {
-                "from": "profiles",
-                "localField": "candidate_oid",
-                "foreignField": "user_id",
-                "as": "profile"
-            }},
-            {"$unwind": {"path": "$profile", "preserveNullAndEmptyArrays": True}},
-            {"$lookup": {
-                "from": "job_criteria",
-                "localField": "job_oid",
-                "foreignField": "_id",
-                "as": "job"
-            }},
-            {"$unwind": {"path": "$job", "preserveNullAndEmptyArrays": True}},
-            {"$project": {
-                "candidate_id": "$candidate_id",
-                "name": {"$ifNull": ["$profile.full_name", "$$REMOVE"]},
-                "email": {"$ifNull": ["$profile.email", "$$REMOVE"]},
-                "field": {"$ifNull": ["$profile.field", None]},
-                "experience": {"$ifNull": ["$profile.experience", None]},
-                "experience_years": {"$ifNull": ["$profile.experience_years", None]},
-                "experience_months": {"$ifNull": ["$profile.experience_months", None]},
-                "skills": {"$ifNull": ["$profile.skills", []]},
-                "cv": {"$ifNull": ["$profile.resume_url", None]},
-                "certificates": {"$ifNull": ["$profile.certificates", []]},
-                "profile_pic": {"$ifNull": ["$profile.avatar_url", None]},
-                "job_title": {"$ifNull": ["$job.job_title", None]},
-                "job_description": {"$ifNull": ["$job.description", None]},
-                "hr_name": "$hr_name",  # Added this field
-                "status": {"$ifNull": ["$status", "Pending"]},
-                "applied_at": {"$ifNull": ["$applied_at", None]},
-                "updated_at": "$updated_at",  # Added this field
-                "_id": {"$toString": "$_id"},  # Added for reference
-            }},
-        ]
-
-        items: List[dict] = []
-        async for doc in apps_col.aggregate(pipeline):
-            # experience fallback formatting
-            if not doc.get("experience"):
-                y = doc.pop("experience_years", None) or 0
-                m = doc.pop("experience_months", None) or 0
-                parts = []
-                if isinstance(y, (int, float)) and y:
-                    parts.append(f"{int(y)} year" + ("s" if int(y) != 1 else ""))
-                if isinstance(m, (int, float)) and m:
-                    parts.append(f"{int(m)} month" + ("s" if int(m) != 1 else ""))
-                if parts:
-                    doc["experience"] = " ".join(parts)
-            # sanitize certificates to strings to avoid ObjectId serialization errors
-            certs = doc.get("certificates")
-            if isinstance(certs, list):
-                cleaned: List[str] = []
-                for c in certs:
-                    if isinstance(c, ObjectId):
-                        cleaned.append(str(c))
-                    elif isinstance(c, dict):
-                        # keep as-is; downstream may look for url strings
-                        cleaned.append(c)  # type: ignore
-                    else:
-                        cleaned.append(str(c))
-                doc["certificates"] = cleaned
-            # ensure no stray ObjectId values remain in top-level fields
-            for k, v in list(doc.items()):
-                if isinstance(v, ObjectId):
-                    doc[k] = str(v)
-            items.append(doc)
-        
+
+        order = [("match_score", -1), ("_id", 1)] if sort == "match" else [("_id", 1)]
+        items = await db.application_cards.find(match_query, INTERNAL_FIELDS).sort(order).to_list(length=None)
+        for doc in items:
+            doc["_id"] = str(doc["_id"])
+
         print(f"✅ Found {len(items)} applications")
         return items
     except HTTPException:
@@ -232,13 +194,22 @@ async def list_applications(
         print(f"❌ Error in list_applications: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/applications/rescore")
+async def rescore_applications(hr_name: Optional[str] = Query(None)):
+    """Recompute match scores (all applications, or one HR's)."""
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+    query = {"hr_name": {"$regex": f"^{re.escape(hr_name)}$", "$options": "i"}} if hr_name else {}
+    scored = await score_applications(db, query)
+    return {"success": True, "scored": scored}
+
+
 @router.patch("/update-status")
 async def update_status(body: UpdateStatus):
     try:
-        new_status = body.status.strip().capitalize()
-        if new_status not in {"Pending", "Accepted", "Rejected"}:
-            raise HTTPException(status_code=400, detail="Invalid status")
-        
+        new_status = _normalize_status(body.status)
+
         db = await Database.get_db()
         apps_col = db["applications"]
         profiles_col = db["profiles"]
@@ -275,30 +246,28 @@ async def update_status(body: UpdateStatus):
         print(f"🔍 Update query: {query}")
         print(f"🎯 Looking for applications with candidate_id={candidate_id}, hr_name={body.hr_name}, job_id={body.job_id}")
         
-        # Check if any applications exist with this query
-        count = await apps_col.count_documents(query)
-        print(f"📊 Found {count} matching applications")
-        
-        if count == 0:
-            # Try to find applications with any criteria to help debug
-            any_by_candidate = await apps_col.count_documents({"candidate_id": candidate_id})
-            any_by_hr = await apps_col.count_documents({"hr_name": {"$regex": f"^{re.escape(body.hr_name)}$", "$options": "i"}}) if body.hr_name else 0
-            print(f"📊 Debug: {any_by_candidate} apps for candidate, {any_by_hr} apps for HR")
-            raise HTTPException(
-                status_code=404, 
-                detail=f"No matching application found. Found {any_by_candidate} applications for this candidate and {any_by_hr} for this HR."
-            )
-        
-        # Update the application(s)
         update_data = {
             "$set": {
                 "status": new_status,
                 "updated_at": datetime.utcnow().isoformat() + "Z"
             }
         }
-        
+
         res = await apps_col.update_many(query, update_data)
-        
+
+        if res.matched_count == 0:
+            # Diagnostics only on the miss path
+            any_by_candidate = await apps_col.count_documents({"candidate_id": candidate_id})
+            any_by_hr = await apps_col.count_documents({"hr_name": {"$regex": f"^{re.escape(body.hr_name)}$", "$options": "i"}}) if body.hr_name else 0
+            print(f"📊 Debug: {any_by_candidate} apps for candidate, {any_by_hr} apps for HR")
+            raise HTTPException(
+                status_code=404,
+                detail=f"No matching application found. Found {any_by_candidate} applications for this candidate and {any_by_hr} for this HR."
+            )
+
+        # Cards carry the same candidate_id / hr_name / job_id fields
+        await db.application_cards.update_many(query, update_data)
+
         print(f"✅ Update result: matched={res.matched_count}, modified={res.modified_count}")
         
         return {
@@ -313,6 +282,220 @@ async def update_status(body: UpdateStatus):
         print(f"❌ Error in update_status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _app_id_filter(application_id: str) -> Any:
+    # Applications created through the API have ObjectId ids; accept both forms
+    return ObjectId(application_id) if ObjectId.is_valid(application_id) else application_id
+
+
+async def _notify_status_change(db, apps: List[Dict[str, Any]], new_status: str):
+    """One job_criteria read for titles, one insert_many for all candidates."""
+    try:
+        job_oids = list({ObjectId(a["job_id"]) for a in apps if ObjectId.is_valid(a.get("job_id") or "")})
+        titles = {
+            str(j["_id"]): j.get("job_title")
+            async for j in db.job_criteria.find({"_id": {"$in": job_oids}}, {"job_title": 1})
+        }
+        docs = []
+        for app in apps:
+            if not ObjectId.is_valid(app.get("candidate_id") or ""):
+                continue
+            title = titles.get(app.get("job_id")) or "a job"
+            docs.append({
+                "user_id": ObjectId(app["candidate_id"]),
+                "type": "system",
+                "title": "Application update",
+                "message": f"Your application for {title} is now {new_status}.",
+            })
+        await create_notifications(db, docs)
+    except Exception as e:
+        print(f"[ERROR] Status change notifications failed: {e}")
+
+
+@router.patch("/update-status/bulk")
+async def bulk_update_status(body: BulkStatusUpdate, background_tasks: BackgroundTasks):
+    """
+    Set one status on many applications, addressed by application_id or by
+    candidate_id + job_id. One read resolves every item, one bulk_write
+    applies the changes; candidates are notified in a single batch.
+    Returns a result per item, in request order.
+    """
+    new_status = _normalize_status(body.status)
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+
+    ids = {item.application_id for item in body.items if item.application_id}
+    pairs = {(item.candidate_id, item.job_id) for item in body.items
+             if not item.application_id and item.candidate_id and item.job_id}
+    clauses: List[Dict[str, Any]] = []
+    if ids:
+        clauses.append({"_id": {"$in": [_app_id_filter(i) for i in ids]}})
+    if pairs:
+        # Superset of the requested pairs; narrowed through by_pair below
+        clauses.append({
+            "candidate_id": {"$in": list({c for c, _ in pairs})},
+            "job_id": {"$in": list({j for _, j in pairs})},
+        })
+    found = await db.applications.find(
+        {"$or": clauses}, {"candidate_id": 1, "job_id": 1, "status": 1}
+    ).to_list(length=None) if clauses else []
+
+    by_id = {str(a["_id"]): a for a in found}
+    by_pair: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = {}
+    for a in found:
+        by_pair.setdefault((a.get("candidate_id"), a.get("job_id")), []).append(a)
+
+    to_change: Dict[str, Dict[str, Any]] = {}
+    results = []
+    for index, item in enumerate(body.items):
+        if item.application_id:
+            apps = [by_id[item.application_id]] if item.application_id in by_id else []
+        elif item.candidate_id and item.job_id:
+            apps = by_pair.get((item.candidate_id, item.job_id), [])
+        else:
+            results.append({"index": index, "result": "invalid",
+                            "error": "application_id or candidate_id + job_id is required"})
+            continue
+        if not apps:
+            results.append({"index": index, "result": "not_found"})
+            continue
+        changed = [a for a in apps if a.get("status") != new_status]
+        for a in changed:
+            to_change[str(a["_id"])] = a
+        results.append({
+            "index": index,
+            "result": "updated" if changed else "unchanged",
+            "application_ids": [str(a["_id"]) for a in apps],
+        })
+
+    if to_change:
+        update = {"$set": {"status": new_status, "updated_at": datetime.utcnow().isoformat() + "Z"}}
+        ops = [UpdateOne({"_id": a["_id"]}, update) for a in to_change.values()]
+        await db.applications.bulk_write(ops, ordered=False)
+        # Cards share the application _id
+        await db.application_cards.bulk_write(
+            [UpdateOne({"_id": a["_id"]}, update) for a in to_change.values()], ordered=False
+        )
+        if body.notify:
+            background_tasks.add_task(_notify_status_change, db, list(to_change.values()), new_status)
+
+    print(f"✅ Bulk status update: {len(to_change)} applications set to {new_status}")
+    return {"success": True, "status": new_status, "updated": len(to_change), "results": results}
+
+
+def _import_format(file: UploadFile, text: str) -> str:
+    name = (file.filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (file.content_type or ""):
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in (file.content_type or ""):
+        return "csv"
+    return "ndjson" if text.lstrip().startswith("{") else "csv"
+
+
+def _parse_import(text: str, fmt: str) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """(line number, row, error) for every non-blank row of the file."""
+    rows: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]] = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            rows.append((reader.line_num, row, None))
+        return rows
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            rows.append((line_no, None, f"Invalid JSON: {e}"))
+            continue
+        if not isinstance(row, dict):
+            rows.append((line_no, None, "Expected a JSON object"))
+            continue
+        rows.append((line_no, row, None))
+    return rows
+
+
+def _import_doc(row: Dict[str, Any], now: str) -> Dict[str, Any]:
+    doc = {k: str(row.get(k) or "").strip() for k in ("hr_name", "candidate_id", "job_id")}
+    missing = [k for k, v in doc.items() if not v]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    doc["status"] = _normalize_status(str(row["status"])) if row.get("status") else "Pending"
+    doc["applied_at"] = now
+    return doc
+
+
+@router.post("/applications/import")
+async def import_applications(file: UploadFile = File(...)):
+    """
+    Bulk-create applications from a CSV (header: hr_name,candidate_id,job_id
+    [,status]) or NDJSON file. Rows that duplicate an existing application,
+    or an earlier row, are skipped. Returns a result per row.
+    """
+    data = await file.read(IMPORT_MAX_BYTES + 1)
+    if len(data) > IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File too large (max {IMPORT_MAX_BYTES // (1024 * 1024)} MB)")
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+
+    now = datetime.utcnow().isoformat() + "Z"
+    results: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, Dict[str, Any]]] = []
+    for line, row, error in _parse_import(text, _import_format(file, text)):
+        if error is None:
+            try:
+                pending.append((line, _import_doc(row, now)))
+                continue
+            except HTTPException as e:
+                error = e.detail
+            except ValueError as e:
+                error = str(e)
+        results.append({"line": line, "result": "invalid", "error": error})
+
+    def _key(doc):
+        return doc["candidate_id"], doc["job_id"], hr_name_key(doc["hr_name"])
+
+    # One read for every (candidate, job) in the file
+    seen = set()
+    if pending:
+        async for a in db.applications.find(
+            {"candidate_id": {"$in": list({d["candidate_id"] for _, d in pending})},
+             "job_id": {"$in": list({d["job_id"] for _, d in pending})}},
+            {"candidate_id": 1, "job_id": 1, "hr_name": 1},
+        ):
+            seen.add((a.get("candidate_id"), a.get("job_id"), hr_name_key(a.get("hr_name"))))
+
+    to_insert: List[Tuple[int, Dict[str, Any]]] = []
+    for line, doc in pending:
+        if _key(doc) in seen:
+            results.append({"line": line, "result": "duplicate"})
+            continue
+        seen.add(_key(doc))
+        to_insert.append((line, doc))
+
+    if to_insert:
+        res = await db.applications.insert_many([doc for _, doc in to_insert], ordered=False)
+        for (line, _), inserted_id in zip(to_insert, res.inserted_ids):
+            results.append({"line": line, "result": "inserted", "application_id": str(inserted_id)})
+        query = {"_id": {"$in": res.inserted_ids}}
+        try:
+            await score_applications(db, query)
+        except Exception as e:
+            print(f"⚠️ Match scoring failed for imported applications: {e}")
+        await refresh_cards(db, query)
+
+    results.sort(key=lambda r: r["line"])
+    counts = {k: sum(1 for r in results if r["result"] == k) for k in ("inserted", "duplicate", "invalid")}
+    print(f"✅ Application import: {counts}")
+    return {"success": True, **counts, "results": results}
+
+
 @app_router.post("/applications")
 async def create_application(body: ApplicationCreate):
     try:
@@ -333,7 +516,13 @@ async def create_application(body: ApplicationCreate):
         })
         if exists:
             return {"message": "Application already exists"}
-        await apps_col.insert_one(doc)
+        res = await apps_col.insert_one(doc)
+        try:
+            await score_applications(db, {"_id": res.inserted_id})
+        except Exception as e:
+            # Unscored applications still list; /applications/rescore fills them in
+            print(f"⚠️ Match scoring failed for new application: {e}")
+        await refresh_cards(db, {"_id": res.inserted_id})
         return {"message": "Application submitted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -348,18 +537,21 @@ async def delete_application(application_id: str):
         apps_col = db["applications"]
         
         # Try to delete with string ID first
+        deleted_id: Any = application_id
         result = await apps_col.delete_one({"_id": application_id})
         
         # If not found, try with ObjectId
         if result.deleted_count == 0:
             try:
                 from bson import ObjectId
-                result = await apps_col.delete_one({"_id": ObjectId(application_id)})
+                deleted_id = ObjectId(application_id)
+                result = await apps_col.delete_one({"_id": deleted_id})
             except:
                 pass
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Application not found")
+        await delete_cards(db, [deleted_id])
         
         print(f"✅ Deleted application: {application_id}")
         
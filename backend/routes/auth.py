@@ -1,17 +1,23 @@
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Request, Response, Query
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
 from fastapi.encoders import jsonable_encoder
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import Dict, Any
-import os
-from pathlib import Path
+from typing import Dict, Any, Optional
 from pydantic import EmailStr
 from bson import ObjectId
 
 from db.database import Database
 from models.user import UserCreate, UserInDB, UserResponse, UserLogin
 from utils.password_handler import get_password_hash, verify_password
+from utils.user_names import invalidate_user
+from utils.storage import get_storage
+from utils.uploads import save_upload, AVATAR_MAX_BYTES, IMAGE_EXTS
+from utils.avatars import create_thumbnails, get_avatar_entry, pick_variant, invalidate_avatar
+from utils.http_cache import etag_matches
+
+# Browser cache lifetime for /auth/avatar/{user_id} responses (seconds)
+AVATAR_URL_MAX_AGE = 300
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -348,6 +354,7 @@ async def update_current_user(payload: Dict[str, Any]):
 
         updates["updated_at"] = datetime.utcnow()
         await db.users.update_one({"_id": user["_id"]}, {"$set": updates})
+        invalidate_user(user["_id"])
         return {"message": "Profile updated"}
     except HTTPException:
         raise
@@ -443,29 +450,26 @@ async def upload_avatar(user_id: str = Form(...), file: UploadFile = File(...)):
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Only image uploads are allowed")
 
-        # Determine extension
-        ext = os.path.splitext(file.filename or "")[1].lower() or ".png"
-        if ext not in [".png", ".jpg", ".jpeg", ".gif", ".webp"]:
-            ext = ".png"
-
-        # Save to static/avatars
-        base_dir = Path(__file__).resolve().parent.parent  # backend/ directory
-        static_dir = base_dir / "static" / "avatars"
-        static_dir.mkdir(parents=True, exist_ok=True)
-        filename = f"{user_id}{ext}"
-        file_path = static_dir / filename
-
-        with open(file_path, "wb") as out:
-            out.write(await file.read())
-
-        # Store URL relative to API root
-        relative_url = f"/static/avatars/{filename}"
+        stored = await save_upload(file, "avatars", AVATAR_MAX_BYTES, IMAGE_EXTS, ".png")
+        thumbs = await create_thumbnails(stored)
+        relative_url = stored.url
         await db.users.update_one(
             {"_id": _id},
-            {"$set": {"avatar_url": relative_url, "updated_at": datetime.utcnow()}},
+            {"$set": {
+                "avatar_url": relative_url,
+                "avatar_key": stored.key,
+                "avatar_sha256": stored.sha256,
+                "avatar_thumbs": thumbs,
+                "updated_at": datetime.utcnow(),
+            }},
         )
+        invalidate_avatar(user_id)
 
-        return {"avatar_url": relative_url}
+        storage = get_storage()
+        return {
+            "avatar_url": relative_url,
+            "thumbnails": {size: storage.url_for(key) for size, key in thumbs.items()},
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -474,32 +478,39 @@ async def upload_avatar(user_id: str = Form(...), file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=error_msg)
 
 @router.get("/avatar/{user_id}")
-async def get_avatar(user_id: str):
+async def get_avatar(request: Request, user_id: str, size: Optional[int] = Query(None, ge=1, le=1024)):
+    """
+    Current avatar for a user. `size` selects the smallest WebP thumbnail at
+    least that many pixels wide. Supports If-None-Match; the ETag is derived
+    from the image content hash.
+    """
     try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(status_code=400, detail="Invalid user_id")
+
         db = await Database.get_db()
         if db is None:
             raise HTTPException(status_code=500, detail="Failed to connect to database")
 
-        try:
-            _id = ObjectId(user_id)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid user_id")
-
-        user = await db.users.find_one({"_id": _id})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        avatar_url = user.get("avatar_url")
-        if not avatar_url:
+        entry = await get_avatar_entry(db, user_id)
+        if not entry:
             raise HTTPException(status_code=404, detail="Avatar not set")
 
-        # Compute file path from relative URL
-        base_dir = Path(__file__).resolve().parent.parent
-        expected_path = base_dir / avatar_url.lstrip("/")
-        if not expected_path.exists():
-            raise HTTPException(status_code=404, detail="Avatar file not found")
-
-        return FileResponse(str(expected_path))
+        key, etag = pick_variant(entry, size)
+        # The user-addressed URL changes when the avatar does, so keep it
+        # short-lived; the content-hashed /static URLs are immutable
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={AVATAR_URL_MAX_AGE}"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        if key is None:
+            return FileResponse(str(entry["legacy_path"]), headers=headers)
+        storage = get_storage()
+        path = storage.local_path(key)
+        if path is None:
+            # Object store: let the client fetch it from there
+            return RedirectResponse(storage.url_for(key), headers=headers)
+        return FileResponse(str(path), headers=headers)
     except HTTPException:
         raise
     except Exception as e:
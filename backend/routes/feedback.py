@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from bson import ObjectId
 
 from db.database import Database
 from auth.oauth2 import get_current_user
+from utils.user_names import resolve_users
+from utils.pagination import paginate, set_next_cursor
 
 router = APIRouter(prefix="/api/feedback", tags=["Feedback"]) 
 
@@ -51,7 +53,13 @@ async def create_feedback(payload: Dict[str, Any], current_user: Dict[str, Any]
 
 
 @router.get("", response_model=List[Dict[str, Any]])
-async def list_feedback(mine: bool = True, current_user: Dict[str, Any] = Depends(get_current_user)):
+async def list_feedback(
+    response: Response,
+    mine: bool = True,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
     db = await Database.get_db()
     if db is None:
         raise HTTPException(status_code=500, detail="Failed to connect to database")
@@ -60,20 +68,15 @@ async def list_feedback(mine: bool = True, current_user: Dict[str, Any] = Depend
     if mine:
         query["user_id"] = _oid(current_user["id"])
 
-    cursor = db.feedback.find(query).sort("created_at", -1)
+    docs, next_cursor = await paginate(db.feedback, query, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_cursor)
+    users = await resolve_users(db, (it.get("user_id") for it in docs))
+
     items: List[Dict[str, Any]] = []
-    async for it in cursor:
-        user_name = ""
-        email = ""
-        uid = it.get("user_id")
-        if uid:
-            try:
-                user_doc = await db.users.find_one({"_id": uid if isinstance(uid, ObjectId) else _oid(str(uid))})
-                if user_doc:
-                    user_name = user_doc.get("full_name") or user_doc.get("name") or ""
-                    email = user_doc.get("email") or ""
-            except Exception:
-                pass
+    for it in docs:
+        user_doc = users.get(str(it.get("user_id"))) or {}
+        user_name = user_doc.get("full_name") or user_doc.get("name") or ""
+        email = user_doc.get("email") or ""
 
         items.append({
             "id": str(it.get("_id")),
@@ -1,9 +1,10 @@
 # routes/interview_questions.py
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 from typing import Optional, List
 from datetime import datetime
 from db.database import Database
 from models.interview_questions import CreateQuestion, UpdateQuestion, AVAILABLE_FIELDS
+from utils.pagination import paginate, set_next_cursor
 
 router = APIRouter(prefix="/api/interview-questions", tags=["interview-questions"])
 
@@ -56,12 +57,14 @@ async def create_question(question: CreateQuestion):
 
 @router.get("/")
 async def get_questions(
+    response: Response,
     field: Optional[str] = Query(None, description="Filter by job field"),
     question_type: Optional[str] = Query(None, description="Filter by question type"),
     difficulty: Optional[str] = Query(None, description="Filter by difficulty"),
     category: Optional[str] = Query(None, description="Filter by category"),
     limit: int = Query(100, ge=1, le=500),
-    page: int = Query(1, ge=1)
+    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page; takes precedence over page")
 ):
     """
     Get list of interview questions with optional filters.
@@ -82,12 +85,11 @@ async def get_questions(
     if category:
         query["category"] = category
     
-    # Calculate skip for pagination
-    skip = (page - 1) * limit
-    
-    # Fetch questions
-    cursor = db.interview_questions.find(query).sort("created_at", -1).skip(skip).limit(limit)
-    questions = await cursor.to_list(length=limit)
+    # Fetch questions (keyset when a cursor is given, page number otherwise)
+    questions, next_cursor = await paginate(
+        db.interview_questions, query, limit=limit, cursor=cursor, skip=(page - 1) * limit
+    )
+    set_next_cursor(response, next_cursor)
     
     # Convert ObjectId to string
     for q in questions:
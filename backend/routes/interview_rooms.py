@@ -2,13 +2,22 @@
 
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 import os
+import asyncio
 import datetime
 import logging
 import traceback
 
+from pymongo import ReturnDocument
+
 from db.database import Database
+from transcription.streaming import parse_question_index, pop_final_transcript
+from utils.join_tickets import issue_ticket
+from utils.interview_events import event_log, read_timeline, replay
+from utils.deadline_scheduler import deadlines, deadline_payload
+from utils.followup_prefetch import followups, generate_followup_question
+from socket_handlers import remember_room_interview, update_room_interview
 
 # AI handler imports with proper error handling
 try:
@@ -173,12 +182,67 @@ async def create_interview_room(payload: CreateRoomRequest):
 
 
 # --- Start Interview with AI Question Generation ---
+# In-flight starts on this process: interview_id -> task every concurrent caller awaits
+_starts_in_flight: Dict[str, asyncio.Task] = {}
+# A "starting" claim older than this belongs to a worker that died mid-start
+START_CLAIM_TIMEOUT_SECONDS = int(os.getenv("START_CLAIM_TIMEOUT_SECONDS", "180"))
+START_POLL_SECONDS = 0.5
+
+
+def _start_response(questions: list, started_at: datetime.datetime, already_started: bool = False) -> dict:
+    static_count = len([q for q in questions if q.get("source") not in ["ai_generated", "ai_followup"]])
+    ai_count = len([q for q in questions if q.get("source") == "ai_generated"])
+    return {
+        "message": "Interview already started" if already_started else "Interview started successfully",
+        "status": "in_progress",
+        "alreadyStarted": already_started,
+        "startedAt": started_at.isoformat() if started_at else None,
+        "serverTime": datetime.datetime.utcnow().isoformat(),
+        "totalQuestions": len(questions),
+        "staticQuestions": static_count,
+        "aiQuestions": ai_count,
+        "questions": questions
+    }
+
+
+def _stored_start(interview: dict) -> dict:
+    return _start_response(interview.get("questions") or [], interview.get("started_at"), already_started=True)
+
+
+async def _await_other_start(db, interview_id: str) -> dict:
+    """Another worker holds the start claim: wait for its result."""
+    deadline = datetime.datetime.utcnow() + datetime.timedelta(seconds=START_CLAIM_TIMEOUT_SECONDS)
+    while datetime.datetime.utcnow() < deadline:
+        await asyncio.sleep(START_POLL_SECONDS)
+        interview = await db.interviews.find_one(
+            {"_id": interview_id}, {"status": 1, "questions": 1, "started_at": 1}
+        )
+        if not interview:
+            raise HTTPException(status_code=404, detail="Interview not found")
+        if interview.get("status") in ("in_progress", "completed"):
+            return _stored_start(interview)
+        if interview.get("status") != "starting":
+            raise HTTPException(status_code=409, detail="Interview start failed, please retry")
+    raise HTTPException(status_code=409, detail="Interview is still starting, please retry")
+
+
 @router.post("/{interview_id}/start-interview")
 async def start_interview(interview_id: str, request: Request):
     """
     Start the interview (HR only).
     Generates AI questions, merges with static questions, and broadcasts to all participants.
+    Concurrent calls share one start; later calls return the stored questions.
     """
+    task = _starts_in_flight.get(interview_id)
+    if task is None:
+        task = asyncio.create_task(_start_interview_once(interview_id, getattr(request.app.state, "sio", None)))
+        _starts_in_flight[interview_id] = task
+        task.add_done_callback(lambda _: _starts_in_flight.pop(interview_id, None))
+    # Shielded: a caller that goes away must not cancel the start for the others
+    return await asyncio.shield(task)
+
+
+async def _start_interview_once(interview_id: str, sio) -> dict:
     logger.info(f"\n{'='*80}")
     logger.info(f"🚀 START INTERVIEW CALLED - ID: {interview_id}")
     logger.info(f"{'='*80}")
@@ -194,6 +258,41 @@ async def start_interview(interview_id: str, request: Request):
     if not interview.get("room_id"):
         raise HTTPException(status_code=400, detail="Room not created yet")
 
+    if interview.get("status") in ("in_progress", "completed"):
+        logger.info(f"↩️ Interview already started - returning stored questions")
+        return _stored_start(interview)
+
+    # scheduled -> starting: only one caller (on any worker) wins the claim
+    now = datetime.datetime.utcnow()
+    # Mongo keeps milliseconds; truncate so later writes can match this exact claim
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    previous = await db.interviews.find_one_and_update(
+        {"_id": interview_id, "$or": [
+            {"status": {"$nin": ["starting", "in_progress", "completed"]}},
+            {"status": "starting", "starting_at": {"$lt": now - datetime.timedelta(seconds=START_CLAIM_TIMEOUT_SECONDS)}},
+        ]},
+        {"$set": {"status": "starting", "starting_at": now, "updated_at": now}},
+        projection={"status": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is None:
+        logger.info(f"⏳ Interview is being started elsewhere - waiting for it")
+        return await _await_other_start(db, interview_id)
+
+    try:
+        return await _run_start(db, interview_id, interview, sio, now)
+    except Exception:
+        # Release the claim so a retry can start again
+        restore = previous.get("status")
+        await db.interviews.update_one(
+            {"_id": interview_id, "status": "starting", "starting_at": now},
+            {"$set": {"status": "scheduled" if restore in (None, "starting") else restore},
+             "$unset": {"starting_at": ""}}
+        )
+        raise
+
+
+async def _run_start(db, interview_id: str, interview: dict, sio, claimed_at: datetime.datetime) -> dict:
     field = interview.get("field", "general")
     logger.info(f"📂 Interview field: {field}")
     
@@ -301,19 +400,33 @@ async def start_interview(interview_id: str, request: Request):
     server_time = datetime.datetime.utcnow()
     
     try:
-        await db.interviews.update_one(
-            {"_id": interview_id},
+        result = await db.interviews.update_one(
+            # Only while our own claim stands; a start that overran the timeout may have been taken over
+            {"_id": interview_id, "status": "starting", "starting_at": claimed_at},
             {
+                "$unset": {"starting_at": ""},
                 "$set": {
                     "status": "in_progress",
                     "started_at": server_time,
                     "updated_at": server_time,
                     "current_question_index": 0,
+                    "question_started_at": server_time,
                     "questions": final_questions
                 }
             }
         )
+        if not result.matched_count:
+            raise HTTPException(status_code=409, detail="Interview start was taken over by another request")
         logger.info(f"✅ Database updated successfully")
+        started = {
+            "status": "in_progress", "started_at": server_time, "current_question_index": 0,
+            "question_started_at": server_time, "questions": final_questions
+        }
+        update_room_interview(interview.get("room_id"), started)
+        deadlines.track(interview_id, interview.get("room_id"), {**started, "duration": interview.get("duration")})
+        event_log.append(interview_id, "started", {"questions": final_questions})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Database update failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to update interview: {str(e)}")
@@ -324,8 +437,6 @@ async def start_interview(interview_id: str, request: Request):
     logger.info(f"\n📡 Broadcasting to room: {interview['room_id']}")
     
     try:
-        sio = getattr(request.app.state, 'sio', None)
-        
         if sio is not None:
             broadcast_data = {
                 'roomId': interview['room_id'],
@@ -333,7 +444,8 @@ async def start_interview(interview_id: str, request: Request):
                 'serverTime': server_time.isoformat(),
                 'currentQuestionIndex': 0,
                 'totalQuestions': len(final_questions),
-                'questions': final_questions
+                'questions': final_questions,
+                **deadline_payload({**started, "duration": interview.get("duration")})
             }
             
             await sio.emit('interview_started', broadcast_data, room=interview['room_id'])
@@ -348,25 +460,15 @@ async def start_interview(interview_id: str, request: Request):
     # ============================================
     # STEP 6: Return Response
     # ============================================
-    static_count = len([q for q in final_questions if q.get("source") not in ["ai_generated", "ai_followup"]])
-    ai_count = len([q for q in final_questions if q.get("source") == "ai_generated"])
+    response = _start_response(final_questions, server_time)
     
     logger.info(f"\n✅ INTERVIEW STARTED SUCCESSFULLY")
     logger.info(f"   Total Questions: {len(final_questions)}")
-    logger.info(f"   Static: {static_count}")
-    logger.info(f"   AI Generated: {ai_count}")
+    logger.info(f"   Static: {response['staticQuestions']}")
+    logger.info(f"   AI Generated: {response['aiQuestions']}")
     logger.info(f"{'='*80}\n")
     
-    return {
-        "message": "Interview started successfully",
-        "status": "in_progress",
-        "startedAt": server_time.isoformat(),
-        "serverTime": server_time.isoformat(),
-        "totalQuestions": len(final_questions),
-        "staticQuestions": static_count,
-        "aiQuestions": ai_count,
-        "questions": final_questions
-    }
+    return response
 
 
 # --- Submit Answer ---
@@ -384,8 +486,17 @@ async def submit_answer(interview_id: str, payload: dict, request: Request):
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    question_index = payload.get("question_index", 0)
+    question_index = parse_question_index(payload.get("question_index", 0))
+    if question_index is None:
+        raise HTTPException(status_code=400, detail="Invalid question index")
     answer_text = payload.get("answer", "")
+    streamed_text = pop_final_transcript(interview_id, question_index)
+    if question_index != interview.get("current_question_index", 0):
+        # A stream for another question is never attached to this answer
+        streamed_text = None
+    if not answer_text and streamed_text:
+        # Answer was streamed over Socket.IO; the transcript is already final
+        answer_text = streamed_text
     user_id = payload.get("user_id")
     timestamp = datetime.datetime.utcnow()
 
@@ -415,6 +526,7 @@ async def submit_answer(interview_id: str, payload: dict, request: Request):
     # Update database
     update_data = {
         "current_question_index": next_index,
+        "question_started_at": timestamp,
         "updated_at": timestamp
     }
     
@@ -424,13 +536,30 @@ async def submit_answer(interview_id: str, payload: dict, request: Request):
         update_data["room_status"] = "completed"
         logger.info(f"✅ Interview completed!")
 
-    await db.interviews.update_one(
-        {"_id": interview_id},
+    # Guarded like the deadline scheduler's timeout, so only one of them advances the question
+    result = await db.interviews.update_one(
+        {"_id": interview_id, "status": "in_progress", "current_question_index": question_index},
         {
             "$push": {"qa": qa_record},
             "$set": update_data
         }
     )
+    if not result.modified_count:
+        logger.info(f"Answer for Q{question_index} rejected: question already advanced or interview not in progress")
+        raise HTTPException(status_code=409, detail="Question already advanced or interview not in progress")
+    update_room_interview(interview.get("room_id"), update_data)
+    advanced = {**interview, **update_data}
+    deadlines.track(interview_id, interview.get("room_id"), advanced)
+    if is_last:
+        followups.drop(interview_id)
+    else:
+        # Ready by the time HR asks for a follow-up on this answer
+        followups.prefetch(interview_id, question_index, answer_text, interview.get("field", "general"))
+    actor = {"user_id": user_id} if user_id else None
+    event_log.append(interview_id, "answer", qa_record, actor)
+    event_log.append(interview_id, "question_advanced", {"index": next_index}, actor)
+    if is_last:
+        event_log.append(interview_id, "completed", {}, actor)
 
     # Broadcast via Socket.IO
     try:
@@ -443,7 +572,8 @@ async def submit_answer(interview_id: str, payload: dict, request: Request):
                 'nextIndex': next_index,
                 'isComplete': is_last,
                 'timestamp': timestamp.isoformat(),
-                'serverTime': timestamp.isoformat()
+                'serverTime': timestamp.isoformat(),
+                **deadline_payload(advanced)
             }
             
             await sio.emit('next_question', broadcast_data, room=room_id)
@@ -463,6 +593,49 @@ async def submit_answer(interview_id: str, payload: dict, request: Request):
     }
 
 
+# --- Follow-up Question ---
+@router.post("/{interview_id}/followup")
+async def add_followup_question(interview_id: str, payload: Optional[dict] = None):
+    """
+    Append an AI follow-up on an answer (default: the last one) to the question list.
+    Served from the prefetch started by submit-answer when there is one.
+    """
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+
+    interview = await db.interviews.find_one({"_id": interview_id}, {"status": 1, "current_question_index": 1, "qa": 1, "field": 1})
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    if interview.get("status") != "in_progress":
+        raise HTTPException(status_code=400, detail="Interview is not in progress")
+
+    question_index = (payload or {}).get("question_index", interview.get("current_question_index", 0) - 1)
+    question = await followups.take(interview_id, question_index)
+    prefetched = question is not None
+    if question is None:
+        answers = [qa for qa in interview.get("qa", []) if qa.get("question_index") == question_index]
+        if not answers or not answers[-1].get("answer"):
+            raise HTTPException(status_code=400, detail="No answer to follow up on")
+        question = await generate_followup_question(answers[-1]["answer"], interview.get("field", "general"))
+        if question is None:
+            raise HTTPException(status_code=503, detail="Follow-up generation unavailable")
+
+    updated = await db.interviews.find_one_and_update(
+        {"_id": interview_id},
+        {"$push": {"questions": question}, "$set": {"updated_at": datetime.datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    update_room_interview(updated.get("room_id"), {"questions": updated["questions"]})
+    deadlines.track(interview_id, updated.get("room_id"), updated)
+
+    return {
+        "question": question,
+        "prefetched": prefetched,
+        "totalQuestions": len(updated["questions"])
+    }
+
+
 # --- Get Current State ---
 @router.get("/{interview_id}/current-state")
 async def get_current_interview_state(interview_id: str):
@@ -488,11 +661,40 @@ async def get_current_interview_state(interview_id: str):
         "total_questions": len(interview.get("questions", [])),
         "status": interview.get("status", "scheduled"),
         "started_at": interview.get("started_at").isoformat() if interview.get("started_at") else None,
+        "question_started_at": interview.get("question_started_at").isoformat() if interview.get("question_started_at") else None,
         "completed_at": interview.get("completed_at").isoformat() if interview.get("completed_at") else None,
         "serverTime": server_time.isoformat()
     }
 
 
+# --- Session Timeline ---
+@router.get("/{interview_id}/events")
+async def get_interview_events(interview_id: str, after_seq: int = 0, limit: int = 500):
+    """Session timeline in sequence order; page with after_seq=<last seq seen>."""
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+    limit = max(1, min(limit, 1000))
+    return await read_timeline(db, interview_id, after_seq, limit)
+
+
+@router.get("/{interview_id}/replay")
+async def replay_interview(interview_id: str):
+    """Interview state rebuilt from the event log alone."""
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+    events = []
+    while True:
+        page = await read_timeline(db, interview_id, events[-1]["seq"] if events else 0, 1000)
+        events.extend(page)
+        if len(page) < 1000:
+            break
+    if not events:
+        raise HTTPException(status_code=404, detail="No events recorded for this interview")
+    return replay(events)
+
+
 # --- Get Room Status ---
 @router.get("/{interview_id}/status", response_model=RoomStatusResponse)
 async def get_room_status(interview_id: str):
@@ -547,10 +749,16 @@ async def validate_join(payload: JoinRoomRequest):
     else:
         raise HTTPException(status_code=400, detail="Invalid user type")
 
+    # join_room verifies this in memory instead of re-reading the interview
+    remember_room_interview(interview["room_id"], interview)
+    ticket = issue_ticket(interview_id, interview["room_id"], payload.user_id, payload.user_type)
+
     return {
         "authorized": True,
         "interviewId": interview_id,
         "roomId": interview["room_id"],
+        "joinTicket": ticket["ticket"],
+        "ticketExpiresAt": ticket["expires_at"],
         "interviewDate": interview.get("date"),
         "interviewTime": interview.get("time"),
         "duration": interview.get("duration"),
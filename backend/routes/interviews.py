@@ -1,12 +1,16 @@
 # routes/interviews.py
 import logging
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from uuid import uuid4
 from db.database import Database
+from utils.user_names import resolve_users, display_name
+from utils.pagination import paginate, set_next_cursor, stream_ndjson
+from utils.http_cache import make_etag, etag_matches
+from auth.oauth2 import get_current_user
 import datetime
-from fastapi import Request
+from fastapi import Request, Response
 
 
 router = APIRouter(prefix="/api/interviews", tags=["interviews"])
@@ -87,45 +91,120 @@ async def schedule_interview(payload: ScheduleInterviewRequest):
         "field": payload.field
     }
 
+INTERVIEW_SORT = [("date", 1)]
+
+# Dashboard listings never need the question set or transcript
+MY_INTERVIEWS_PROJECTION = {"qa": 0, "questions": 0}
+
+
+def _interview_filter(hr_id, candidate_id, status, field) -> dict:
+    query = {}
+    if hr_id:
+        query["hr_id"] = hr_id
+    if candidate_id:
+        query["candidate_id"] = candidate_id
+    if status:
+        query["status"] = status
+    if field:
+        query["field"] = field
+    return query
+
 # --- Get Interviews ---
 @router.get("")
 async def get_interviews(
+    response: Response,
     hr_id: Optional[str] = Query(None, description="Filter by HR ID"),
     candidate_id: Optional[str] = Query(None, description="Filter by candidate ID"),
     status: Optional[str] = Query(None, description="Filter by status"),
-    field: Optional[str] = Query(None, description="Filter by job field")  # NEW
+    field: Optional[str] = Query(None, description="Filter by job field"),  # NEW
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
 ):
     """
     Get list of interviews with optional filters.
+    Paginated by (date, _id); the next page token is returned in X-Next-Cursor.
     """
     db = await Database.get_db()
     if db is None:
         raise HTTPException(status_code=500, detail="Database unavailable")
 
-    # Build query
-    query = {}
-    if hr_id:
-        query["hr_id"] = hr_id
-    if candidate_id:
-        query["candidate_id"] = candidate_id
-    if status:
-        query["status"] = status
-    if field:  # NEW
-        query["field"] = field
+    query = _interview_filter(hr_id, candidate_id, status, field)
 
     # Fetch interviews
-    interviews = await db.interviews.find(query).sort("date", 1).to_list(length=100)
+    interviews, next_cursor = await paginate(
+        db.interviews, query, sort=INTERVIEW_SORT, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
 
-    # Populate candidate names
+    # Populate candidate names with one batched lookup
+    users = await resolve_users(db, (i.get("candidate_id") for i in interviews))
     for interview in interviews:
-        # Try to get candidate name
-        candidate = await db.users.find_one({"_id": interview["candidate_id"]})
-        if candidate:
-            full_name = candidate.get("full_name") or candidate.get("name") or candidate.get("email", "")
-            interview["candidate_name"] = full_name
-        else:
-            interview["candidate_name"] = None
+        candidate = users.get(str(interview.get("candidate_id")))
+        interview["candidate_name"] = display_name(candidate, "") if candidate else None
+
+    return interviews
+
+# --- Export Interviews (NDJSON) ---
+@router.get("/export")
+async def export_interviews(
+    hr_id: Optional[str] = Query(None, description="Filter by HR ID"),
+    candidate_id: Optional[str] = Query(None, description="Filter by candidate ID"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    field: Optional[str] = Query(None, description="Filter by job field"),
+):
+    """
+    Stream every matching interview as newline-delimited JSON.
+    """
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+
+    query = _interview_filter(hr_id, candidate_id, status, field)
+    cursor = db.interviews.find(query).sort(INTERVIEW_SORT + [("_id", 1)])
+    return stream_ndjson(cursor, filename="interviews.ndjson")
+
+# --- My Interviews ---
+@router.get("/my-interviews")
+async def get_my_interviews(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Get interviews for the current user (HR or Candidate).
+    Returns a slim listing without questions/qa; supports If-None-Match.
+    """
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+
+    role = (current_user.get("role") or "").lower()
+    if role == "hr":
+        query = {"hr_id": current_user["id"]}
+    elif role == "candidate":
+        query = {"candidate_id": current_user["id"]}
+    elif role == "admin":
+        query = {}
+    else:
+        raise HTTPException(status_code=403, detail="Unsupported role")
+
+    interviews, next_cursor = await paginate(
+        db.interviews,
+        query,
+        sort=INTERVIEW_SORT,
+        limit=limit,
+        cursor=cursor,
+        projection=MY_INTERVIEWS_PROJECTION,
+    )
+
+    etag = make_etag(interviews, next_cursor)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
+    response.headers["ETag"] = etag
+    set_next_cursor(response, next_cursor)
     return interviews
 
 # --- Get Single Interview ---
@@ -142,24 +221,16 @@ async def get_interview(interview_id: str):
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    # Get candidate info
-    candidate = await db.users.find_one({"_id": interview["candidate_id"]})
+    # Resolve candidate and HR names in one query
+    users = await resolve_users(db, [interview.get("candidate_id"), interview.get("hr_id")])
+
+    candidate = users.get(str(interview.get("candidate_id")))
     if candidate:
-        interview["candidate_name"] = (
-            candidate.get("full_name") or 
-            candidate.get("name") or 
-            candidate.get("email", "Unknown")
-        )
+        interview["candidate_name"] = display_name(candidate, "Unknown")
 
-    # Get HR info
-    if interview.get("hr_id"):
-        hr_user = await db.users.find_one({"_id": interview["hr_id"]})
-        if hr_user:
-            interview["hr_name"] = (
-                hr_user.get("full_name") or 
-                hr_user.get("name") or 
-                hr_user.get("email", "Unknown")
-            )
+    hr_user = users.get(str(interview.get("hr_id"))) if interview.get("hr_id") else None
+    if hr_user:
+        interview["hr_name"] = display_name(hr_user, "Unknown")
 
     return interview
 
@@ -285,34 +356,3 @@ async def delete_interview(interview_id: str):
         "message": "Interview and associated analysis deleted successfully",
         "deleted_analysis": analysis_result.deleted_count > 0
     }
-  
-
-@router.get("/my-interviews")
-async def get_my_interviews(request: Request):
-    """
-    Get all interviews for the current user (HR or Candidate)
-    """
-    db = await Database.get_db()
-    if db is None:
-        raise HTTPException(status_code=500, detail="Database unavailable")
-    
-    # Get user from token (you'll need to implement proper auth check)
-    # For now, using a simple approach
-    auth_header = request.headers.get('Authorization', '')
-    
-    try:
-        # Extract user info from your auth system
-        # This is a placeholder - adjust based on your auth implementation
-        user_data = {}  # Parse your JWT token here
-        
-        # For now, get from query params as fallback
-        from fastapi import Query
-        
-        # Query all interviews - filter will be done in frontend for now
-        interviews = await db.interviews.find({}).to_list(length=1000)
-        
-        return interviews
-        
-    except Exception as e:
-        logger.error(f"Error fetching my interviews: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId, errors
 from db.database import Database
 from pymongo import ReturnDocument, ASCENDING
+from utils.match_scoring import rescore_for_job
+from utils.application_cards import refresh_for_job
+from utils.skill_resolver import resolve_skills, sync_criteria_skills
+from utils.skill_catalog import get_skill_catalog, catalog_skill_out
 
 router = APIRouter(
     prefix="/api/job-criteria",
@@ -30,6 +34,7 @@ class Skill(SkillBase):
     updated_at: Optional[datetime] = None
 
     class Config:
+        populate_by_name = True
         json_encoders = {ObjectId: str}
         json_schema_extra = {
             "example": {
@@ -69,11 +74,8 @@ class JobCriteria(JobCriteriaBase):
 
 async def get_or_create_skill(db, skill_name: str) -> str:
     """Helper function to get existing skill or create a new one"""
-    skill = await db["skills"].find_one({"name": skill_name.lower()})
-    if not skill:
-        result = await db["skills"].insert_one({"name": skill_name.lower()})
-        return str(result.inserted_id)
-    return str(skill["_id"])
+    skill_ids = await resolve_skills(db, [skill_name])
+    return str(skill_ids[0])
 
 
 @router.get("", response_model=List[JobCriteria])
@@ -123,7 +125,7 @@ async def list_all_job_criteria():
         )
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=dict)
-async def create_job_criteria(criteria: JobCriteriaCreate):
+async def create_job_criteria(criteria: JobCriteriaCreate, background_tasks: BackgroundTasks):
     db = await Database.get_db()
     try:
         # Validate user exists and parse ObjectId
@@ -138,19 +140,8 @@ async def create_job_criteria(criteria: JobCriteriaCreate):
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-        # Build or fetch skills (no transactions; sequential ops)
-        skill_ids = []
-        for skill_name in criteria.skills:
-            skill = await db["skills"].find_one({"name": skill_name.lower()})
-            if not skill:
-                res = await db["skills"].insert_one({
-                    "name": skill_name.lower(),
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                })
-                skill_ids.append(res.inserted_id)
-            else:
-                skill_ids.append(skill["_id"])
+        # One lookup + at most one upsert batch for the whole list
+        skill_ids = await resolve_skills(db, criteria.skills)
 
         # Create criteria
         doc = {
@@ -167,12 +158,10 @@ async def create_job_criteria(criteria: JobCriteriaCreate):
         crit_id = result.inserted_id
 
         # Join table entries
-        if skill_ids:
-            await db["criteria_skills"].insert_many([
-                {"criteria_id": crit_id, "skill_id": sid, "created_at": datetime.utcnow()}
-                for sid in skill_ids
-            ])
+        await sync_criteria_skills(db, crit_id, [], skill_ids)
 
+        background_tasks.add_task(rescore_for_job, db, crit_id)
+        background_tasks.add_task(refresh_for_job, db, crit_id)
         return {"id": str(crit_id), "message": "Job criteria created successfully"}
     except HTTPException:
         raise
@@ -314,7 +303,7 @@ async def get_job_criteria(criteria_id: str):
         )
 
 @router.put("/{criteria_id}", response_model=dict)
-async def update_job_criteria(criteria_id: str, criteria: JobCriteriaCreate):
+async def update_job_criteria(criteria_id: str, criteria: JobCriteriaCreate, background_tasks: BackgroundTasks):
     try:
         db = await Database.get_db()
         
@@ -341,20 +330,8 @@ async def update_job_criteria(criteria_id: str, criteria: JobCriteriaCreate):
                 detail="Invalid ID format"
             )
             
-        # No transactions: process sequentially
-        # Process skills - get or create each skill and collect their IDs as ObjectIds
-        skill_ids = []
-        for skill_name in criteria.skills:
-            skill = await db["skills"].find_one({"name": {"$regex": f"^{skill_name}$", "$options": "i"}})
-            if not skill:
-                res = await db["skills"].insert_one({
-                    "name": skill_name.lower(),
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                })
-                skill_ids.append(res.inserted_id)
-            else:
-                skill_ids.append(skill["_id"])
+        # No transactions: one lookup + at most one upsert batch for the whole list
+        skill_ids = await resolve_skills(db, criteria.skills)
 
         update_data = {
             "job_title": criteria.job_title,
@@ -369,14 +346,11 @@ async def update_job_criteria(criteria_id: str, criteria: JobCriteriaCreate):
         if result.matched_count == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job criteria not found")
 
-        # Refresh join docs
-        await db["criteria_skills"].delete_many({"criteria_id": criteria_id_obj})
-        if skill_ids:
-            await db["criteria_skills"].insert_many([
-                {"criteria_id": criteria_id_obj, "skill_id": sid, "created_at": datetime.utcnow()}
-                for sid in skill_ids
-            ])
+        # Join docs: only the skills that were added or removed
+        await sync_criteria_skills(db, criteria_id_obj, existing_criteria.get("skill_ids"), skill_ids)
 
+        background_tasks.add_task(rescore_for_job, db, criteria_id_obj)
+        background_tasks.add_task(refresh_for_job, db, criteria_id_obj)
         return {"message": "Job criteria updated successfully"}
     
     except HTTPException:
@@ -390,7 +364,7 @@ async def update_job_criteria(criteria_id: str, criteria: JobCriteriaCreate):
         )
 
 @router.delete("/{criteria_id}", response_model=dict)
-async def delete_job_criteria(criteria_id: str):
+async def delete_job_criteria(criteria_id: str, background_tasks: BackgroundTasks):
     try:
         db = await Database.get_db()
         
@@ -412,6 +386,9 @@ async def delete_job_criteria(criteria_id: str):
             )
         # Also clean up join docs
         await db["criteria_skills"].delete_many({"criteria_id": criteria_id_obj})
+        # Applications for this job can no longer be scored
+        background_tasks.add_task(rescore_for_job, db, criteria_id_obj)
+        background_tasks.add_task(refresh_for_job, db, criteria_id_obj)
         
         return {"message": "Job criteria deleted successfully"}
     
@@ -433,11 +410,8 @@ async def delete_job_criteria(criteria_id: str):
 async def list_skills():
     try:
         db = await Database.get_db()
-        skills = []
-        async for skill in db["skills"].find().sort("name", ASCENDING):
-            skill["id"] = str(skill.pop("_id"))
-            skills.append(skill)
-        return skills
+        catalog = await get_skill_catalog(db)
+        return [catalog_skill_out(skill) for skill in catalog.skills]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
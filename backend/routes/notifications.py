@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from bson import ObjectId
 
 from db.database import Database
 from auth.oauth2 import get_current_user
+from utils.pagination import paginate, set_next_cursor
 
 router = APIRouter(prefix="/api/notifications", tags=["Notifications"])
 
@@ -18,9 +19,12 @@ def _oid(val: str) -> ObjectId:
 
 @router.get("", response_model=List[Dict[str, Any]])
 async def list_notifications(
+    response: Response,
     mine: bool = True,
     status_filter: Optional[str] = None,  # all|unread
     type_filter: Optional[str] = None,    # interviews|feedback|practice|system
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,         # X-Next-Cursor from the previous page
     current_user: Dict[str, Any] = Depends(get_current_user),
 ):
     db = await Database.get_db()
@@ -37,9 +41,11 @@ async def list_notifications(
     if type_filter:
         query["type"] = type_filter
 
-    cursor = db.notifications.find(query).sort("created_at", -1)
+    docs, next_cursor = await paginate(db.notifications, query, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_cursor)
+
     items: List[Dict[str, Any]] = []
-    async for it in cursor:
+    for it in docs:
         items.append({
             "id": str(it.get("_id")),
             "type": it.get("type", "system"),
@@ -102,3 +108,21 @@ async def create_notification(db, user_id: ObjectId, type_: str, title: str, mes
     }
     await db.notifications.insert_one(doc)
     return doc
+
+
+async def create_notifications(db, docs: List[Dict[str, Any]]):
+    """Batch form of create_notification: one insert_many for many recipients."""
+    if not docs:
+        return
+    now = datetime.utcnow()
+    await db.notifications.insert_many([
+        {
+            "user_id": d["user_id"],
+            "type": d.get("type") or "system",
+            "title": d.get("title", ""),
+            "message": d.get("message", ""),
+            "action_url": d.get("action_url", ""),
+            "created_at": now,
+        }
+        for d in docs
+    ], ordered=False)
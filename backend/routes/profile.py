@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, BackgroundTasks
 from typing import Dict, Any
 from datetime import datetime
 from bson import ObjectId
-from pathlib import Path
 import os
 
 from db.database import Database
 from auth.oauth2 import get_current_user
+from utils.uploads import save_upload, DOCUMENT_MAX_BYTES, RESUME_EXTS, CERTIFICATE_EXTS
+from utils.resume_index import index_resume
+from utils.match_scoring import rescore_for_candidate
+from utils.application_cards import refresh_for_candidate
 
 router = APIRouter(prefix="/api/profile", tags=["Profile"])
 
@@ -34,7 +37,7 @@ async def get_profile(user_id: str):
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def upsert_profile(payload: Dict[str, Any], current_user: Dict[str, Any] = Depends(get_current_user)):
+async def upsert_profile(payload: Dict[str, Any], background_tasks: BackgroundTasks, current_user: Dict[str, Any] = Depends(get_current_user)):
     """
     Create or update a profile document for a user. If a profile exists for the provided user_id,
     it will be updated; otherwise it will be created.
@@ -81,12 +84,16 @@ async def upsert_profile(payload: Dict[str, Any], current_user: Dict[str, Any] =
         upsert=True,
     )
 
+    # Skills/experience may have changed: refresh this candidate's match scores
+    background_tasks.add_task(rescore_for_candidate, db, user_id)
+    background_tasks.add_task(refresh_for_candidate, db, user_id)
+
     created = res.upserted_id is not None
     return {"message": "Profile created" if created else "Profile updated"}
 
 
 @router.put("/{user_id}")
-async def replace_profile(user_id: str, payload: Dict[str, Any], current_user: Dict[str, Any] = Depends(get_current_user)):
+async def replace_profile(user_id: str, payload: Dict[str, Any], background_tasks: BackgroundTasks, current_user: Dict[str, Any] = Depends(get_current_user)):
     db = await Database.get_db()
     if db is None:
         raise HTTPException(status_code=500, detail="Failed to connect to database")
@@ -101,29 +108,20 @@ async def replace_profile(user_id: str, payload: Dict[str, Any], current_user: D
         payload["field"] = payload["headline"]
 
     await db.profiles.replace_one({"user_id": _oid(user_id)}, payload, upsert=True)
+    background_tasks.add_task(rescore_for_candidate, db, user_id)
+    background_tasks.add_task(refresh_for_candidate, db, user_id)
     return {"message": "Profile saved"}
 
 
 @router.post("/{user_id}/upload-certificate", status_code=status.HTTP_200_OK)
-async def upload_certificate(user_id: str, file: UploadFile = File(...), name: str | None = Form(None), current_user: Dict[str, Any] = Depends(get_current_user)):
+async def upload_certificate(user_id: str, background_tasks: BackgroundTasks, file: UploadFile = File(...), name: str | None = Form(None), current_user: Dict[str, Any] = Depends(get_current_user)):
     db = await Database.get_db()
     if db is None:
         raise HTTPException(status_code=500, detail="Failed to connect to database")
 
-    # Save under backend/static/profile_docs/{user_id}/certs/
-    base_dir = Path(__file__).resolve().parent.parent  # backend/
-    docs_dir = base_dir / "static" / "profile_docs" / user_id / "certs"
-    docs_dir.mkdir(parents=True, exist_ok=True)
-
-    # Determine safe filename
     orig = file.filename or "certificate.pdf"
-    fname = f"{int(datetime.utcnow().timestamp())}_{orig}"
-    target = docs_dir / fname
-    content = await file.read()
-    with open(target, "wb") as out:
-        out.write(content)
-
-    rel_url = f"/static/profile_docs/{user_id}/certs/{fname}"
+    stored = await save_upload(file, "profile_docs/certs", DOCUMENT_MAX_BYTES, CERTIFICATE_EXTS, ".pdf")
+    rel_url = stored.url
 
     # Push into profiles.certificates
     await db.profiles.update_one(
@@ -131,36 +129,27 @@ async def upload_certificate(user_id: str, file: UploadFile = File(...), name: s
         {"$push": {"certificates": {"name": name or orig, "url": rel_url}}, "$setOnInsert": {"created_at": datetime.utcnow(), "user_id": _oid(user_id)}},
         upsert=True,
     )
+    background_tasks.add_task(refresh_for_candidate, db, user_id)
 
     return {"url": rel_url, "name": name or orig}
 
 
 @router.post("/{user_id}/upload-resume", status_code=status.HTTP_200_OK)
-async def upload_resume(user_id: str, file: UploadFile = File(...), current_user: Dict[str, Any] = Depends(get_current_user)):
+async def upload_resume(user_id: str, background_tasks: BackgroundTasks, file: UploadFile = File(...), current_user: Dict[str, Any] = Depends(get_current_user)):
     db = await Database.get_db()
     if db is None:
         raise HTTPException(status_code=500, detail="Failed to connect to database")
 
-    base_dir = Path(__file__).resolve().parent.parent
-    docs_dir = base_dir / "static" / "profile_docs" / user_id
-    docs_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save resume with stable name
-    _, ext = os.path.splitext(file.filename or "")
-    if not ext:
-        ext = ".pdf"
-    safe_ext = ext.lower() if ext.lower() in [".pdf", ".doc", ".docx"] else ".pdf"
-    fname = f"resume{safe_ext}"
-    target = docs_dir / fname
-    content = await file.read()
-    with open(target, "wb") as out:
-        out.write(content)
-
-    rel_url = f"/static/profile_docs/{user_id}/{fname}"
+    stored = await save_upload(file, "profile_docs/resumes", DOCUMENT_MAX_BYTES, RESUME_EXTS, ".pdf")
+    rel_url = stored.url
+    fname = os.path.basename(stored.key)
     await db.profiles.update_one(
         {"user_id": _oid(user_id)},
-        {"$set": {"resume_url": rel_url, "resume_name": file.filename or fname, "updated_at": datetime.utcnow()}, "$setOnInsert": {"created_at": datetime.utcnow(), "user_id": _oid(user_id)}},
+        {"$set": {"resume_url": rel_url, "resume_name": file.filename or fname, "resume_key": stored.key, "resume_sha256": stored.sha256, "updated_at": datetime.utcnow()}, "$setOnInsert": {"created_at": datetime.utcnow(), "user_id": _oid(user_id)}},
         upsert=True,
     )
+    # Extract and index the text after the response is sent
+    background_tasks.add_task(index_resume, db, _oid(user_id), stored.key, stored.sha256)
+    background_tasks.add_task(refresh_for_candidate, db, user_id)
 
     return {"url": rel_url, "name": file.filename or fname}
\ No newline at end of file
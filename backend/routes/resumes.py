@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Dict, Any, List
+
+from db.database import Database
+from auth.oauth2 import get_current_user
+from utils.resume_index import search, backfill
+from utils.user_names import resolve_users, display_name
+
+router = APIRouter(prefix="/api/resumes", tags=["Resumes"])
+
+
+def _require_role(current_user: Dict[str, Any], *roles: str):
+    if (current_user.get("role") or "").lower() not in roles:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+
+@router.get("/search")
+async def search_resumes(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+) -> List[Dict[str, Any]]:
+    """Candidates whose resume matches `q`, best match first."""
+    _require_role(current_user, "hr", "admin")
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+
+    results = await search(db, q, limit)
+    users = await resolve_users(db, [r["user_id"] for r in results])
+    for r in results:
+        user = users.get(r["user_id"])
+        r["name"] = display_name(user, "Unknown")
+        r["email"] = (user or {}).get("email")
+    return results
+
+
+@router.post("/reindex")
+async def reindex_resumes(
+    force: bool = Query(False, description="Re-extract even when the resume is unchanged"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """Bulk backfill of the resume index from all profiles."""
+    _require_role(current_user, "admin")
+    db = await Database.get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+    return await backfill(db, force=force)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from bson import ObjectId, errors
+from pymongo.errors import DuplicateKeyError
 from db.database import Database
+from utils.skill_catalog import get_skill_catalog, skills_changed, catalog_skill_out, normalize_skill
 
 router = APIRouter(
     prefix="/api/skills",
@@ -19,10 +21,11 @@ class SkillCreate(SkillBase):
 
 class Skill(SkillBase):
     id: str = Field(..., alias="_id")
-    created_at: datetime
-    updated_at: datetime
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
+        populate_by_name = True
         json_encoders = {ObjectId: str}
         json_schema_extra = {
             "example": {
@@ -37,48 +40,59 @@ class Skill(SkillBase):
 async def list_skills():
     try:
         db = await Database.get_db()
-        skills = []
-        
-        async for skill in db["skills"].find().sort("name", 1):
-            skill["id"] = str(skill.pop("_id"))
-            skills.append(skill)
-            
-        return skills
-        
+        catalog = await get_skill_catalog(db)
+        return [catalog_skill_out(skill) for skill in catalog.skills]
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while fetching skills: {str(e)}"
         )
 
+@router.get("/suggest")
+async def suggest_skills(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+) -> List[Dict[str, Any]]:
+    """Autocomplete: skills with a word starting with `q`, served from memory."""
+    db = await Database.get_db()
+    catalog = await get_skill_catalog(db)
+    return [{"id": str(skill["_id"]), "name": skill["name"]} for skill in catalog.suggest(q, limit)]
+
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=Skill)
 async def create_skill(skill: SkillCreate):
     try:
         db = await Database.get_db()
         
-        # Check if skill already exists (case-insensitive)
-        existing_skill = await db["skills"].find_one(
-            {"name": {"$regex": f"^{skill.name}$", "$options": "i"}}
-        )
-        
+        name = normalize_skill(skill.name)
+        if not name:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Skill name cannot be empty")
+
+        # Check if skill already exists (names are stored normalized)
+        catalog = await get_skill_catalog(db)
+        existing_skill = catalog.by_name.get(name)
         if existing_skill:
-            existing_skill["id"] = str(existing_skill.pop("_id"))
-            return existing_skill
-            
+            return catalog_skill_out(existing_skill)
+
         # Create new skill
         now = datetime.utcnow()
         skill_data = {
-            "name": skill.name.lower(),
+            "name": name,
             "created_at": now,
             "updated_at": now
         }
-        
-        result = await db["skills"].insert_one(skill_data)
-        created_skill = await db["skills"].find_one({"_id": result.inserted_id})
-        created_skill["id"] = str(created_skill.pop("_id"))
-        
-        return created_skill
-        
+
+        try:
+            await db["skills"].insert_one(skill_data)
+        except DuplicateKeyError:
+            # Created by another worker since our catalog was loaded
+            return catalog_skill_out(await db["skills"].find_one({"name": name}))
+        await skills_changed(db)
+
+        return catalog_skill_out(skill_data)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
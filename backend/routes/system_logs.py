@@ -1,28 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from db.database import Database
 from auth.oauth2 import get_current_user
+from utils.pagination import paginate, set_next_cursor, stream_ndjson
 
 router = APIRouter(prefix="/api/system-logs", tags=["System Logs"])
 
 # Expected document shape in collection `systemLogs`:
 # { _id, user: str, role: 'admin'|'hr'|'candidate', action: str, status: 'Success'|'Failed'|'Error', timestamp: datetime }
 
-@router.get("", response_model=List[Dict[str, Any]])
-async def list_logs(
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
-    q: Optional[str] = None,
-    role: Optional[str] = None,
-    status_filter: Optional[str] = Query(None, alias="status"),
-    sort_by: Optional[str] = Query("date_desc") ,
-    current_user: dict = Depends(get_current_user)
-):
-    db = await Database.get_db()
-    coll = db.systemLogs
-
-    # Build query
+def _log_query(q: Optional[str], role: Optional[str], status_filter: Optional[str]) -> Dict[str, Any]:
     query: Dict[str, Any] = {}
     if q:
         query["$or"] = [
@@ -34,29 +22,68 @@ async def list_logs(
         query["role"] = {"$regex": f"^{role}$", "$options": "i"}
     if status_filter:
         query["status"] = {"$regex": f"^{status_filter}$", "$options": "i"}
+    return query
 
-    # Sort
-    sort_spec = [("timestamp", -1)]
+
+def _log_sort(sort_by: Optional[str]) -> List[tuple]:
     if sort_by == "date_asc":
-        sort_spec = [("timestamp", 1)]
-    elif sort_by == "status_asc":
-        sort_spec = [("status", 1), ("timestamp", -1)]
-    elif sort_by == "status_desc":
-        sort_spec = [("status", -1), ("timestamp", -1)]
-
-    skip = (page - 1) * limit
-
-    results: List[Dict[str, Any]] = []
-    async for doc in coll.find(query).sort(sort_spec).skip(skip).limit(limit):
-        results.append({
-            "id": str(doc.get("_id")),
-            "user": doc.get("user", ""),
-            "role": doc.get("role", ""),
-            "action": doc.get("action", ""),
-            "status": doc.get("status", ""),
-            "timestamp": (doc.get("timestamp") or datetime.utcnow()).isoformat()
-        })
-    return results
+        return [("timestamp", 1)]
+    if sort_by == "status_asc":
+        return [("status", 1), ("timestamp", -1)]
+    if sort_by == "status_desc":
+        return [("status", -1), ("timestamp", -1)]
+    return [("timestamp", -1)]
+
+
+def _to_log_item(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(doc.get("_id")),
+        "user": doc.get("user", ""),
+        "role": doc.get("role", ""),
+        "action": doc.get("action", ""),
+        "status": doc.get("status", ""),
+        "timestamp": (doc.get("timestamp") or datetime.utcnow()).isoformat()
+    }
+
+
+@router.get("", response_model=List[Dict[str, Any]])
+async def list_logs(
+    response: Response,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page; takes precedence over page"),
+    q: Optional[str] = None,
+    role: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    sort_by: Optional[str] = Query("date_desc") ,
+    current_user: dict = Depends(get_current_user)
+):
+    db = await Database.get_db()
+
+    docs, next_cursor = await paginate(
+        db.systemLogs,
+        _log_query(q, role, status_filter),
+        sort=_log_sort(sort_by),
+        limit=limit,
+        cursor=cursor,
+        skip=(page - 1) * limit,
+    )
+    set_next_cursor(response, next_cursor)
+    return [_to_log_item(doc) for doc in docs]
+
+
+@router.get("/export")
+async def export_logs(
+    q: Optional[str] = None,
+    role: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    sort_by: Optional[str] = Query("date_desc"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream all matching log entries as newline-delimited JSON."""
+    db = await Database.get_db()
+    cursor = db.systemLogs.find(_log_query(q, role, status_filter)).sort(_log_sort(sort_by))
+    return stream_ndjson(cursor, _to_log_item, filename="system-logs.ndjson")
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
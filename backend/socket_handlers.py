@@ -2,10 +2,22 @@
 import datetime
 import traceback
 import asyncio
-from typing import Dict, Any
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
 from bson import ObjectId
 import socketio
 
+from transcription.service import TranscriptionError
+from transcription.streaming import AudioStream, parse_question_index, store_final_transcript
+from utils.join_tickets import TicketError, verify_ticket
+from utils.presence import PresenceWriter
+from utils.interview_events import event_log
+from utils.deadline_scheduler import deadlines, deadline_payload
+from utils.clock_sync import clock_telemetry
+from utils.followup_prefetch import followups
+
 # active_rooms: room_id -> { sid -> { user_id, user_name, user_type, joined_at } }
 active_rooms: Dict[str, Dict[str, dict]] = {}
 # Track connection attempts to prevent duplicates
@@ -14,16 +26,165 @@ user_connections: Dict[str, set] = {}  # user_id -> set of sids
 sync_locks: Dict[str, asyncio.Lock] = {}
 # Heartbeat tasks for rooms
 heartbeat_tasks: Dict[str, asyncio.Task] = {}
-
-
-def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
+# Live answer audio: sid -> { room_id, question_index, stream }
+audio_streams: Dict[str, dict] = {}
+# Interview fields room_joined needs, so ticket (re)joins skip Mongo:
+# room_id -> { date, time, duration, type, field, status, current_question_index, started_at,
+#             question_started_at, questions }
+room_interviews: "OrderedDict[str, dict]" = OrderedDict()
+ROOM_INTERVIEW_CACHE_SIZE = 1000
+MAX_CHAT_MESSAGE_CHARS = 2000
+_ROOM_INTERVIEW_FIELDS = ("date", "time", "duration", "type", "field", "status",
+                          "current_question_index", "started_at", "question_started_at", "questions")
+
+
+# Room state versions: room_id -> { epoch, n, questions_n }. `n` moves on every
+# change; clients echo "<epoch>.<n>" back on rejoin so unchanged questions
+# can be left out. A new epoch means the server lost track of the room.
+room_versions: Dict[str, dict] = {}
+# Last non-empty roster per room: room_id -> { participants, at }. Snapshots use
+# it so a room emptied by the shutdown disconnect wave is still captured.
+room_rosters: Dict[str, dict] = {}
+
+
+def _bump_version(room_id: str, questions: bool = False):
+    version = room_versions.get(room_id)
+    if version is None:
+        version = room_versions[room_id] = {"epoch": secrets.token_hex(4), "n": 0, "questions_n": 0}
+    version["n"] += 1
+    if questions:
+        version["questions_n"] = version["n"]
+
+
+def state_token(room_id: str) -> Optional[str]:
+    version = room_versions.get(room_id)
+    return f"{version['epoch']}.{version['n']}" if version else None
+
+
+def _client_has_questions(room_id: str, token: Optional[str]) -> bool:
+    """True when the client's last room_joined already carried the current questions."""
+    version = room_versions.get(room_id)
+    if not version or not isinstance(token, str) or "." not in token:
+        return False
+    epoch, _, n = token.partition(".")
+    return epoch == version["epoch"] and n.isdigit() and version["questions_n"] <= int(n) <= version["n"]
+
+
+def remember_room_interview(room_id: str, interview: Dict[str, Any]) -> Dict[str, Any]:
+    entry = {k: interview.get(k) for k in _ROOM_INTERVIEW_FIELDS}
+    room_interviews[room_id] = entry
+    room_interviews.move_to_end(room_id)
+    while len(room_interviews) > ROOM_INTERVIEW_CACHE_SIZE:
+        evicted, _ = room_interviews.popitem(last=False)
+        room_versions.pop(evicted, None)
+    # Fresh from Mongo: may differ from what clients were sent
+    _bump_version(room_id, questions=True)
+    return entry
+
+
+def update_room_interview(room_id: Optional[str], fields: Dict[str, Any]):
+    """Keep the cached interview fields in step with writes made outside the socket handlers."""
+    entry = room_interviews.get(room_id) if room_id else None
+    if entry is not None:
+        entry.update({k: v for k, v in fields.items() if k in _ROOM_INTERVIEW_FIELDS})
+        _bump_version(room_id, questions="questions" in fields)
+
+
+def snapshot_rooms(max_idle_seconds: float = 600) -> Dict[str, Any]:
+    """Compact state of every room active within `max_idle_seconds`, for utils.room_snapshots."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=max_idle_seconds)
+    rooms = []
+    for room_id, roster in room_rosters.items():
+        if roster["at"] < cutoff or room_id not in room_interviews or room_id not in room_versions:
+            continue
+        rooms.append({
+            "room_id": room_id,
+            "version": room_versions[room_id],
+            "interview": room_interviews[room_id],
+            "participants": roster["participants"],
+            "active_at": roster["at"],
+        })
+    signature = sorted([r["room_id"], r["version"]["epoch"], r["version"]["n"]] for r in rooms)
+    return {"rooms": rooms, "signature": signature}
+
+
+def restore_rooms(snapshot: Dict[str, Any]) -> int:
+    """
+    Load cached interview fields and versions from a snapshot. Sockets
+    died with the old process, so participants come back by rejoining.
+    """
+    for room in snapshot.get("rooms", []):
+        room_interviews[room["room_id"]] = room["interview"]
+        room_versions[room["room_id"]] = room["version"]
+        room_rosters[room["room_id"]] = {"participants": room["participants"], "at": room["active_at"]}
+    return len(snapshot.get("rooms", []))
+
+
+def room_state_sizes() -> Dict[str, int]:
+    return {
+        "active_rooms": len(active_rooms),
+        "sockets": sum(len(p) for p in active_rooms.values()),
+        "user_connections": len(user_connections),
+        "sync_locks": len(sync_locks),
+        "heartbeat_tasks": len(heartbeat_tasks),
+        "audio_streams": len(audio_streams),
+        "room_interviews": len(room_interviews),
+        "room_versions": len(room_versions),
+        "room_rosters": len(room_rosters),
+    }
+
+
+def sweep_rooms(idle_seconds: float) -> Dict[str, int]:
+    """
+    Drop per-room state nobody can use any more: locks, heartbeats and
+    connection entries of rooms without sockets, and cached interview
+    fields, versions and rosters of rooms idle for `idle_seconds`.
+    Returns how many entries of each kind were removed.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=idle_seconds)
+    live_sids = {sid for participants in active_rooms.values() for sid in participants}
+    reclaimed = {"sync_locks": 0, "heartbeat_tasks": 0, "user_connections": 0,
+                 "room_interviews": 0, "room_versions": 0, "room_rosters": 0}
+
+    for room_id in [r for r, lock in sync_locks.items() if r not in active_rooms and not lock.locked()]:
+        del sync_locks[room_id]
+        reclaimed["sync_locks"] += 1
+    for room_id in [r for r in heartbeat_tasks if r not in active_rooms]:
+        heartbeat_tasks.pop(room_id).cancel()
+        reclaimed["heartbeat_tasks"] += 1
+    for user_id, sids in list(user_connections.items()):
+        sids &= live_sids
+        if not sids:
+            del user_connections[user_id]
+            reclaimed["user_connections"] += 1
+
+    for room_id, roster in list(room_rosters.items()):
+        if room_id not in active_rooms and roster["at"] < cutoff:
+            del room_rosters[room_id]
+            reclaimed["room_rosters"] += 1
+    # Cached rooms with no sockets and no recent roster are not coming back soon
+    for room_id in [r for r in room_interviews if r not in active_rooms and r not in room_rosters]:
+        del room_interviews[room_id]
+        reclaimed["room_interviews"] += 1
+    for room_id in [r for r in room_versions if r not in room_interviews]:
+        del room_versions[room_id]
+        reclaimed["room_versions"] += 1
+    return reclaimed
+
+
+def setup_socket_handlers(sio: socketio.AsyncServer, db_getter, transcription_service=None, presence_writer=None):
     """
     Register Socket.IO event handlers.
 
     Args:
         sio: socketio.AsyncServer (async mode)
         db_getter: async callable that returns the DB connection: `db = await db_getter()`
+        transcription_service: TranscriptionService for live answer streaming (optional)
+        presence_writer: PresenceWriter persisting participants (one is started if omitted)
     """
+    if presence_writer is None:
+        presence_writer = PresenceWriter(db_getter)
+        presence_writer.start()
 
     # -------------------------
     # Helpers
@@ -41,6 +202,41 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
             sync_locks[room_id] = asyncio.Lock()
         return sync_locks[room_id]
 
+    def _interview_oid(room_id: str):
+        interview_id = room_id.replace("interview_", "")
+        try:
+            return ObjectId(interview_id)
+        except Exception:
+            return interview_id
+
+    def _mark_presence(room_id: str, **fields):
+        """Queue the room's current participants for the write-behind flush."""
+        participants = [
+            {
+                "sid": s,
+                "user_id": p["user_id"],
+                "user_name": p["user_name"],
+                "user_type": p["user_type"],
+                "joined_at": datetime.datetime.fromisoformat(p["joined_at"]),
+            }
+            for s, p in active_rooms.get(room_id, {}).items()
+        ]
+        presence_writer.mark(room_id, participants, **fields)
+        _bump_version(room_id)
+        if participants:
+            room_rosters[room_id] = {
+                "participants": list({
+                    p["user_id"]: {k: p[k] for k in ("user_id", "user_name", "user_type", "joined_at")}
+                    for p in participants
+                }.values()),
+                "at": datetime.datetime.utcnow(),
+            }
+
+    def _log_event(room_id: str, type_: str, user_info: Optional[Dict[str, Any]] = None, **data):
+        """Append to the interview's event log (flushed in the background)."""
+        actor = {k: user_info.get(k) for k in ("user_id", "user_name", "user_type")} if user_info else None
+        event_log.append(room_id.replace("interview_", ""), type_, data, actor)
+
     async def _cleanup_duplicate_connections(user_id: str, new_sid: str):
         """Remove duplicate connections for the same user"""
         if user_id not in user_connections:
@@ -67,6 +263,12 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
         
         user_connections[user_id].add(new_sid)
 
+    async def _drop_audio_stream(sid: str):
+        entry = audio_streams.pop(sid, None)
+        if entry:
+            await entry["stream"].cancel()
+            print(f"[SOCKET] Dropped audio stream for {sid} in {entry['room_id']}")
+
     async def _broadcast_participants_update(room_id: str):
         """Broadcast updated participants list to room"""
         if room_id not in active_rooms:
@@ -171,6 +373,8 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
         """
         try:
             print(f"[SOCKET] Client disconnected: {sid}")
+            await _drop_audio_stream(sid)
+            clock_telemetry.drop(sid)
 
             rooms_to_clean = []
             # Collect rooms + user_info that need removal
@@ -198,7 +402,6 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
 
             # Update DB and notify others
             if rooms_to_clean:
-                db = await _get_db()
                 for room_id, user_info, removed_sid in rooms_to_clean:
                     try:
                         # Broadcast user left event
@@ -214,25 +417,8 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                     except Exception as e:
                         print("[SOCKET] Error broadcasting user_left:", e)
 
-                    # Update DB
-                    try:
-                        if db is not None:
-                            interview_id = room_id.replace("interview_", "")
-                            try:
-                                interview_oid = ObjectId(interview_id)
-                            except Exception:
-                                interview_oid = interview_id
-                            
-                            result = await db.interviews.update_one(
-                                {"_id": interview_oid},
-                                {
-                                    "$pull": {"participants": {"sid": removed_sid}},
-                                    "$set": {"updated_at": datetime.datetime.utcnow()}
-                                }
-                            )
-                            print(f"[SOCKET] Removed participant {removed_sid} from DB")
-                    except Exception as e:
-                        print("[SOCKET ERROR] disconnect db update:", str(e))
+                    _mark_presence(room_id)
+                    _log_event(room_id, "leave", user_info, reason="disconnect")
 
         except Exception as e:
             print("[SOCKET ERROR] disconnect overall:", e)
@@ -250,7 +436,9 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
             "userId": "<user id or email>",
             "userName": "<display name>",
             "userType": "hr" | "candidate",
-            "interviewId": "<raw_interview_id_optional>"
+            "interviewId": "<raw_interview_id_optional>",
+            "joinTicket": "<from validate-join, optional>",
+            "stateVersion": "<from the last room_joined, optional>"
           }
         """
         room_id = data.get("roomId")
@@ -268,49 +456,78 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
 
         async with _get_sync_lock(room_id):
             try:
-                # Clean up duplicate connections for this user FIRST
-                await _cleanup_duplicate_connections(user_id, sid)
-
-                db = await _get_db()
-                if db is None:
-                    error_msg = "Database unavailable"
-                    print(f"[SOCKET] ❌ {error_msg}")
-                    await sio.emit("error", {"message": error_msg}, room=sid)
-                    return
-
-                # Determine interview_id
-                interview_id = data.get("interviewId") or room_id.replace("interview_", "")
-                print(f"[SOCKET] Looking up interview: {interview_id}")
-                
-                try:
-                    interview_oid = ObjectId(interview_id)
-                except Exception:
-                    interview_oid = interview_id
-
-                interview = await db.interviews.find_one({"_id": interview_oid})
-                if not interview:
-                    error_msg = f"Interview not found: {interview_id}"
-                    print(f"[SOCKET] ❌ {error_msg}")
-                    await sio.emit("error", {"message": error_msg}, room=sid)
-                    return
+                ticket = data.get("joinTicket")
+                if ticket:
+                    # Authorized by validate-join: signature + expiry, no DB
+                    try:
+                        claims = verify_ticket(ticket)
+                    except TicketError as e:
+                        print(f"[SOCKET] ❌ {e}")
+                        await sio.emit("error", {"message": str(e), "code": "invalid_ticket"}, room=sid)
+                        return
+                    if (claims["rid"], claims["uid"], claims["role"]) != (room_id, str(user_id), user_type):
+                        error_msg = "Join ticket does not match this room or user"
+                        print(f"[SOCKET] ❌ {error_msg}")
+                        await sio.emit("error", {"message": error_msg, "code": "invalid_ticket"}, room=sid)
+                        return
+                    interview_id = claims["iid"]
+                    interview = room_interviews.get(room_id)
+                    if interview is None:
+                        db = await _get_db()
+                        doc = await db.interviews.find_one(
+                            {"_id": _interview_oid(room_id)}, {k: 1 for k in _ROOM_INTERVIEW_FIELDS}
+                        ) if db is not None else None
+                        if not doc:
+                            error_msg = f"Interview not found: {interview_id}"
+                            print(f"[SOCKET] ❌ {error_msg}")
+                            await sio.emit("error", {"message": error_msg}, room=sid)
+                            return
+                        interview = remember_room_interview(room_id, doc)
+                else:
+                    # Clients without a ticket: authorize against the interview
+                    db = await _get_db()
+                    if db is None:
+                        error_msg = "Database unavailable"
+                        print(f"[SOCKET] ❌ {error_msg}")
+                        await sio.emit("error", {"message": error_msg}, room=sid)
+                        return
+
+                    interview_id = data.get("interviewId") or room_id.replace("interview_", "")
+                    print(f"[SOCKET] Looking up interview: {interview_id}")
 
-                if not interview.get("room_id"):
-                    error_msg = "Room not created for this interview"
-                    print(f"[SOCKET] ❌ {error_msg}")
-                    await sio.emit("error", {"message": error_msg}, room=sid)
-                    return
+                    try:
+                        interview_oid = ObjectId(interview_id)
+                    except Exception:
+                        interview_oid = interview_id
 
-                # Authorization check
-                if user_type == "hr" and interview.get("hr_id") != user_id:
-                    error_msg = "HR not authorized for this interview"
-                    print(f"[SOCKET] ❌ {error_msg}")
-                    await sio.emit("error", {"message": error_msg}, room=sid)
-                    return
-                if user_type == "candidate" and interview.get("candidate_id") != user_id:
-                    error_msg = "Candidate not authorized for this interview"
-                    print(f"[SOCKET] ❌ {error_msg}")
-                    await sio.emit("error", {"message": error_msg}, room=sid)
-                    return
+                    doc = await db.interviews.find_one({"_id": interview_oid})
+                    if not doc:
+                        error_msg = f"Interview not found: {interview_id}"
+                        print(f"[SOCKET] ❌ {error_msg}")
+                        await sio.emit("error", {"message": error_msg}, room=sid)
+                        return
+
+                    if not doc.get("room_id"):
+                        error_msg = "Room not created for this interview"
+                        print(f"[SOCKET] ❌ {error_msg}")
+                        await sio.emit("error", {"message": error_msg}, room=sid)
+                        return
+
+                    # Authorization check
+                    if user_type == "hr" and doc.get("hr_id") != user_id:
+                        error_msg = "HR not authorized for this interview"
+                        print(f"[SOCKET] ❌ {error_msg}")
+                        await sio.emit("error", {"message": error_msg}, room=sid)
+                        return
+                    if user_type == "candidate" and doc.get("candidate_id") != user_id:
+                        error_msg = "Candidate not authorized for this interview"
+                        print(f"[SOCKET] ❌ {error_msg}")
+                        await sio.emit("error", {"message": error_msg}, room=sid)
+                        return
+                    interview = remember_room_interview(room_id, doc)
+
+                # Authorized: now replace this user's older connections
+                await _cleanup_duplicate_connections(user_id, sid)
 
                 # Join socket room
                 try:
@@ -334,31 +551,9 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                     "joined_at": join_time.isoformat()
                 }
 
-                # Update DB - remove stale entries first
-                try:
-                    await db.interviews.update_one(
-                        {"_id": interview_oid},
-                        {"$pull": {"participants": {"$or": [{"user_id": user_id}, {"sid": sid}]}}}
-                    )
-                    
-                    participant_doc = {
-                        "sid": sid,
-                        "user_id": user_id,
-                        "user_name": user_name,
-                        "user_type": user_type,
-                        "joined_at": join_time
-                    }
-                    
-                    await db.interviews.update_one(
-                        {"_id": interview_oid},
-                        {
-                            "$push": {"participants": participant_doc},
-                            "$set": {"room_status": "active", "updated_at": join_time}
-                        }
-                    )
-                    print(f"[SOCKET] ✅ Updated DB for participant {user_name}")
-                except Exception as e:
-                    print(f"[SOCKET] Warning: failed to update DB participant: {e}")
+                # Persisted by the presence writer after replying
+                _mark_presence(room_id, room_status="active")
+                _log_event(room_id, "join", active_rooms[room_id][sid])
 
                 # Build participants list from memory
                 mem_participants = []
@@ -376,9 +571,15 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
 
                 print(f"[SOCKET] 📊 Room {room_id} has {len(mem_participants)} participants: {[p['userName'] for p in mem_participants]}")
 
+                # Rejoining clients that already have the current questions
+                # get everything else; questions are the bulk of the payload
+                resumed = _client_has_questions(room_id, data.get("stateVersion"))
+
                 # Send room_joined with COMPLETE data
                 room_joined_data = {
                     "roomId": room_id,
+                    "stateVersion": state_token(room_id),
+                    "resumed": resumed,
                     "participants": mem_participants,
                     "interviewInfo": {
                         "interviewId": str(interview_id),
@@ -390,10 +591,13 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                         "status": interview.get("status", "scheduled"),
                         "currentQuestionIndex": interview.get("current_question_index", 0),
                         "startedAt": interview.get("started_at").isoformat() if interview.get("started_at") else None,
-                        "questions": interview.get("questions", []),
-                        "totalQuestions": len(interview.get("questions", []))
+                        "questions": interview.get("questions") or [],
+                        "totalQuestions": len(interview.get("questions") or []),
+                        **deadline_payload(interview)
                     }
                 }
+                if resumed:
+                    del room_joined_data["interviewInfo"]["questions"]
                 
                 print(f"[SOCKET] 📨 Sending room_joined to {sid} with interview status: {interview.get('status')}")
                 await sio.emit("room_joined", room_joined_data, room=sid)
@@ -485,16 +689,48 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                     except Exception:
                         interview_oid = interview_id
                         
-                    await db.interviews.update_one(
-                        {"_id": interview_oid},
+                    # Only a not-yet-started interview; the REST start (or an earlier emit) already did the rest
+                    result = await db.interviews.update_one(
+                        {"_id": interview_oid, "status": {"$nin": ["starting", "in_progress", "completed"]}},
                         {"$set": {
                             "status": "in_progress",
                             "started_at": server_time,
                             "current_question_index": 0,
+                            "question_started_at": server_time,
                             "updated_at": server_time
                         }}
                     )
+                    current = None
+                    if not result.modified_count:
+                        current = await db.interviews.find_one(
+                            {"_id": interview_oid},
+                            {"status": 1, "started_at": 1, "current_question_index": 1, "question_started_at": 1, "duration": 1}
+                        )
+                    if current is not None:
+                        if current.get("status") == "in_progress":
+                            # Already running: bring the sender up to date without resetting or re-broadcasting
+                            started_at = current.get("started_at")
+                            await sio.emit("interview_started", {
+                                "roomId": room_id,
+                                "timestamp": started_at.isoformat() if started_at else None,
+                                "serverTime": server_time.isoformat(),
+                                "currentQuestionIndex": current.get("current_question_index", 0),
+                                "message": "Interview already started",
+                                **deadline_payload(current)
+                            }, room=sid)
+                        print(f"[SOCKET] ↩️ Interview already {current.get('status')}, not restarting")
+                        return
                     print(f"[SOCKET] ✅ DB updated for interview start")
+                update_room_interview(room_id, {
+                    "status": "in_progress", "started_at": server_time, "current_question_index": 0,
+                    "question_started_at": server_time
+                })
+                interview = room_interviews.get(room_id) or {
+                    "status": "in_progress", "started_at": server_time, "current_question_index": 0,
+                    "question_started_at": server_time
+                }
+                deadlines.track(room_id.replace("interview_", ""), room_id, interview)
+                _log_event(room_id, "started", sender)
 
                 # Broadcast to ALL
                 broadcast_data = {
@@ -502,7 +738,8 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                     "timestamp": server_time.isoformat(),
                     "serverTime": server_time.isoformat(),
                     "currentQuestionIndex": 0,
-                    "message": "Interview started!"
+                    "message": "Interview started!",
+                    **deadline_payload(interview)
                 }
                 
                 await sio.emit("interview_started", broadcast_data, room=room_id)
@@ -517,7 +754,7 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
     async def request_sync(sid, data):
         """
         Client requests authoritative state for room.
-        Data: { roomId }
+        Data: { roomId, stateVersion? } - questions are omitted when stateVersion shows the client has them
         """
         room_id = data.get("roomId")
         print(f"[SOCKET] 🔄 request_sync from {sid} for room {room_id}")
@@ -530,33 +767,38 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                 # Small debounce to prevent rapid sync requests
                 await asyncio.sleep(0.1)
 
-                db = await _get_db()
-                if db is None:
-                    await sio.emit("interview_state_sync", {
-                        "status": "unknown",
-                        "currentQuestionIndex": 0,
-                        "startedAt": None,
-                        "participants": [],
-                        "serverTime": datetime.datetime.utcnow().isoformat()
-                    }, room=sid)
-                    return
+                # Cached (or restored) rooms answer from memory
+                interview = room_interviews.get(room_id)
+                if interview is None:
+                    db = await _get_db()
+                    if db is None:
+                        await sio.emit("interview_state_sync", {
+                            "status": "unknown",
+                            "currentQuestionIndex": 0,
+                            "startedAt": None,
+                            "participants": [],
+                            "serverTime": datetime.datetime.utcnow().isoformat()
+                        }, room=sid)
+                        return
 
-                interview_id = room_id.replace("interview_", "")
-                try:
-                    interview_oid = ObjectId(interview_id)
-                except Exception:
-                    interview_oid = interview_id
-
-                interview = await db.interviews.find_one({"_id": interview_oid})
-                if not interview:
-                    await sio.emit("interview_state_sync", {
-                        "status": "not_found",
-                        "currentQuestionIndex": 0,
-                        "startedAt": None,
-                        "participants": [],
-                        "serverTime": datetime.datetime.utcnow().isoformat()
-                    }, room=sid)
-                    return
+                    interview_id = room_id.replace("interview_", "")
+                    try:
+                        interview_oid = ObjectId(interview_id)
+                    except Exception:
+                        interview_oid = interview_id
+
+                    interview = await db.interviews.find_one({"_id": interview_oid})
+                    if not interview:
+                        await sio.emit("interview_state_sync", {
+                            "status": "not_found",
+                            "currentQuestionIndex": 0,
+                            "startedAt": None,
+                            "participants": [],
+                            "serverTime": datetime.datetime.utcnow().isoformat()
+                        }, room=sid)
+                        return
+                    if interview.get("room_id") == room_id:
+                        interview = remember_room_interview(room_id, interview)
 
                 # Participants from memory for realtime accuracy
                 mem_participants = []
@@ -578,9 +820,13 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                     "startedAt": interview.get("started_at").isoformat() if interview.get("started_at") else None,
                     "participants": mem_participants,
                     "serverTime": datetime.datetime.utcnow().isoformat(),
-                    "questions": interview.get("questions", []),
-                    "totalQuestions": len(interview.get("questions", []))
+                    "questions": interview.get("questions") or [],
+                    "totalQuestions": len(interview.get("questions") or []),
+                    "stateVersion": state_token(room_id),
+                    **deadline_payload(interview)
                 }
+                if _client_has_questions(room_id, data.get("stateVersion")):
+                    del state_sync_data["questions"]
 
                 await sio.emit("interview_state_sync", state_sync_data, room=sid)
                 print(f"[SOCKET] ✅ Sent state sync to {sid} for room {room_id}, status: {interview.get('status')}")
@@ -601,6 +847,9 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
         if not room_id:
             return
 
+        if audio_streams.get(sid, {}).get("room_id") == room_id:
+            await _drop_audio_stream(sid)
+
         user_info = None
         if room_id in active_rooms and sid in active_rooms[room_id]:
             user_info = active_rooms[room_id].pop(sid)
@@ -619,23 +868,8 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
 
         # Update DB and broadcast
         if user_info:
-            db = await _get_db()
-            try:
-                if db is not None:
-                    interview_id = room_id.replace("interview_", "")
-                    try:
-                        interview_oid = ObjectId(interview_id)
-                    except Exception:
-                        interview_oid = interview_id
-                    await db.interviews.update_one(
-                        {"_id": interview_oid},
-                        {
-                            "$pull": {"participants": {"sid": sid}},
-                            "$set": {"updated_at": datetime.datetime.utcnow()}
-                        }
-                    )
-            except Exception as e:
-                print(f"[SOCKET ERROR] leave_room db update: {e}")
+            _mark_presence(room_id)
+            _log_event(room_id, "leave", user_info, reason="left")
 
             # Broadcast user_left
             try:
@@ -651,6 +885,21 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
             await _broadcast_participants_update(room_id)
             print(f"[SOCKET] {user_info.get('user_name')} left room {room_id}")
 
+    @sio.event
+    async def clock_sync(sid, data):
+        """
+        NTP-style ping, answered from memory via the ack.
+        data: { "t0": <client send ms>, "roomId"?, "rtt"?, "offset"? } - rtt/offset are the
+        client's estimates from its previous ping, kept as connection telemetry.
+        Returns { t0, t1: server receive ms, t2: server send ms }.
+        """
+        t1 = time.time() * 1000
+        data = data if isinstance(data, dict) else {}
+        room_id = data.get("roomId")
+        user = active_rooms.get(room_id, {}).get(sid) if room_id else None
+        clock_telemetry.record(sid, room_id if user else None, user, data.get("rtt"), data.get("offset"))
+        return {"t0": data.get("t0"), "t1": t1, "t2": time.time() * 1000}
+
     @sio.event
     async def get_participants(sid, data):
         """Emit participants_list to requesting sid"""
@@ -681,11 +930,14 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
         message = data.get("message")
         if not room_id or not message:
             return
+        # Client-supplied: always a bounded string before it is logged or relayed
+        message = str(message)[:MAX_CHAT_MESSAGE_CHARS]
 
         if room_id not in active_rooms or sid not in active_rooms[room_id]:
             return
 
         sender = active_rooms[room_id][sid]
+        _log_event(room_id, "chat", sender, message=message)
         await sio.emit("chat_message", {
             "userId": sender["user_id"],
             "userName": sender["user_name"],
@@ -722,6 +974,7 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
 
                     update_data = {
                         "current_question_index": next_index, 
+                        "question_started_at": server_time,
                         "updated_at": server_time
                     }
                     
@@ -734,6 +987,21 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                         {"$set": update_data}
                     )
                     print(f"[SOCKET] ✅ DB updated: matched={result.matched_count}, modified={result.modified_count}")
+                update_room_interview(room_id, {
+                    "current_question_index": next_index, "question_started_at": server_time,
+                    **({"status": "completed"} if is_complete else {})
+                })
+                interview = room_interviews.get(room_id)
+                if is_complete:
+                    followups.drop(room_id.replace("interview_", ""))
+                    deadlines.untrack(room_id.replace("interview_", ""))
+                else:
+                    followups.advance(room_id.replace("interview_", ""), next_index)
+                    if interview is not None:
+                        deadlines.track(room_id.replace("interview_", ""), room_id, interview)
+                _log_event(room_id, "question_advanced", active_rooms.get(room_id, {}).get(sid), index=next_index)
+                if is_complete:
+                    _log_event(room_id, "completed", active_rooms.get(room_id, {}).get(sid))
 
                 # Broadcast to ALL participants
                 broadcast_data = {
@@ -741,7 +1009,8 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                     "nextIndex": next_index,
                     "isComplete": is_complete,
                     "timestamp": server_time.isoformat(),
-                    "serverTime": server_time.isoformat()
+                    "serverTime": server_time.isoformat(),
+                    **deadline_payload(interview or {})
                 }
                 
                 await sio.emit("next_question", broadcast_data, room=room_id)
@@ -751,5 +1020,105 @@ def setup_socket_handlers(sio: socketio.AsyncServer, db_getter):
                 print(f"[SOCKET ERROR] next_question failed: {e}")
                 traceback.print_exc()
 
+    # -------------------------
+    # Live answer transcription
+    # -------------------------
+    @sio.event
+    async def audio_stream_start(sid, data):
+        """
+        Candidate starts speaking an answer.
+        data: { "roomId", "questionIndex", "mimeType": "audio/webm;codecs=opus", "language": "en" }
+        """
+        room_id = data.get("roomId")
+        question_index = parse_question_index(data.get("questionIndex", 0))
+        if question_index is None:
+            await sio.emit("error", {"message": "Invalid questionIndex"}, room=sid)
+            return
+
+        if transcription_service is None or not transcription_service.available:
+            await sio.emit("error", {"message": "Live transcription not available"}, room=sid)
+            return
+        if room_id not in active_rooms or sid not in active_rooms[room_id]:
+            await sio.emit("error", {"message": "Not in room"}, room=sid)
+            return
+        speaker = active_rooms[room_id][sid]
+        if speaker["user_type"] != "candidate":
+            await sio.emit("error", {"message": "Only the candidate can stream answers"}, room=sid)
+            return
+        interview = room_interviews.get(room_id)
+        if interview is not None and interview.get("current_question_index", 0) != question_index:
+            await sio.emit("error", {"message": "Not the current question"}, room=sid)
+            return
+
+        # A new answer replaces any stream this socket left open
+        await _drop_audio_stream(sid)
+
+        async def _emit_partial(text: str):
+            await sio.emit("transcript_partial", {
+                "roomId": room_id,
+                "questionIndex": question_index,
+                "userId": speaker["user_id"],
+                "text": text,
+                "timestamp": datetime.datetime.utcnow().isoformat()
+            }, room=room_id)
+
+        stream = AudioStream(
+            transcription_service,
+            _emit_partial,
+            mime_type=data.get("mimeType") or "audio/webm",
+            language=data.get("language") or "en",
+        )
+        stream.start()
+        audio_streams[sid] = {"room_id": room_id, "question_index": question_index, "stream": stream}
+        print(f"[SOCKET] 🎙️ audio_stream_start: room={room_id}, Q{question_index}, sid={sid}")
+        await sio.emit("audio_stream_started", {"roomId": room_id, "questionIndex": question_index}, room=sid)
+
+    @sio.event
+    async def audio_chunk(sid, data):
+        """data: { "roomId", "chunk": <binary> }"""
+        entry = audio_streams.get(sid)
+        chunk = data.get("chunk")
+        if not entry or entry["room_id"] != data.get("roomId") or not chunk:
+            return
+        try:
+            entry["stream"].append(bytes(chunk))
+        except TranscriptionError as e:
+            await _drop_audio_stream(sid)
+            await sio.emit("error", {"message": str(e)}, room=sid)
+
+    @sio.event
+    async def audio_stream_end(sid, data):
+        """
+        Candidate finished the answer. Broadcasts transcript_final to the room
+        and also returns it as the event ack.
+        """
+        entry = audio_streams.get(sid)
+        if not entry or entry["room_id"] != data.get("roomId"):
+            # A stream for another room stays open; leaving or disconnecting drops it
+            await sio.emit("error", {"message": "No active audio stream"}, room=sid)
+            return {"error": "No active audio stream", "text": ""}
+        audio_streams.pop(sid, None)
+
+        room_id = entry["room_id"]
+        question_index = entry["question_index"]
+        try:
+            text = await entry["stream"].finish()
+        except Exception as e:
+            # The whole-stream fallback raises the backend's own errors unwrapped
+            print(f"[SOCKET] ❌ Final transcription failed: {e}")
+            await sio.emit("error", {"message": str(e)}, room=sid)
+            return {"error": str(e), "text": ""}
+
+        store_final_transcript(room_id.replace("interview_", ""), question_index, text)
+        _log_event(room_id, "transcript", active_rooms.get(room_id, {}).get(sid), question_index=question_index, text=text)
+        print(f"[SOCKET] ✅ transcript_final: room={room_id}, Q{question_index}, {len(text)} chars")
+        await sio.emit("transcript_final", {
+            "roomId": room_id,
+            "questionIndex": question_index,
+            "text": text,
+            "timestamp": datetime.datetime.utcnow().isoformat()
+        }, room=room_id)
+        return {"text": text}
+
     print("[SOCKET] ✅ All event handlers registered successfully")
     return None
\ No newline at end of file
@@ -0,0 +1,149 @@
+# transcription/backends.py - speech-to-text engines used by TranscriptionService
+import os
+import abc
+import asyncio
+import shutil
+import tempfile
+import threading
+import logging
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Transcript:
+    text: str
+    # Seconds of audio, when the engine reports it
+    duration_seconds: Optional[float] = None
+
+
+class TranscriptionBackend(abc.ABC):
+    """
+    A speech-to-text engine. Blocking engines implement `transcribe`, which
+    the default `atranscribe` runs in a worker thread; engines with their own
+    scheduling (e.g. the local process pool) override `atranscribe`.
+    """
+    name = "base"
+
+    @property
+    def model_id(self) -> str:
+        """Model the engine runs; part of the transcript cache key."""
+        return ""
+
+    async def start(self):
+        """Warm up resources at app startup. No-op by default."""
+
+    async def stop(self):
+        """Release resources at app shutdown. No-op by default."""
+
+    async def atranscribe(
+        self,
+        audio: BinaryIO,
+        filename: str,
+        content_type: str,
+        language: str = "en",
+        timeout: Optional[float] = None,
+    ) -> Transcript:
+        return await asyncio.to_thread(self.transcribe, audio, filename, content_type, language, timeout)
+
+    @abc.abstractmethod
+    def transcribe(
+        self,
+        audio: BinaryIO,
+        filename: str,
+        content_type: str,
+        language: str = "en",
+        timeout: Optional[float] = None,
+    ) -> Transcript:
+        """Blocking transcription of one clip."""
+
+    @property
+    def available(self) -> bool:
+        return True
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """Remote Whisper API (whisper-1) through the OpenAI client."""
+    name = "openai"
+
+    def __init__(self, client, model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+
+    @property
+    def model_id(self) -> str:
+        return self.model
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def transcribe(self, audio, filename, content_type, language="en", timeout=None) -> Transcript:
+        if self.client is None:
+            raise RuntimeError("Whisper client not initialized - check OPENAI_API_KEY")
+
+        client = self.client.with_options(timeout=timeout) if timeout else self.client
+        # Tuple format the OpenAI SDK expects: (filename, file object, content type)
+        result = client.audio.transcriptions.create(
+            file=(filename, audio, content_type),
+            model=self.model,
+            language=language,
+            response_format="verbose_json",
+        )
+        return Transcript(result.text, getattr(result, "duration", None))
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    Offline transcription with the `openai-whisper` package. The model is
+    loaded lazily on first use and shared by all threads.
+    """
+    name = "local"
+
+    def __init__(self, model_size: str = "base", device: Optional[str] = None):
+        self.model_size = model_size
+        self.device = device
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        return self.model_size
+
+    @property
+    def available(self) -> bool:
+        try:
+            import whisper  # noqa: F401
+        except ImportError:
+            return False
+        return shutil.which("ffmpeg") is not None
+
+    def _get_model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    import whisper
+                    logger.info(f"🎙️ Loading local Whisper model '{self.model_size}'")
+                    self._model = whisper.load_model(self.model_size, device=self.device)
+        return self._model
+
+    def transcribe(self, audio, filename, content_type, language="en", timeout=None) -> Transcript:
+        # whisper decodes through ffmpeg, which needs a real path
+        suffix = os.path.splitext(filename or "")[1] or ".webm"
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            shutil.copyfileobj(audio, tmp)
+            path = tmp.name
+        try:
+            import whisper
+            model = self._get_model()
+            # Decoded once here so the clip length comes for free
+            samples = whisper.load_audio(path)
+            result = model.transcribe(samples, language=language, fp16=False)
+            return Transcript((result.get("text") or "").strip(), len(samples) / whisper.audio.SAMPLE_RATE)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
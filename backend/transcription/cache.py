@@ -0,0 +1,105 @@
+# transcription/cache.py - transcripts keyed by audio content hash
+import os
+import logging
+import datetime
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from db.database import Database
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "2048"))
+COLLECTION = "transcript_cache"
+
+
+class TranscriptCache:
+    """
+    Two-level cache: an in-process LRU in front of a Mongo collection whose
+    entries expire via a TTL index on created_at (see db.database.INDEXES).
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> {"text", "duration_seconds"}
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._stats = {
+            "lookups": 0,
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "audio_seconds_saved": 0.0,
+            "bytes_saved": 0,
+        }
+
+    @staticmethod
+    def key(backend: str, model: str, language: str, sha256: str) -> str:
+        # Different engines/models/languages give different text for the same bytes
+        return f"{backend}:{model}:{language}:{sha256}"
+
+    def _remember(self, key: str, entry: Dict):
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _record_hit(self, level: str, entry: Dict, size: int):
+        self._stats[f"{level}_hits"] += 1
+        self._stats["audio_seconds_saved"] += entry.get("duration_seconds") or 0.0
+        self._stats["bytes_saved"] += size
+
+    async def get(self, key: str, size: int = 0) -> Optional[str]:
+        self._stats["lookups"] += 1
+
+        entry = self._lru.get(key)
+        if entry is not None:
+            self._lru.move_to_end(key)
+            self._record_hit("memory", entry, size)
+            return entry["text"]
+
+        try:
+            db = await Database.get_db()
+            doc = await db[COLLECTION].find_one({"_id": key}) if db is not None else None
+        except Exception as e:
+            logger.warning(f"[TRANSCRIBE] transcript cache lookup failed: {e}")
+            doc = None
+
+        if doc is None:
+            self._stats["misses"] += 1
+            return None
+
+        entry = {"text": doc["text"], "duration_seconds": doc.get("duration_seconds")}
+        self._remember(key, entry)
+        self._record_hit("db", entry, size)
+        return entry["text"]
+
+    async def put(self, key: str, text: str, size: int, duration_seconds: Optional[float] = None):
+        """Store a fresh transcript with the duration the backend reported; the audio is never re-read."""
+        self._remember(key, {"text": text, "duration_seconds": duration_seconds})
+
+        try:
+            db = await Database.get_db()
+            if db is None:
+                return
+            await db[COLLECTION].update_one(
+                {"_id": key},
+                {"$set": {
+                    "text": text,
+                    "size": size,
+                    "duration_seconds": duration_seconds,
+                    "created_at": datetime.datetime.utcnow(),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"[TRANSCRIBE] transcript cache write failed: {e}")
+
+    def metrics(self) -> Dict:
+        hits = self._stats["memory_hits"] + self._stats["db_hits"]
+        lookups = self._stats["lookups"]
+        return {
+            **self._stats,
+            "audio_seconds_saved": round(self._stats["audio_seconds_saved"], 1),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._lru),
+        }
@@ -0,0 +1,323 @@
+# transcription/local_pool.py - local Whisper inference on a process pool
+#
+# Each worker process loads the model once (pool initializer), decodes audio
+# with ffmpeg to 16 kHz mono PCM, and transcribes a whole batch per task.
+# Clips up to 30 s in a batch go through one batched decoder pass; longer
+# clips fall back to model.transcribe's sliding window.
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from transcription.backends import Transcript, TranscriptionBackend
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Whisper's decoder window; anything shorter can be batched
+BATCHABLE_SECONDS = 30
+
+# -------------------------
+# Worker process side
+# -------------------------
+_worker_model = None
+
+
+def _init_worker(model_size: str, device: Optional[str], threads: int):
+    """Pool initializer: load the model once per worker process."""
+    global _worker_model
+    import torch
+    import whisper
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_size, device=device)
+
+
+def decode_pcm(audio_bytes: bytes):
+    """Decode any ffmpeg-readable container to float32 mono 16 kHz samples."""
+    import ffmpeg
+    import numpy as np
+
+    out, _ = (
+        ffmpeg.input("pipe:0")
+        .output("pipe:1", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE)
+        .run(input=audio_bytes, capture_stdout=True, capture_stderr=True, quiet=True)
+    )
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def transcribe_batch(model, clips: List, language: str) -> List[str]:
+    """
+    Transcribe already-decoded clips with `model`. Short clips share one
+    batched decode; long clips are transcribed individually.
+    """
+    import torch
+    import whisper
+
+    results: List[Optional[str]] = [None] * len(clips)
+    short = [i for i, pcm in enumerate(clips) if len(pcm) <= BATCHABLE_SECONDS * SAMPLE_RATE]
+
+    if short:
+        n_mels = getattr(model.dims, "n_mels", 80)
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(clips[i])), n_mels=n_mels)
+            for i in short
+        ]).to(model.device)
+        options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+        for i, decoded in zip(short, whisper.decode(model, mels, options)):
+            results[i] = decoded.text.strip()
+
+    for i, pcm in enumerate(clips):
+        if results[i] is None:
+            results[i] = (model.transcribe(pcm, language=language, fp16=False).get("text") or "").strip()
+
+    return results
+
+
+def _worker_transcribe(batch: List[bytes], language: str) -> List[Tuple[bool, str, Optional[float]]]:
+    """Runs in the worker: returns (ok, text-or-error, seconds of audio) per clip."""
+    decoded = []
+    outcome: List[Optional[Tuple[bool, str, Optional[float]]]] = [None] * len(batch)
+    for i, audio_bytes in enumerate(batch):
+        try:
+            decoded.append((i, decode_pcm(audio_bytes)))
+        except Exception as e:
+            outcome[i] = (False, f"Audio decode failed: {e}", None)
+
+    if decoded:
+        try:
+            texts = transcribe_batch(_worker_model, [pcm for _, pcm in decoded], language)
+            for (i, pcm), text in zip(decoded, texts):
+                outcome[i] = (True, text, len(pcm) / SAMPLE_RATE)
+        except Exception as e:
+            for i, _ in decoded:
+                outcome[i] = (False, f"Local transcription failed: {e}", None)
+
+    return outcome
+
+
+# -------------------------
+# Event loop side
+# -------------------------
+@dataclass
+class _Job:
+    audio: bytes
+    language: str
+    future: asyncio.Future = field(repr=False)
+
+
+def _fail_shutdown(jobs: List[_Job]):
+    for job in jobs:
+        if not job.future.done():
+            job.future.set_exception(RuntimeError("Transcription pool shutting down"))
+
+
+class LocalWhisperPoolBackend(TranscriptionBackend):
+    """
+    Async backend feeding a process pool through a bounded queue.
+
+    Jobs that arrive within `batch_window` of each other (same language, up
+    to `max_batch`) are shipped to one worker together. When the queue is
+    full, callers wait at most `queue_timeout` seconds before being refused.
+    """
+    name = "local_pool"
+
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: Optional[str] = None,
+        workers: int = 2,
+        threads_per_worker: int = 0,
+        max_batch: int = 8,
+        batch_window: float = 0.05,
+        queue_size: int = 32,
+        queue_timeout: float = 5.0,
+    ):
+        self.model_size = model_size
+        self.device = device
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        # Running _run_batch tasks; referenced so they aren't collected mid-flight and stop() can cancel them
+        self._batches: set = set()
+        # A job pulled for a batch in another language; it opens the next batch
+        self._carry: Optional[_Job] = None
+
+    @property
+    def model_id(self) -> str:
+        return self.model_size
+
+    @property
+    def available(self) -> bool:
+        try:
+            import whisper  # noqa: F401
+            import ffmpeg  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @property
+    def queue_depth(self) -> int:
+        if self._queue is None:
+            return 0
+        return self._queue.qsize() + (1 if self._carry is not None else 0)
+
+    async def start(self):
+        if self._executor is not None:
+            return
+        logger.info(f"🎙️ Starting local Whisper pool: {self.workers} x '{self.model_size}'")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_size, self.device, self.threads_per_worker),
+        )
+        # Force every worker to spawn (and load its model) now, not on first request
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*[
+                loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers)
+            ])
+        except BaseException:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            raise
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._inflight = asyncio.Semaphore(self.workers)
+        self._start_dispatcher()
+        logger.info("✅ Local Whisper pool ready")
+
+    def _start_dispatcher(self):
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        self._dispatcher.add_done_callback(self._dispatcher_done)
+
+    def _dispatcher_done(self, task: asyncio.Task):
+        # Supervisor: a dispatcher that dies would leave every queued job hanging until its timeout
+        if task.cancelled() or task is not self._dispatcher or self._queue is None:
+            return
+        # The loop releases its worker slot on the way out, so it can simply be restarted
+        logger.error(f"❌ Local Whisper dispatcher exited ({task.exception()!r}), restarting")
+        self._start_dispatcher()
+
+    async def stop(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for task in self._batches:
+            task.cancel()
+        # Each cancelled batch fails its own jobs and releases its worker slot
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._queue is not None:
+            pending = [self._carry] if self._carry is not None else []
+            self._carry = None
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            _fail_shutdown(pending)
+            self._queue = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def atranscribe(self, audio, filename, content_type, language="en", timeout=None) -> Transcript:
+        from transcription.service import TranscriptionError
+
+        if self._executor is None:
+            await self.start()
+
+        audio_bytes = await asyncio.to_thread(audio.read)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put(_Job(audio_bytes, language, future)), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise TranscriptionError("Transcription queue is full, please retry shortly")
+        return await future
+
+    def transcribe(self, audio, filename, content_type, language="en", timeout=None) -> Transcript:
+        raise RuntimeError("LocalWhisperPoolBackend is async-only; use atranscribe()")
+
+    async def _next_batch(self) -> List[_Job]:
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.batch_window
+        try:
+            while len(batch) < self.max_batch:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if job.language != first.language:
+                    # Keep batches single-language; it opens the next round. Not put back
+                    # on the queue: a waiting producer may already have taken the slot
+                    self._carry = job
+                    break
+                batch.append(job)
+        except asyncio.CancelledError:
+            # stop() mid-window: these jobs are off the queue, so nothing else would fail them
+            _fail_shutdown(batch)
+            raise
+        return [job for job in batch if not job.future.cancelled()]
+
+    async def _dispatch_loop(self):
+        while True:
+            # Only pull a new batch once a worker is free, so the queue
+            # (not the executor) absorbs bursts and applies backpressure
+            await self._inflight.acquire()
+            try:
+                batch = await self._next_batch()
+            except BaseException:
+                self._inflight.release()
+                raise
+            if not batch:
+                self._inflight.release()
+                continue
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[_Job]):
+        from transcription.service import TranscriptionError
+
+        loop = asyncio.get_running_loop()
+        try:
+            outcome = await loop.run_in_executor(
+                self._executor, _worker_transcribe, [job.audio for job in batch], batch[0].language
+            )
+            for job, (ok, text, duration) in zip(batch, outcome):
+                if job.future.done():
+                    continue
+                if ok:
+                    job.future.set_result(Transcript(text, duration))
+                else:
+                    job.future.set_exception(TranscriptionError(text))
+        except Exception as e:
+            logger.error(f"❌ Local Whisper batch failed: {e}")
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(TranscriptionError(f"Local transcription failed: {e}"))
+        except asyncio.CancelledError:
+            _fail_shutdown(batch)
+            raise
+        finally:
+            self._inflight.release()
@@ -0,0 +1,228 @@
+# transcription/service.py - async front door for speech-to-text
+import io
+import os
+import asyncio
+import hashlib
+import tempfile
+import logging
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+from transcription.backends import Transcript, TranscriptionBackend, OpenAIWhisperBackend, LocalWhisperBackend
+from transcription.local_pool import LocalWhisperPoolBackend
+from transcription.cache import TranscriptCache
+
+logger = logging.getLogger(__name__)
+
+# Uploads stay in memory up to this size, then spill to a temp file
+SPOOL_MEMORY_BYTES = int(os.getenv("TRANSCRIBE_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+# Whisper API rejects files over 25 MB
+MAX_AUDIO_BYTES = int(os.getenv("TRANSCRIBE_MAX_AUDIO_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+MAX_CONCURRENCY = int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", "4"))
+TIMEOUT_SECONDS = float(os.getenv("TRANSCRIBE_TIMEOUT_SECONDS", "60"))
+
+
+class TranscriptionError(Exception):
+    """Raised for failures that should be reported back to the client."""
+
+
+class AudioTooLarge(TranscriptionError):
+    pass
+
+
+class TranscriptionTimeout(TranscriptionError):
+    pass
+
+
+@dataclass
+class SpooledAudio:
+    file: BinaryIO
+    filename: str
+    content_type: str
+    size: int
+    sha256: str = ""
+
+    def close(self):
+        self.file.close()
+
+
+async def spool_upload(upload: UploadFile, max_bytes: int = MAX_AUDIO_BYTES) -> SpooledAudio:
+    """
+    Copy an upload into a SpooledTemporaryFile chunk by chunk so memory use
+    is bounded by SPOOL_MEMORY_BYTES regardless of the clip length. The
+    content hash is computed on the way through.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise AudioTooLarge(f"Audio exceeds {max_bytes // (1024 * 1024)} MB limit")
+            digest.update(chunk)
+            spooled.write(chunk)
+        spooled.seek(0)
+    except BaseException:
+        spooled.close()
+        raise
+
+    return SpooledAudio(
+        file=spooled,
+        filename=upload.filename or "audio.webm",
+        content_type=upload.content_type or "audio/webm",
+        size=size,
+        sha256=digest.hexdigest(),
+    )
+
+
+class TranscriptionService:
+    """
+    Runs a TranscriptionBackend off the event loop, with at most
+    `max_concurrency` calls in flight and a per-request timeout.
+    """
+
+    def __init__(
+        self,
+        backend: TranscriptionBackend,
+        max_concurrency: int = MAX_CONCURRENCY,
+        timeout: float = TIMEOUT_SECONDS,
+        cache: Optional[TranscriptCache] = None,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.cache = cache
+        self._cache_writes: set = set()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def available(self) -> bool:
+        return self.backend.available
+
+    async def start(self):
+        if self.available:
+            await self.backend.start()
+
+    async def stop(self):
+        await self.backend.stop()
+
+    async def transcribe_audio(self, audio: SpooledAudio, language: str = "en") -> str:
+        return (await self._transcribe(audio, language)).text
+
+    async def _transcribe(self, audio: SpooledAudio, language: str) -> Transcript:
+        """
+        Takes ownership of `audio`. A timeout returns to the caller right away,
+        but the semaphore slot and the file are only released once the backend
+        call has actually finished: a worker thread cannot be stopped, and it
+        may still be reading the file.
+        """
+        if not self.available:
+            audio.close()
+            raise TranscriptionError(f"Transcription backend '{self.backend.name}' is not available")
+
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            audio.close()
+            raise
+        task = asyncio.create_task(self.backend.atranscribe(
+            audio.file,
+            audio.filename,
+            audio.content_type,
+            language,
+            self.timeout,
+        ))
+        task.add_done_callback(lambda t: self._release(t, audio))
+        # asyncio.wait leaves the task running on timeout (or if this caller is cancelled)
+        done, _ = await asyncio.wait({task}, timeout=self.timeout)
+        if not done:
+            raise TranscriptionTimeout(f"Transcription timed out after {self.timeout:g}s")
+        return task.result()
+
+    def _release(self, task: asyncio.Task, audio: SpooledAudio):
+        self._semaphore.release()
+        audio.close()
+        if not task.cancelled() and task.exception() is not None:
+            # Nobody awaits an abandoned call; log its failure here instead
+            logger.debug(f"[TRANSCRIBE] backend call finished with {task.exception()!r}")
+
+    async def transcribe_bytes(
+        self, data: bytes, filename: str, content_type: str, language: str = "en"
+    ) -> str:
+        """Transcribe audio already held in memory (e.g. a streamed window)."""
+        if len(data) > MAX_AUDIO_BYTES:
+            raise AudioTooLarge(f"Audio exceeds {MAX_AUDIO_BYTES // (1024 * 1024)} MB limit")
+        audio = SpooledAudio(file=io.BytesIO(data), filename=filename, content_type=content_type, size=len(data))
+        return await self.transcribe_audio(audio, language)
+
+    async def transcribe_upload(self, upload: UploadFile, language: str = "en") -> str:
+        audio = await spool_upload(upload)
+        try:
+            cache_key = (
+                self.cache.key(self.backend.name, self.backend.model_id, language, audio.sha256)
+                if self.cache else None
+            )
+            if cache_key:
+                cached = await self.cache.get(cache_key, audio.size)
+                if cached is not None:
+                    logger.info(f"[TRANSCRIBE] {audio.filename}: cache hit {audio.sha256[:12]}")
+                    audio.close()
+                    return cached
+        except BaseException:
+            audio.close()
+            raise
+
+        logger.info(f"[TRANSCRIBE] {audio.filename}: {audio.size} bytes, {audio.content_type} via {self.backend.name}")
+        # transcribe_audio owns the file from here and closes it when the backend is done
+        result = await self._transcribe(audio, language)
+        text = result.text
+
+        # Empty results may be transient failures; don't pin them
+        if cache_key and text and text.strip():
+            task = asyncio.create_task(self.cache.put(cache_key, text, audio.size, result.duration_seconds))
+            self._cache_writes.add(task)
+            task.add_done_callback(self._cache_writes.discard)
+        return text
+
+
+def create_transcription_service(whisper_client=None) -> TranscriptionService:
+    """
+    Build the service for this deployment. TRANSCRIBE_BACKEND selects the
+    engine: "openai" (default, remote Whisper API), "local" (openai-whisper
+    in-process) or "local_pool" (openai-whisper on a batching process pool).
+    Uploads are deduplicated by content hash unless TRANSCRIPT_CACHE=0.
+    """
+    backend_name = os.getenv("TRANSCRIBE_BACKEND", "openai").lower()
+    cache = TranscriptCache() if os.getenv("TRANSCRIPT_CACHE", "1") != "0" else None
+    if backend_name == "local_pool":
+        backend: TranscriptionBackend = LocalWhisperPoolBackend(
+            model_size=os.getenv("WHISPER_MODEL", "base"),
+            device=os.getenv("WHISPER_DEVICE") or None,
+            workers=int(os.getenv("WHISPER_POOL_WORKERS", "2")),
+            threads_per_worker=int(os.getenv("WHISPER_THREADS_PER_WORKER", "0")),
+            max_batch=int(os.getenv("WHISPER_MAX_BATCH", "8")),
+            batch_window=float(os.getenv("WHISPER_BATCH_WINDOW_MS", "50")) / 1000,
+            queue_size=int(os.getenv("WHISPER_QUEUE_SIZE", "32")),
+            queue_timeout=float(os.getenv("WHISPER_QUEUE_TIMEOUT_SECONDS", "5")),
+        )
+        # The pool bounds its own concurrency; let the queue absorb bursts
+        return TranscriptionService(
+            backend,
+            max_concurrency=backend.queue_size + backend.workers * backend.max_batch,
+            cache=cache,
+        )
+    if backend_name == "local":
+        backend = LocalWhisperBackend(
+            model_size=os.getenv("WHISPER_MODEL", "base"),
+            device=os.getenv("WHISPER_DEVICE") or None,
+        )
+    else:
+        backend = OpenAIWhisperBackend(whisper_client)
+    return TranscriptionService(backend, cache=cache)
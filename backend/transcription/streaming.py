@@ -0,0 +1,202 @@
+# transcription/streaming.py - incremental transcription of live audio streams
+#
+# The client sends compressed chunks (e.g. MediaRecorder webm/opus) that are
+# only decodable as one growing stream, so each pass re-decodes the buffer to
+# PCM (cheap next to ASR). Audio before `committed_samples` is already
+# transcribed for good; only the tail is re-transcribed for partials. Once
+# the tail grows past the window it is cut at its quietest point and committed.
+import io
+import os
+import wave
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from transcription.local_pool import SAMPLE_RATE, decode_pcm
+from transcription.service import TranscriptionError, TranscriptionService, MAX_AUDIO_BYTES
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_INTERVAL_SECONDS = float(os.getenv("STREAM_PARTIAL_INTERVAL_SECONDS", "1.5"))
+WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "15"))
+# Search this much audio before the window edge for a quiet cut point
+CUT_SEARCH_SECONDS = 2.0
+MIN_TAIL_SECONDS = 0.5
+# Finished transcripts kept for submit-answer fallback
+FINAL_TRANSCRIPTS_MAX = 1000
+
+
+def pcm_to_wav(pcm) -> bytes:
+    """Encode float32 mono samples as 16-bit PCM WAV."""
+    import numpy as np
+
+    samples = (np.clip(pcm, -1.0, 1.0) * 32767).astype(np.int16)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+def quiet_cut(pcm, start: int, end: int) -> int:
+    """Index of the lowest-energy 100 ms frame in pcm[start:end]."""
+    import numpy as np
+
+    frame = SAMPLE_RATE // 10
+    segment = pcm[start:end]
+    n_frames = len(segment) // frame
+    if n_frames < 2:
+        return end
+    energy = (segment[: n_frames * frame].reshape(n_frames, frame) ** 2).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+class AudioStream:
+    """
+    One candidate answer being streamed. Chunks are appended as they arrive;
+    a background task emits partial transcripts every PARTIAL_INTERVAL_SECONDS
+    while new audio keeps coming, and `finish()` returns the final transcript.
+    """
+
+    def __init__(
+        self,
+        service: TranscriptionService,
+        on_partial: Callable[[str], Awaitable[None]],
+        mime_type: str = "audio/webm",
+        language: str = "en",
+        max_bytes: int = MAX_AUDIO_BYTES,
+    ):
+        self.service = service
+        self.on_partial = on_partial
+        self.mime_type = mime_type
+        self.language = language
+        self.max_bytes = max_bytes
+
+        self._buffer = bytearray()
+        self._decoded_bytes = 0
+        self._committed_samples = 0
+        self._committed_text: List[str] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def start(self):
+        self._task = asyncio.create_task(self._partials_loop())
+
+    def append(self, chunk: bytes):
+        if len(self._buffer) + len(chunk) > self.max_bytes:
+            raise TranscriptionError(f"Audio stream exceeds {self.max_bytes // (1024 * 1024)} MB limit")
+        self._buffer.extend(chunk)
+
+    async def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def finish(self) -> str:
+        await self.cancel()
+        async with self._lock:
+            if not self._buffer:
+                return ""
+            try:
+                return await self._transcribe_pass(final=True)
+            except TranscriptionError:
+                raise
+            except Exception as e:
+                # Without a working ffmpeg we can still send the whole
+                # compressed stream in one go
+                logger.warning(f"[STREAM] Incremental decode failed ({e}); transcribing whole stream")
+                return await self.service.transcribe_bytes(
+                    bytes(self._buffer), _filename_for(self.mime_type), self.mime_type, self.language
+                )
+
+    async def _partials_loop(self):
+        while True:
+            await asyncio.sleep(PARTIAL_INTERVAL_SECONDS)
+            if len(self._buffer) == self._decoded_bytes:
+                continue
+            async with self._lock:
+                try:
+                    text = await self._transcribe_pass(final=False)
+                except Exception as e:
+                    # A partial is best-effort; the next pass or finish() retries
+                    logger.debug(f"[STREAM] partial pass skipped: {e}")
+                    continue
+            if text:
+                try:
+                    await self.on_partial(text)
+                except Exception as e:
+                    logger.warning(f"[STREAM] partial emit failed: {e}")
+
+    async def _transcribe_window(self, pcm) -> str:
+        return (await self.service.transcribe_bytes(pcm_to_wav(pcm), "window.wav", "audio/wav", self.language)).strip()
+
+    async def _transcribe_pass(self, final: bool) -> str:
+        snapshot = bytes(self._buffer)
+        pcm = await asyncio.to_thread(decode_pcm, snapshot)
+        self._decoded_bytes = len(snapshot)
+
+        window = int(WINDOW_SECONDS * SAMPLE_RATE)
+        while len(pcm) - self._committed_samples > window:
+            edge = self._committed_samples + window
+            cut = quiet_cut(pcm, edge - int(CUT_SEARCH_SECONDS * SAMPLE_RATE), edge)
+            text = await self._transcribe_window(pcm[self._committed_samples:cut])
+            if text:
+                self._committed_text.append(text)
+            self._committed_samples = cut
+
+        tail = pcm[self._committed_samples:]
+        parts = list(self._committed_text)
+        if len(tail) >= MIN_TAIL_SECONDS * SAMPLE_RATE:
+            tail_text = await self._transcribe_window(tail)
+            if tail_text:
+                parts.append(tail_text)
+                if final:
+                    self._committed_text.append(tail_text)
+                    self._committed_samples = len(pcm)
+        return " ".join(parts)
+
+
+def _filename_for(mime_type: str) -> str:
+    subtype = (mime_type or "audio/webm").split("/")[-1].split(";")[0] or "webm"
+    return f"stream.{subtype}"
+
+
+# -------------------------
+# Finished transcripts
+# -------------------------
+_final_transcripts: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+
+def parse_question_index(value: Any) -> Optional[int]:
+    """A client-supplied question index as a non-negative int, or None when it is not one."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and value >= 0:
+        return value
+    return None
+
+
+def store_final_transcript(interview_id: str, question_index: int, text: str):
+    key = (interview_id, question_index)
+    _final_transcripts[key] = text
+    _final_transcripts.move_to_end(key)
+    while len(_final_transcripts) > FINAL_TRANSCRIPTS_MAX:
+        _final_transcripts.popitem(last=False)
+
+
+def pop_final_transcript(interview_id: str, question_index: int) -> Optional[str]:
+    """Streamed transcript for this answer, if the stream ended on this worker."""
+    return _final_transcripts.pop((interview_id, question_index), None)
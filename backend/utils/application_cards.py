@@ -0,0 +1,140 @@
+"""
+`application_cards`: a denormalized read model of applications joined with
+the candidate's profile and the job criteria, in the exact shape
+GET /api/hr/applications returns, so that endpoint is a single indexed find.
+
+Cards share the application's _id and are refreshed by write hooks on
+applications, profiles and job_criteria (change streams would need a
+replica set, which local deployments don't run).
+"""
+import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+
+# Card fields that are for querying only, never returned. match_scored_at is
+# no longer written to cards but older ones may still carry it
+INTERNAL_FIELDS = {"hr_name_key": 0, "refreshed_at": 0, "match_scored_at": 0}
+
+
+def hr_name_key(hr_name: Optional[str]) -> str:
+    """Normalized HR name used for the indexed equality match."""
+    return " ".join((hr_name or "").split()).lower()
+
+
+def _oid(value: Any) -> Optional[ObjectId]:
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+
+def _stringify(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, list):
+        return [_stringify(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _stringify(v) for k, v in value.items()}
+    return value
+
+
+def _experience(profile: Dict[str, Any]) -> Optional[str]:
+    if profile.get("experience"):
+        return profile["experience"]
+    y = profile.get("experience_years") or 0
+    m = profile.get("experience_months") or 0
+    parts = []
+    if isinstance(y, (int, float)) and y:
+        parts.append(f"{int(y)} year" + ("s" if int(y) != 1 else ""))
+    if isinstance(m, (int, float)) and m:
+        parts.append(f"{int(m)} month" + ("s" if int(m) != 1 else ""))
+    return " ".join(parts) or None
+
+
+def build_card(app: Dict[str, Any], profile: Dict[str, Any], job: Dict[str, Any], now: datetime.datetime) -> Dict[str, Any]:
+    card = {
+        "candidate_id": app.get("candidate_id"),
+        "job_id": app.get("job_id"),
+        "hr_id": str(job["user_id"]) if job.get("user_id") else None,
+        "hr_name": app.get("hr_name"),
+        "hr_name_key": hr_name_key(app.get("hr_name")),
+        "field": profile.get("field"),
+        "experience": _experience(profile),
+        "skills": profile.get("skills") or [],
+        "cv": profile.get("resume_url"),
+        "certificates": profile.get("certificates") or [],
+        "profile_pic": profile.get("avatar_url"),
+        "job_title": job.get("job_title"),
+        "job_description": job.get("description"),
+        "status": app.get("status") or "Pending",
+        "applied_at": app.get("applied_at"),
+        "updated_at": app.get("updated_at"),
+        "match_score": app.get("match_score"),
+        "match_breakdown": app.get("match_breakdown"),
+        "refreshed_at": now,
+    }
+    # Same as the old pipeline: name/email are omitted when the profile lacks them
+    if profile.get("full_name") is not None:
+        card["name"] = profile["full_name"]
+    if profile.get("email") is not None:
+        card["email"] = profile["email"]
+    return _stringify(card)
+
+
+async def refresh_cards(db, query: Dict[str, Any]) -> int:
+    """
+    Rebuild the cards for every application matching `query` with one read
+    per collection and one bulk_write. Returns the number of cards written.
+    """
+    apps = await db.applications.find(query).to_list(length=None)
+    if not apps:
+        return 0
+
+    cand_oids = list({o for o in (_oid(a.get("candidate_id")) for a in apps) if o})
+    job_oids = list({o for o in (_oid(a.get("job_id")) for a in apps) if o})
+    profiles = {str(p["user_id"]): p async for p in db.profiles.find({"user_id": {"$in": cand_oids}})}
+    jobs = {
+        str(j["_id"]): j
+        async for j in db.job_criteria.find({"_id": {"$in": job_oids}}, {"job_title": 1, "description": 1, "user_id": 1})
+    }
+
+    now = datetime.datetime.utcnow()
+    ops = [
+        ReplaceOne(
+            {"_id": app["_id"]},
+            build_card(app, profiles.get(str(app.get("candidate_id")), {}), jobs.get(str(app.get("job_id")), {}), now),
+            upsert=True,
+        )
+        for app in apps
+    ]
+    await db.application_cards.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def delete_cards(db, app_ids: List[Any]):
+    if app_ids:
+        await db.application_cards.bulk_write([DeleteOne({"_id": _id}) for _id in app_ids], ordered=False)
+
+
+async def refresh_for_candidate(db, candidate_id: Any):
+    try:
+        await refresh_cards(db, {"candidate_id": str(candidate_id)})
+    except Exception as e:
+        print(f"[ERROR] Refreshing application cards for candidate {candidate_id} failed: {e}")
+
+
+async def refresh_for_job(db, job_id: Any):
+    try:
+        await refresh_cards(db, {"job_id": str(job_id)})
+    except Exception as e:
+        print(f"[ERROR] Refreshing application cards for job {job_id} failed: {e}")
+
+
+async def ensure_cards(db):
+    """Build the read model on first start after deploy (no-op once populated)."""
+    if await db.application_cards.estimated_document_count() == 0 and await db.applications.estimated_document_count() > 0:
+        built = await refresh_cards(db, {})
+        print(f"✅ Built {built} application cards")
@@ -0,0 +1,138 @@
+import io
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+
+from utils.storage import StorageBackend, get_storage
+from utils.uploads import StoredFile, store_bytes
+
+# Square WebP variants generated at upload time (pixels)
+THUMBNAIL_SIZES = (64, 128, 256)
+
+# How long a user -> avatar lookup stays valid (seconds)
+AVATAR_CACHE_TTL = float(os.getenv("AVATAR_CACHE_TTL", "300"))
+# Least recently used entries (including users without an avatar) are evicted past this
+AVATAR_CACHE_SIZE = int(os.getenv("AVATAR_CACHE_SIZE", "5000"))
+
+_AVATAR_PROJECTION = {"avatar_url": 1, "avatar_key": 1, "avatar_sha256": 1, "avatar_thumbs": 1}
+
+# user_id -> (expires_at, avatar entry or None when the user has no avatar)
+_cache: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _remember(user_id: str, expires_at: float, entry: Optional[Dict[str, Any]]) -> None:
+    _cache[user_id] = (expires_at, entry)
+    _cache.move_to_end(user_id)
+    while len(_cache) > AVATAR_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def render_thumbnails(data: bytes, sizes=THUMBNAIL_SIZES) -> Dict[int, bytes]:
+    """Center-cropped square WebP thumbnails. Needs Pillow; returns {} without it."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        print("⚠️ Pillow not installed - avatar thumbnails disabled")
+        return {}
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        thumbs = {}
+        for size in sizes:
+            # Never upscale: small originals give small thumbnails
+            edge = min(size, img.width, img.height)
+            out = io.BytesIO()
+            ImageOps.fit(img, (edge, edge), Image.LANCZOS).save(out, "WEBP", quality=80, method=4)
+            thumbs[size] = out.getvalue()
+    return thumbs
+
+
+async def create_thumbnails(stored: StoredFile, storage: Optional[StorageBackend] = None) -> Dict[str, str]:
+    """
+    Generate and publish thumbnails for an uploaded avatar. Keys are content
+    hashed like the original, so re-uploads of the same image reuse them.
+    Returns {str(size): storage key}.
+    """
+    storage = storage or get_storage()
+    keys = {size: f"avatars/thumbs/{stored.sha256}_{size}.webp" for size in THUMBNAIL_SIZES}
+
+    present = await asyncio.gather(*[storage.exists(key) for key in keys.values()])
+    if all(present):
+        return {str(size): key for size, key in keys.items()}
+
+    data = await storage.read(stored.key)
+    try:
+        thumbs = await asyncio.to_thread(render_thumbnails, data)
+    except Exception as e:
+        print(f"[ERROR] Avatar thumbnail generation failed: {e}")
+        return {}
+
+    for size, webp in thumbs.items():
+        await store_bytes(webp, keys[size], "image/webp", storage)
+    return {str(size): keys[size] for size in thumbs}
+
+
+async def get_avatar_entry(db, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Avatar fields for a user, cached for AVATAR_CACHE_TTL seconds so hot
+    lookups skip Mongo. Returns None when the user has no avatar.
+    """
+    now = time.monotonic()
+    cached = _cache.get(user_id)
+    if cached and cached[0] > now:
+        _cache.move_to_end(user_id)
+        return cached[1]
+    if cached:
+        del _cache[user_id]
+
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, _AVATAR_PROJECTION)
+    entry = None
+    if user and user.get("avatar_url"):
+        entry = {
+            "url": user["avatar_url"],
+            "key": user.get("avatar_key"),
+            "sha256": user.get("avatar_sha256"),
+            "thumbs": user.get("avatar_thumbs") or {},
+        }
+        if entry["key"]:
+            # Keys are "<prefix>/<sha256><ext>", so older docs without
+            # avatar_sha256 can still get a content validator
+            entry["sha256"] = entry["sha256"] or os.path.splitext(os.path.basename(entry["key"]))[0]
+            local = get_storage().local_path(entry["key"])
+            if local is not None and not await asyncio.to_thread(local.exists):
+                entry = None
+        else:
+            # Avatars saved before the upload service: path from relative URL,
+            # validator from file metadata
+            path = Path(__file__).resolve().parent.parent / entry["url"].lstrip("/")
+            try:
+                stat = await asyncio.to_thread(path.stat)
+                entry["legacy_path"] = path
+                entry["sha256"] = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+            except OSError:
+                entry = None
+    _remember(user_id, now + AVATAR_CACHE_TTL, entry)
+    return entry
+
+
+def pick_variant(entry: Dict[str, Any], size: Optional[int]) -> Tuple[Optional[str], str]:
+    """
+    Smallest thumbnail at least `size` px (the original when none is big
+    enough or no size is asked for). Returns (storage key, ETag).
+    """
+    if size:
+        fits = sorted(int(s) for s in entry["thumbs"] if int(s) >= size)
+        if fits:
+            chosen = str(fits[0])
+            return entry["thumbs"][chosen], f'"{entry["sha256"]}-{chosen}"'
+    return entry.get("key"), f'"{entry["sha256"]}"'
+
+
+def invalidate_avatar(user_id: Any) -> None:
+    _cache.pop(str(user_id), None)
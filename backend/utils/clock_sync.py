@@ -0,0 +1,126 @@
+"""
+Clock-sync telemetry for the `clock_sync` Socket.IO exchange.
+
+The client sends its send time t0; the server acks with its receive and
+send times (t1, t2), all epoch milliseconds. With the ack arrival time t3
+the client estimates
+    rtt    = (t3 - t0) - (t2 - t1)
+    offset = ((t1 - t0) + (t2 - t3)) / 2
+and reports its latest rtt/offset on the next ping. Those reports feed
+per-connection RTT histograms here; histograms of closed connections are
+folded into a running total so memory follows the number of live sockets.
+"""
+import bisect
+from typing import Any, Dict, List, Optional
+
+# Upper bounds (ms); the last bucket counts everything slower
+RTT_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600)
+# Reports outside this range are client bugs or suspended tabs
+MAX_RTT_MS = 60000
+
+
+class RttHistogram:
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(RTT_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def add(self, rtt_ms: float):
+        self.counts[bisect.bisect_left(RTT_BUCKETS_MS, rtt_ms)] += 1
+        self.samples += 1
+        self.total_ms += rtt_ms
+        self.min_ms = rtt_ms if self.min_ms is None else min(self.min_ms, rtt_ms)
+        self.max_ms = rtt_ms if self.max_ms is None else max(self.max_ms, rtt_ms)
+
+    def merge(self, other: "RttHistogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.samples += other.samples
+        self.total_ms += other.total_ms
+        for attr, pick in (("min_ms", min), ("max_ms", max)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                ours = getattr(self, attr)
+                setattr(self, attr, theirs if ours is None else pick(ours, theirs))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th sample (None past the last bound)."""
+        if not self.samples:
+            return None
+        rank = q * self.samples
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return RTT_BUCKETS_MS[i] if i < len(RTT_BUCKETS_MS) else None
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in RTT_BUCKETS_MS] + [f">{RTT_BUCKETS_MS[-1]}"]
+        return {
+            "samples": self.samples,
+            "mean_ms": round(self.total_ms / self.samples, 1) if self.samples else None,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class ClockSyncTelemetry:
+    def __init__(self):
+        # sid -> { room_id, user_id, user_type, rtt: RttHistogram, offset_ms }
+        self._clients: Dict[str, Dict[str, Any]] = {}
+        self._closed = RttHistogram()
+        self.pings = 0
+
+    def record(self, sid: str, room_id: Optional[str], user: Optional[Dict[str, Any]],
+               rtt_ms: Any = None, offset_ms: Any = None):
+        self.pings += 1
+        client = self._clients.get(sid)
+        if client is None:
+            client = self._clients[sid] = {"rtt": RttHistogram(), "offset_ms": None}
+        client["room_id"] = room_id
+        if user:
+            client["user_id"] = user.get("user_id")
+            client["user_type"] = user.get("user_type")
+        if isinstance(rtt_ms, (int, float)) and 0 <= rtt_ms <= MAX_RTT_MS:
+            client["rtt"].add(float(rtt_ms))
+        if isinstance(offset_ms, (int, float)):
+            client["offset_ms"] = offset_ms
+
+    def drop(self, sid: str):
+        client = self._clients.pop(sid, None)
+        if client is not None:
+            self._closed.merge(client["rtt"])
+
+    def metrics(self) -> Dict[str, Any]:
+        overall = RttHistogram()
+        overall.merge(self._closed)
+        rooms: Dict[str, RttHistogram] = {}
+        clients = []
+        for sid, client in self._clients.items():
+            overall.merge(client["rtt"])
+            if client.get("room_id"):
+                rooms.setdefault(client["room_id"], RttHistogram()).merge(client["rtt"])
+            clients.append({
+                "sid": sid,
+                "room_id": client.get("room_id"),
+                "user_id": client.get("user_id"),
+                "user_type": client.get("user_type"),
+                "offset_ms": client["offset_ms"],
+                "rtt": client["rtt"].summary(),
+            })
+        return {
+            "pings": self.pings,
+            "live_clients": len(self._clients),
+            "overall": overall.summary(),
+            "rooms": {room_id: hist.summary() for room_id, hist in rooms.items()},
+            "clients": clients,
+        }
+
+
+clock_telemetry = ClockSyncTelemetry()
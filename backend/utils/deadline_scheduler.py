@@ -0,0 +1,293 @@
+"""
+Server-side question and interview deadlines.
+
+Every in-progress interview this process knows about has at most two
+pending deadlines, kept in one heap: the current question's
+(question_started_at + reading + answering time + grace) and the
+interview's (started_at + duration). A single task sleeps until the
+earliest one. When a question deadline passes with no answer, the
+interview is advanced with one conditional update (filtered on the
+current index, so a submit that got there first or another worker wins
+cleanly) and `next_question` is broadcast once. When the interview
+deadline passes it is completed the same way.
+
+Rescheduling a key just supersedes the old heap entry; stale entries are
+skipped when popped.
+"""
+import os
+import heapq
+import asyncio
+import datetime
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from db.database import Database
+from utils.interview_events import event_log
+from utils.followup_prefetch import followups
+
+# Matches the client's reading + answering phases
+QUESTION_READ_SECONDS = int(os.getenv("QUESTION_READ_SECONDS", "20"))
+QUESTION_ANSWER_SECONDS = int(os.getenv("QUESTION_ANSWER_SECONDS", "40"))
+# Time for the client's own auto-submit (upload + transcription) to land first
+QUESTION_DEADLINE_GRACE_SECONDS = int(os.getenv("QUESTION_DEADLINE_GRACE_SECONDS", "30"))
+DEFAULT_DURATION_MINUTES = 30
+
+
+def question_deadline(question_started_at: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    if question_started_at is None:
+        return None
+    return question_started_at + datetime.timedelta(
+        seconds=QUESTION_READ_SECONDS + QUESTION_ANSWER_SECONDS + QUESTION_DEADLINE_GRACE_SECONDS
+    )
+
+
+def interview_deadline(started_at: Optional[datetime.datetime], duration: Optional[int]) -> Optional[datetime.datetime]:
+    if started_at is None:
+        return None
+    return started_at + datetime.timedelta(minutes=duration or DEFAULT_DURATION_MINUTES)
+
+
+def deadline_payload(interview: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    questionStartedAt / questionDeadline / interviewDeadline for client
+    payloads (None when not running). Clients time the reading and answering
+    phases from questionStartedAt on the server clock.
+    """
+    if interview.get("status") != "in_progress":
+        return {"questionStartedAt": None, "questionDeadline": None, "interviewDeadline": None}
+    q_started = interview.get("question_started_at")
+    q_due = question_deadline(q_started)
+    i_due = interview_deadline(interview.get("started_at"), interview.get("duration"))
+    return {
+        "questionStartedAt": q_started.isoformat() if q_started else None,
+        "questionDeadline": q_due.isoformat() if q_due else None,
+        "interviewDeadline": i_due.isoformat() if i_due else None,
+    }
+
+
+def _id_filter(interview_id: str) -> Dict[str, Any]:
+    # Interviews are keyed by string ids, or ObjectIds for older documents
+    ids: List[Any] = [interview_id]
+    if ObjectId.is_valid(interview_id):
+        ids.append(ObjectId(interview_id))
+    return {"$in": ids}
+
+
+class DeadlineScheduler:
+    def __init__(self):
+        # (due, token, key) - key is ("question" | "interview", interview_id)
+        self._heap: List[Tuple[datetime.datetime, int, Tuple[str, str]]] = []
+        # key -> (token, due) of its live heap entry
+        self._current: Dict[Tuple[str, str], Tuple[int, datetime.datetime]] = {}
+        # interview_id -> { room_id, index, questions, started_at, duration, question_started_at }
+        self._interviews: Dict[str, Dict[str, Any]] = {}
+        self._tokens = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._sio = None
+        self._on_change: Optional[Callable[[str, Dict[str, Any]], None]] = None
+        self.advanced = 0
+        self.completed = 0
+        self.lost_races = 0
+
+    # ---- scheduling ----
+
+    def track(self, interview_id: Any, room_id: Optional[str], interview: Dict[str, Any]):
+        """(Re)schedule deadlines from the interview's current state; completed interviews are dropped."""
+        interview_id = str(interview_id)
+        if interview.get("status") != "in_progress" or not room_id:
+            self.untrack(interview_id)
+            return
+        self._interviews[interview_id] = {
+            "room_id": room_id,
+            "index": interview.get("current_question_index", 0),
+            "questions": interview.get("questions") or [],
+            "started_at": interview.get("started_at"),
+            "duration": interview.get("duration"),
+            "question_started_at": interview.get("question_started_at"),
+        }
+        self._schedule(("question", interview_id), question_deadline(interview.get("question_started_at")))
+        self._schedule(("interview", interview_id), interview_deadline(interview.get("started_at"), interview.get("duration")))
+
+    def untrack(self, interview_id: Any):
+        interview_id = str(interview_id)
+        self._interviews.pop(interview_id, None)
+        self._current.pop(("question", interview_id), None)
+        self._current.pop(("interview", interview_id), None)
+
+    def _schedule(self, key: Tuple[str, str], due: Optional[datetime.datetime]):
+        if due is None:
+            self._current.pop(key, None)
+            return
+        if self._current.get(key, (None, None))[1] == due:
+            return
+        token = next(self._tokens)
+        self._current[key] = (token, due)
+        heapq.heappush(self._heap, (due, token, key))
+        if self._heap[0][1] == token:
+            self._wakeup.set()
+
+    # ---- loop ----
+
+    async def load(self, db) -> int:
+        """Schedule every interview left in progress (after a restart)."""
+        docs = await db.interviews.find(
+            {"status": "in_progress", "started_at": {"$ne": None}},
+            {"room_id": 1, "status": 1, "started_at": 1, "duration": 1, "current_question_index": 1,
+             "question_started_at": 1, "questions": 1},
+        ).to_list(length=None)
+        for doc in docs:
+            self.track(doc["_id"], doc.get("room_id"), doc)
+        return len(docs)
+
+    def start(self, sio, on_change: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self._sio = sio
+        self._on_change = on_change
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            # Drop superseded entries so the head is a live deadline
+            while self._heap and self._current.get(self._heap[0][2], (None,))[0] != self._heap[0][1]:
+                heapq.heappop(self._heap)
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = (self._heap[0][0] - datetime.datetime.utcnow()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, token, key = heapq.heappop(self._heap)
+            del self._current[key]
+            kind, interview_id = key
+            try:
+                if kind == "question":
+                    await self._question_expired(interview_id)
+                else:
+                    await self._interview_expired(interview_id)
+            except Exception as e:
+                print(f"[ERROR] Deadline for {kind} of interview {interview_id} failed: {e}")
+
+    # ---- actions ----
+
+    async def _question_expired(self, interview_id: str):
+        state = self._interviews.get(interview_id)
+        if state is None:
+            return
+        db = await Database.get_db()
+        if db is None:
+            return
+        index, questions = state["index"], state["questions"]
+        question = questions[index] if index < len(questions) else {}
+        now = datetime.datetime.utcnow()
+        next_index = index + 1
+        is_last = next_index >= len(questions)
+        qa_record = {
+            "question_id": question.get("id"),
+            "question_text": question.get("text"),
+            "question_type": question.get("type"),
+            "question_source": question.get("source", "unknown"),
+            "difficulty": question.get("difficulty"),
+            "answer": "",
+            "answered_by": None,
+            "answered_at": now,
+            "question_index": index,
+            "timed_out": True,
+        }
+        fields = {"current_question_index": next_index, "question_started_at": now, "updated_at": now}
+        if is_last:
+            fields.update(status="completed", completed_at=now, room_status="completed")
+        result = await db.interviews.update_one(
+            {"_id": _id_filter(interview_id), "status": "in_progress", "current_question_index": index},
+            {"$push": {"qa": qa_record}, "$set": fields},
+        )
+        if not result.modified_count:
+            # Answered, advanced or completed elsewhere in the meantime
+            self.lost_races += 1
+            return
+        self.advanced += 1
+        event_log.append(interview_id, "answer", qa_record)
+        event_log.append(interview_id, "question_advanced", {"index": next_index, "reason": "timeout"})
+        if is_last:
+            self.completed += 1
+            event_log.append(interview_id, "completed", {"reason": "timeout"})
+        await self._publish(interview_id, state["room_id"], fields, next_index, is_last, "question_timeout")
+
+    async def _interview_expired(self, interview_id: str):
+        state = self._interviews.get(interview_id)
+        if state is None:
+            return
+        db = await Database.get_db()
+        if db is None:
+            return
+        now = datetime.datetime.utcnow()
+        fields = {"status": "completed", "completed_at": now, "room_status": "completed", "updated_at": now}
+        result = await db.interviews.update_one(
+            {"_id": _id_filter(interview_id), "status": "in_progress"}, {"$set": fields}
+        )
+        if not result.modified_count:
+            self.lost_races += 1
+            self.untrack(interview_id)
+            return
+        self.completed += 1
+        event_log.append(interview_id, "completed", {"reason": "duration"})
+        await self._publish(interview_id, state["room_id"], fields, state["index"], True, "interview_timeout")
+
+    async def _publish(self, interview_id: str, room_id: str, fields: Dict[str, Any],
+                       next_index: int, is_complete: bool, reason: str):
+        if self._on_change is not None:
+            self._on_change(room_id, fields)
+        state = self._interviews.get(interview_id, {})
+        if is_complete:
+            followups.drop(interview_id)
+            self.untrack(interview_id)
+        else:
+            followups.advance(interview_id, next_index)
+            self.track(interview_id, room_id, {
+                **state, "status": "in_progress",
+                "current_question_index": next_index, "question_started_at": fields["question_started_at"],
+            })
+        if self._sio is None:
+            return
+        now = fields["updated_at"].isoformat()
+        payload = {
+            "roomId": room_id,
+            "nextIndex": next_index,
+            "isComplete": is_complete,
+            "reason": reason,
+            "timestamp": now,
+            "serverTime": now,
+        }
+        if not is_complete:
+            payload.update(deadline_payload({**state, "status": "in_progress", "question_started_at": fields["question_started_at"]}))
+        await self._sio.emit("next_question", payload, room=room_id)
+        print(f"⏰ {reason}: room {room_id} -> Q{next_index}, complete={is_complete}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "tracked_interviews": len(self._interviews),
+            "pending_deadlines": len(self._current),
+            "heap_size": len(self._heap),
+            "advanced": self.advanced,
+            "completed": self.completed,
+            "lost_races": self.lost_races,
+        }
+
+
+deadlines = DeadlineScheduler()
@@ -0,0 +1,87 @@
+"""
+Speculative follow-up question generation.
+
+When an answer is submitted, a background task generates the follow-up
+for that answer and parks it in the interview's single slot, while the
+candidate moves on to the next question. If HR asks for a follow-up on
+that answer it is served from the slot (or the already-running task)
+instead of starting a fresh Groq call. The slot is only valid while the
+interview sits on the question after the answered one; any further
+advance drops it and cancels generation that is still running.
+"""
+import os
+import asyncio
+from typing import Any, Dict, Optional
+
+try:
+    from ai_handler import generate_followup_question
+    AI_FOLLOWUPS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ Follow-up prefetch disabled, AI handler not available: {e}")
+    AI_FOLLOWUPS_AVAILABLE = False
+
+    async def generate_followup_question(*args, **kwargs):
+        return None
+
+# Answers shorter than this rarely produce a useful follow-up
+MIN_ANSWER_CHARS = 20
+
+
+class FollowupPrefetcher:
+    def __init__(self):
+        # interview_id -> { question_index, task }
+        self._slots: Dict[str, Dict[str, Any]] = {}
+        self._stats = {"prefetched": 0, "served": 0, "served_waiting": 0, "misses": 0, "dropped": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return AI_FOLLOWUPS_AVAILABLE and bool(os.getenv("GROQ_API_KEY"))
+
+    def prefetch(self, interview_id: str, question_index: int, answer: str, field: str):
+        """Start generating the follow-up for this answer, replacing any previous slot."""
+        self.drop(interview_id)
+        if not self.enabled or len((answer or "").strip()) < MIN_ANSWER_CHARS:
+            return
+        self._slots[interview_id] = {
+            "question_index": question_index,
+            "task": asyncio.create_task(generate_followup_question(answer, field)),
+        }
+        self._stats["prefetched"] += 1
+
+    def advance(self, interview_id: str, current_index: int):
+        """The interview moved to `current_index`: keep only a slot for the answer just before it."""
+        slot = self._slots.get(interview_id)
+        if slot is not None and slot["question_index"] != current_index - 1:
+            self.drop(interview_id)
+
+    def drop(self, interview_id: str):
+        slot = self._slots.pop(interview_id, None)
+        if slot is None:
+            return
+        # No-op when generation already finished; the unused question is just discarded
+        slot["task"].cancel()
+        self._stats["dropped"] += 1
+
+    async def take(self, interview_id: str, question_index: int) -> Optional[Dict[str, Any]]:
+        """The prefetched follow-up for that answer, or None when there is none to serve."""
+        slot = self._slots.get(interview_id)
+        if slot is None or slot["question_index"] != question_index:
+            self._stats["misses"] += 1
+            return None
+        del self._slots[interview_id]
+        waited = not slot["task"].done()
+        try:
+            question = await slot["task"]
+        except Exception:
+            question = None
+        if question is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["served_waiting" if waited else "served"] += 1
+        return question
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self._stats, "enabled": self.enabled, "slots": len(self._slots)}
+
+
+followups = FollowupPrefetcher()
@@ -0,0 +1,47 @@
+import os
+import re
+import hashlib
+from typing import Any
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.staticfiles import StaticFiles
+from bson import ObjectId
+
+# Content-addressed file names written by utils.uploads: "<sha256>[_<variant>].<ext>"
+_HASHED_NAME = re.compile(r"^[0-9a-f]{64}(_[0-9a-z]+)?\.[0-9a-z]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over any JSON-encodable values (ObjectIds become strings)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(jsonable_encoder(part, custom_encoder={ObjectId: str})).encode("utf-8"))
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class HashedStaticFiles(StaticFiles):
+    """
+    StaticFiles that marks content-addressed files as immutable, so browsers
+    never revalidate them; other files keep the default validators.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _HASHED_NAME.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
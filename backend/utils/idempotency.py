@@ -0,0 +1,280 @@
+"""
+Idempotency-Key support for retry-prone mutating endpoints.
+
+A request to one of IDEMPOTENT_ROUTES that carries an `Idempotency-Key`
+header is executed once; retries with the same key get the stored status
+and body back (with `Idempotent-Replayed: true`) instead of repeating DB
+writes or LLM calls. Keys are scoped to method, path and Authorization
+header, and bound to a hash of the request body: reusing a key for a
+different body is a 422.
+
+Records live in `idempotency_keys` (TTL index, IDEMPOTENCY_TTL_SECONDS)
+behind an in-process LRU. A key is claimed with insert_one before the
+handler runs, so concurrent retries on other workers get a 409 while the
+first is still running; retries on this process simply wait for it. A
+claim older than IDEMPOTENCY_LEASE_SECONDS belongs to a worker that died
+mid-request and is taken over by the next retry.
+Only 2xx responses are stored; anything else releases the claim, so a
+transient 4xx (room not ready, start still running) or a 5xx is retried
+for real rather than replayed.
+"""
+import os
+import re
+import time
+import asyncio
+import hashlib
+import datetime
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from db.database import Database, IDEMPOTENCY_TTL_SECONDS
+
+IDEMPOTENT_ROUTES = (
+    re.compile(r"^/api/interview-rooms/[^/]+/(start-interview|submit-answer)$"),
+    re.compile(r"^/api/interview-analysis/[^/]+/generate$"),
+    re.compile(r"^/api/applications$"),
+)
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1000"))
+IDEMPOTENCY_MAX_BODY_BYTES = 1024 * 1024
+MAX_KEY_LENGTH = 255
+# Matches START_CLAIM_TIMEOUT_SECONDS: the slowest handler here is an AI start
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "180"))
+# Response headers worth replaying; the rest are recomputed by the server
+_REPLAY_HEADERS = {b"content-type", b"etag", b"location"}
+
+
+class IdempotencyStore:
+    def __init__(self, cache_size: int = IDEMPOTENCY_CACHE_SIZE):
+        # key -> (expires_at monotonic, record)
+        self._hot: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_size = cache_size
+        # Keys being executed on this process -> (event retries wait on, claimed_at)
+        self._in_flight: Dict[str, Tuple[asyncio.Event, datetime.datetime]] = {}
+        self._stats = {"requests": 0, "executed": 0, "stored": 0, "released": 0, "replayed_hot": 0,
+                       "replayed_store": 0, "in_progress_conflicts": 0, "mismatches": 0, "takeovers": 0}
+
+    def _remember(self, key: str, record: Dict[str, Any]):
+        self._hot[key] = (time.monotonic() + IDEMPOTENCY_TTL_SECONDS, record)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self._cache_size:
+            self._hot.popitem(last=False)
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._hot.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._hot[key]
+            return None
+        self._hot.move_to_end(key)
+        return entry[1]
+
+    async def claim(self, key: str, fingerprint: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        ("execute", None) when this request should run the handler,
+        ("replay", record), ("mismatch", None) or ("busy", None) otherwise.
+        """
+        self._stats["requests"] += 1
+        while key in self._in_flight:
+            await self._in_flight[key][0].wait()
+
+        record = self._cached(key)
+        if record is not None:
+            return self._verdict(record, fingerprint, "replayed_hot")
+
+        db = await Database.get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable")
+        now = datetime.datetime.utcnow()
+        # Mongo keeps milliseconds; truncate so the claim time can be matched exactly later
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        try:
+            await db.idempotency_keys.insert_one({
+                "_id": key, "state": "in_progress", "fingerprint": fingerprint,
+                "created_at": now, "claimed_at": now,
+            })
+        except DuplicateKeyError:
+            record = await db.idempotency_keys.find_one({"_id": key})
+            if record is None:
+                # Expired between the insert and the read; let the client retry
+                self._stats["in_progress_conflicts"] += 1
+                return "busy", None
+            if record["state"] != "done":
+                claimed_at = record.get("claimed_at") or record.get("created_at")
+                if claimed_at is None or claimed_at < now - datetime.timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS):
+                    # Abandoned by a worker that died mid-request: nothing was stored, so run it here
+                    taken = await db.idempotency_keys.find_one_and_update(
+                        {"_id": key, "state": "in_progress", "claimed_at": record.get("claimed_at")},
+                        {"$set": {"fingerprint": fingerprint, "created_at": now, "claimed_at": now}},
+                    )
+                    if taken is not None:
+                        self._stats["takeovers"] += 1
+                        return self._execute(key, now)
+                elif record["fingerprint"] != fingerprint:
+                    self._stats["mismatches"] += 1
+                    return "mismatch", None
+                self._stats["in_progress_conflicts"] += 1
+                return "busy", None
+            self._remember(key, record)
+            return self._verdict(record, fingerprint, "replayed_store")
+
+        return self._execute(key, now)
+
+    def _execute(self, key: str, claimed_at: datetime.datetime):
+        self._in_flight[key] = (asyncio.Event(), claimed_at)
+        self._stats["executed"] += 1
+        return "execute", None
+
+    def _verdict(self, record: Dict[str, Any], fingerprint: str, counter: str):
+        if record["fingerprint"] != fingerprint:
+            self._stats["mismatches"] += 1
+            return "mismatch", None
+        self._stats[counter] += 1
+        return "replay", record
+
+    async def finish(self, key: str, status: Optional[int], headers: List[Tuple[bytes, bytes]], body: bytes):
+        """Store a 2xx response; release the claim for anything that must not be replayed."""
+        claimed_at = self._in_flight[key][1] if key in self._in_flight else None
+        try:
+            db = await Database.get_db()
+            if db is None:
+                return
+            # Only our own claim: after a takeover the key belongs to the newer request
+            own_claim = {"_id": key, "state": "in_progress", "claimed_at": claimed_at}
+            if status is None or not 200 <= status < 300 or len(body) > IDEMPOTENCY_MAX_BODY_BYTES:
+                await db.idempotency_keys.delete_one(own_claim)
+                self._stats["released"] += 1
+                return
+            update = {
+                "state": "done",
+                "status": status,
+                "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers if k.lower() in _REPLAY_HEADERS],
+                "body": body,
+            }
+            record = await db.idempotency_keys.find_one_and_update(
+                own_claim, {"$set": update}, return_document=ReturnDocument.AFTER
+            )
+            if record is not None:
+                self._remember(key, record)
+                self._stats["stored"] += 1
+        finally:
+            entry = self._in_flight.pop(key, None)
+            if entry is not None:
+                entry[0].set()
+
+    def metrics(self) -> Dict[str, Any]:
+        replays = self._stats["replayed_hot"] + self._stats["replayed_store"]
+        return {
+            **self._stats,
+            "replays": replays,
+            "replay_rate": round(replays / self._stats["requests"], 4) if self._stats["requests"] else 0.0,
+            "hot_entries": len(self._hot),
+            "in_flight": len(self._in_flight),
+        }
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _send_json(send, status: int, detail: str, extra_headers: List[Tuple[bytes, bytes]] = ()):
+    body = ('{"detail": "%s"}' % detail).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *extra_headers]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware; requests without the header or off IDEMPOTENT_ROUTES pass straight through."""
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            return await self.app(scope, receive, send)
+        idem_key = _header(scope, b"idempotency-key")
+        if not idem_key or not any(route.match(scope["path"]) for route in IDEMPOTENT_ROUTES):
+            return await self.app(scope, receive, send)
+        if len(idem_key) > MAX_KEY_LENGTH:
+            return await _send_json(send, 400, "Idempotency-Key is too long")
+
+        # Buffer the request body to fingerprint it, then hand it on unchanged
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        request_body = b"".join(chunks)
+
+        scope_key = "\x1f".join([scope["method"], scope["path"], _header(scope, b"authorization") or "", idem_key])
+        key = hashlib.sha256(scope_key.encode()).hexdigest()
+        fingerprint = hashlib.sha256(request_body).hexdigest()
+
+        body_sent = False
+
+        async def buffered_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": request_body, "more_body": False}
+            return await receive()
+
+        try:
+            verdict, record = await self.store.claim(key, fingerprint)
+        except Exception as e:
+            # Without the store the request still runs, just without replay protection
+            print(f"⚠️ Idempotency store unavailable, running request unprotected: {e}")
+            return await self.app(scope, buffered_receive, send)
+
+        if verdict == "replay":
+            headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in record["headers"]]
+            body = bytes(record["body"])
+            await send({"type": "http.response.start", "status": record["status"],
+                        "headers": headers + [(b"content-length", str(len(body)).encode()),
+                                              (b"idempotent-replayed", b"true")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        if verdict == "mismatch":
+            return await _send_json(send, 422, "Idempotency-Key was already used for a different request")
+        if verdict == "busy":
+            return await _send_json(send, 409, "A request with this Idempotency-Key is still in progress",
+                                    [(b"retry-after", b"1")])
+
+        status: Optional[int] = None
+        response_headers: List[Tuple[bytes, bytes]] = []
+        response_body = bytearray()
+
+        async def capture_send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and len(response_body) <= IDEMPOTENCY_MAX_BODY_BYTES:
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, buffered_receive, capture_send)
+        except Exception:
+            status = None
+            raise
+        finally:
+            try:
+                await self.store.finish(key, status, response_headers, bytes(response_body))
+            except Exception as e:
+                print(f"[ERROR] Storing idempotent response failed: {e}")
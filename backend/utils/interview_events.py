@@ -0,0 +1,189 @@
+"""
+Append-only interview session log (`interview_events`).
+
+Room handlers and routes `append()` events (joins, leaves, starts,
+question advances, answers, chat, transcripts) to an in-memory buffer.
+A flush loop writes the buffer with one insert_many every
+EVENT_LOG_FLUSH_INTERVAL_SECONDS and on shutdown. Sequence numbers are
+monotonic per interview: each flush reserves a block per interview from
+`interview_event_seqs` with one $inc, so they stay unique across restarts
+and workers. An event keeps its seq and _id once assigned, so a batch that
+is retried after a partial write does not duplicate what already landed;
+events that cannot be encoded are dropped rather than retried forever.
+`replay()` folds a timeline back into interview state.
+"""
+import os
+import asyncio
+import datetime
+from typing import Any, Dict, List, Optional
+
+import bson
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from db.database import Database
+
+EVENT_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("EVENT_LOG_FLUSH_INTERVAL_SECONDS", "1"))
+MAX_EVENT_BYTES = 1024 * 1024
+DUPLICATE_KEY = 11000
+
+EVENT_TYPES = {"join", "leave", "started", "question_advanced", "answer", "completed", "chat", "transcript"}
+
+
+class InterviewEventLog:
+    def __init__(self, interval: float = EVENT_LOG_FLUSH_INTERVAL_SECONDS):
+        self.interval = interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+
+    def append(self, interview_id: Any, type_: str, data: Optional[Dict[str, Any]] = None,
+               actor: Optional[Dict[str, Any]] = None):
+        """Queue one event; never blocks the caller on Mongo."""
+        if type_ not in EVENT_TYPES:
+            raise ValueError(f"Unknown interview event type: {type_}")
+        self._buffer.append({
+            "interview_id": str(interview_id),
+            "type": type_,
+            "at": datetime.datetime.utcnow(),
+            "actor": actor,
+            "data": data or {},
+        })
+        self.appended += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[ERROR] Interview event flush failed: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch = [event for event in self._buffer if self._encodable(event)]
+            self._buffer = []
+            if not batch:
+                return
+            try:
+                db = await Database.get_db()
+                counts: Dict[str, int] = {}
+                for event in batch:
+                    if "seq" not in event:
+                        counts[event["interview_id"]] = counts.get(event["interview_id"], 0) + 1
+                # One $inc per interview reserves a contiguous block of sequence numbers
+                next_seq: Dict[str, int] = {}
+                for interview_id, count in counts.items():
+                    doc = await db.interview_event_seqs.find_one_and_update(
+                        {"_id": interview_id},
+                        {"$inc": {"seq": count}},
+                        upsert=True,
+                        return_document=ReturnDocument.AFTER,
+                    )
+                    next_seq[interview_id] = doc["seq"] - count + 1
+                for event in batch:
+                    if "seq" not in event:
+                        event["seq"] = next_seq[event["interview_id"]]
+                        next_seq[event["interview_id"]] += 1
+                await db.interview_events.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate keys are events a previous attempt already wrote; retry only the rest
+                failed = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY}
+                self._buffer = [event for i, event in enumerate(batch) if i in failed] + self._buffer
+                self.written += len(batch) - len(failed)
+                if failed:
+                    raise
+                return
+            except Exception:
+                # Keep order: failed events go back in front of anything newer, keeping
+                # their seq and _id so a retry cannot write them twice
+                self._buffer = batch + self._buffer
+                raise
+            self.written += len(batch)
+
+    def _encodable(self, event: Dict[str, Any]) -> bool:
+        try:
+            size = len(bson.encode(event))
+        except Exception as e:
+            print(f"⚠️ Dropping interview event that cannot be stored ({event['type']}): {e}")
+            self.dropped += 1
+            return False
+        if size > MAX_EVENT_BYTES:
+            print(f"⚠️ Dropping oversized interview event ({event['type']}, {size} bytes)")
+            self.dropped += 1
+            return False
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"buffered": len(self._buffer), "appended": self.appended, "written": self.written,
+                "dropped": self.dropped}
+
+
+event_log = InterviewEventLog()
+
+
+async def read_timeline(db, interview_id: str, after_seq: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+    await event_log.flush()
+    return await db.interview_events.find(
+        {"interview_id": interview_id, "seq": {"$gt": after_seq}}, {"_id": 0}
+    ).sort("seq", 1).limit(limit).to_list(length=limit)
+
+
+def replay(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Interview state rebuilt from its events (in seq order)."""
+    state: Dict[str, Any] = {
+        "status": "scheduled",
+        "started_at": None,
+        "completed_at": None,
+        "current_question_index": 0,
+        "questions": [],
+        "qa": [],
+        "participants": {},
+        "chat": [],
+        "transcripts": {},
+        "last_seq": 0,
+    }
+    for event in events:
+        data = event.get("data") or {}
+        actor = event.get("actor") or {}
+        kind = event["type"]
+        if kind == "join":
+            state["participants"][actor.get("user_id")] = {**actor, "joined_at": event["at"]}
+        elif kind == "leave":
+            state["participants"].pop(actor.get("user_id"), None)
+        elif kind == "started":
+            state.update(status="in_progress", started_at=event["at"], current_question_index=0)
+            if "questions" in data:
+                state["questions"] = data["questions"]
+        elif kind == "question_advanced":
+            state["current_question_index"] = data.get("index", state["current_question_index"])
+        elif kind == "answer":
+            state["qa"].append(data)
+        elif kind == "completed":
+            state.update(status="completed", completed_at=event["at"])
+        elif kind == "chat":
+            state["chat"].append({"actor": actor, "message": data.get("message"), "at": event["at"]})
+        elif kind == "transcript":
+            state["transcripts"][str(data.get("question_index"))] = data.get("text")
+        state["last_seq"] = event.get("seq", state["last_seq"])
+    state["participants"] = list(state["participants"].values())
+    return state
@@ -0,0 +1,63 @@
+"""
+Short-lived, HMAC-signed room join tickets.
+
+POST /api/interview-rooms/validate-join authorizes against Mongo once and
+hands out a ticket; the Socket.IO join_room handler then only checks the
+signature and expiry, in memory, for every (re)join while it is valid.
+
+Format: base64url(json claims) "." base64url(HMAC-SHA256(claims part)).
+"""
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+from typing import Any, Dict
+
+from auth.oauth2 import SECRET_KEY
+
+# Shared by every worker that verifies tickets; falls back to the JWT secret
+JOIN_TICKET_SECRET = os.getenv("JOIN_TICKET_SECRET") or SECRET_KEY
+JOIN_TICKET_TTL_SECONDS = int(os.getenv("JOIN_TICKET_TTL_SECONDS", "1800"))
+
+
+class TicketError(ValueError):
+    pass
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(JOIN_TICKET_SECRET.encode(), body.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_ticket(interview_id: str, room_id: str, user_id: str, role: str, ttl: int = JOIN_TICKET_TTL_SECONDS) -> Dict[str, Any]:
+    """Returns {"ticket", "expires_at"} (expires_at in epoch seconds)."""
+    expires_at = int(time.time()) + ttl
+    claims = {"iid": str(interview_id), "rid": room_id, "uid": str(user_id), "role": role, "exp": expires_at}
+    body = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return {"ticket": f"{body}.{_sign(body)}", "expires_at": expires_at}
+
+
+def verify_ticket(ticket: str) -> Dict[str, Any]:
+    """Claims of a valid, unexpired ticket; raises TicketError otherwise."""
+    try:
+        body, signature = ticket.split(".", 1)
+    except (AttributeError, ValueError):
+        raise TicketError("Malformed join ticket")
+    if not hmac.compare_digest(signature, _sign(body)):
+        raise TicketError("Invalid join ticket")
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        raise TicketError("Malformed join ticket")
+    if claims.get("exp", 0) < time.time():
+        raise TicketError("Join ticket expired")
+    return claims
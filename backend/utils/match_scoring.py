@@ -0,0 +1,186 @@
+"""
+Candidate-job match scores for applications.
+
+Skills are mapped onto a vocabulary built per scoring batch and packed into
+NumPy bitsets (one row per profile / job), so a whole batch is scored with a
+single AND + popcount. The score is stored on each application as
+`match_score` (0-100) for indexed sorting in GET /api/hr/applications.
+"""
+import re
+import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from utils.skill_catalog import get_skill_catalog
+
+SKILL_WEIGHT = 0.75
+EXPERIENCE_WEIGHT = 0.25
+
+# Set bits per byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_YEARS = re.compile(r"(\d+(?:\.\d+)?)")
+
+
+def _oid(value: Any) -> Optional[ObjectId]:
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+
+def _skill_names(value: Any) -> List[str]:
+    """Profiles store skills as a list of names/objects or a comma string."""
+    if isinstance(value, str):
+        value = value.split(",")
+    names = []
+    for item in value or []:
+        if isinstance(item, dict):
+            item = item.get("name") or item.get("label")
+        if item:
+            name = str(item).strip().lower()
+            if name:
+                names.append(name)
+    return names
+
+
+def candidate_years(profile: Dict[str, Any]) -> float:
+    years = profile.get("experience_years") or profile.get("years_experience")
+    months = profile.get("experience_months")
+    if isinstance(years, (int, float)) or isinstance(months, (int, float)):
+        return float(years or 0) + float(months or 0) / 12
+    match = _YEARS.search(str(profile.get("experience") or ""))
+    return float(match.group(1)) if match else 0.0
+
+
+class SkillVocabulary:
+    """Assigns each distinct skill name a bit position."""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def add(self, names: Iterable[str]):
+        for name in names:
+            self.index.setdefault(name, len(self.index))
+
+    def bitsets(self, rows: List[List[str]]) -> np.ndarray:
+        """Packed bitsets, shape (len(rows), ceil(vocab / 8)), dtype uint8."""
+        dense = np.zeros((len(rows), max(1, len(self.index))), dtype=bool)
+        for r, names in enumerate(rows):
+            cols = [self.index[n] for n in names if n in self.index]
+            dense[r, cols] = True
+        return np.packbits(dense, axis=1)
+
+
+def compute_scores(
+    candidate_bits: np.ndarray,
+    job_bits: np.ndarray,
+    cand_years: np.ndarray,
+    job_years: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Row-aligned arrays, one row per application. Returns match_score (0-100)
+    plus the skill and experience components (0-1).
+    """
+    overlap = _POPCOUNT[candidate_bits & job_bits].sum(axis=1, dtype=np.int32)
+    required = _POPCOUNT[job_bits].sum(axis=1, dtype=np.int32)
+    # A job with no listed skills neither rewards nor penalises skills
+    skill = np.where(required > 0, overlap / np.maximum(required, 1), 0.5)
+    experience = np.where(job_years > 0, np.minimum(cand_years / np.maximum(job_years, 1e-9), 1.0), 1.0)
+    score = np.round(100 * (SKILL_WEIGHT * skill + EXPERIENCE_WEIGHT * experience), 1)
+    return {"score": score, "skill": skill, "experience": experience}
+
+
+async def score_applications(db, query: Dict[str, Any]) -> int:
+    """
+    (Re)score every application matching `query` in one batch: two `$in`
+    reads (profiles, jobs; skill names come from the catalog), one
+    vectorized pass, one bulk_write.
+    Returns the number of applications scored.
+    """
+    apps = await db.applications.find(query, {"candidate_id": 1, "job_id": 1}).to_list(length=None)
+    if not apps:
+        return 0
+
+    cand_oids = {o for o in (_oid(a.get("candidate_id")) for a in apps) if o}
+    job_oids = {o for o in (_oid(a.get("job_id")) for a in apps) if o}
+
+    profiles = {
+        str(p["user_id"]): p
+        async for p in db.profiles.find(
+            {"user_id": {"$in": list(cand_oids)}},
+            {"user_id": 1, "skills": 1, "experience_years": 1, "experience_months": 1, "experience": 1},
+        )
+    }
+    jobs = {
+        str(j["_id"]): j
+        async for j in db.job_criteria.find({"_id": {"$in": list(job_oids)}}, {"skill_ids": 1, "experience_years": 1})
+    }
+    skill_ids = {sid for j in jobs.values() for sid in (j.get("skill_ids") or [])}
+    # Names come from the in-memory catalog; only ids it hasn't seen yet hit Mongo
+    catalog = await get_skill_catalog(db)
+    skill_names = {sid: (catalog.name_for(sid) or "").strip().lower() for sid in skill_ids}
+    unknown = [sid for sid, name in skill_names.items() if not name]
+    if unknown:
+        async for s in db.skills.find({"_id": {"$in": unknown}}, {"name": 1}):
+            skill_names[s["_id"]] = (s.get("name") or "").strip().lower()
+
+    job_skills = {jid: [skill_names[s] for s in (j.get("skill_ids") or []) if skill_names.get(s)] for jid, j in jobs.items()}
+    cand_skills = {cid: _skill_names(p.get("skills")) for cid, p in profiles.items()}
+
+    # Only job skills can contribute to overlap, so the vocabulary is theirs
+    vocab = SkillVocabulary()
+    for names in job_skills.values():
+        vocab.add(names)
+
+    rows = [a for a in apps if a.get("job_id") in jobs]
+    unscorable = [a["_id"] for a in apps if a.get("job_id") not in jobs]
+
+    now = datetime.datetime.utcnow()
+    updates = []  # (application _id, $set)
+    if rows:
+        result = compute_scores(
+            vocab.bitsets([cand_skills.get(a.get("candidate_id"), []) for a in rows]),
+            vocab.bitsets([job_skills[a["job_id"]] for a in rows]),
+            np.array([candidate_years(profiles.get(a.get("candidate_id"), {})) for a in rows], dtype=float),
+            np.array([float(jobs[a["job_id"]].get("experience_years") or 0) for a in rows], dtype=float),
+        )
+        for i, app in enumerate(rows):
+            updates.append((app["_id"], {
+                "match_score": float(result["score"][i]),
+                "match_breakdown": {
+                    "skills": round(float(result["skill"][i]), 3),
+                    "experience": round(float(result["experience"][i]), 3),
+                },
+                "match_scored_at": now,
+            }))
+    # Job deleted or never existed: sort these last
+    updates.extend((_id, {"match_score": None, "match_scored_at": now}) for _id in unscorable)
+
+    await db.applications.bulk_write(
+        [UpdateOne({"_id": _id}, {"$set": fields}) for _id, fields in updates], ordered=False
+    )
+    # Keep the application_cards read model (same _ids) in step; the scoring time stays off the cards
+    await db.application_cards.bulk_write(
+        [UpdateOne({"_id": _id}, {"$set": {k: v for k, v in fields.items() if k != "match_scored_at"}})
+         for _id, fields in updates],
+        ordered=False,
+    )
+    return len(rows)
+
+
+async def rescore_for_candidate(db, candidate_id: Any):
+    try:
+        await score_applications(db, {"candidate_id": str(candidate_id)})
+    except Exception as e:
+        print(f"[ERROR] Rescoring applications for candidate {candidate_id} failed: {e}")
+
+
+async def rescore_for_job(db, job_id: Any):
+    try:
+        await score_applications(db, {"job_id": str(job_id)})
+    except Exception as e:
+        print(f"[ERROR] Rescoring applications for job {job_id} failed: {e}")
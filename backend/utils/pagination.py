@@ -0,0 +1,148 @@
+import base64
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+# Header carrying the token for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Default ordering for collections that carry created_at
+CREATED_AT_DESC: List[Tuple[str, int]] = [("created_at", -1)]
+
+SortSpec = Sequence[Tuple[str, int]]
+
+
+def _with_tiebreaker(sort: SortSpec) -> List[Tuple[str, int]]:
+    """Append _id so every sort order is total and cursors are unambiguous."""
+    spec = list(sort)
+    if not any(field == "_id" for field, _ in spec):
+        spec.append(("_id", spec[-1][1] if spec else -1))
+    return spec
+
+
+def _get_field(doc: Dict[str, Any], field: str) -> Any:
+    value: Any = doc
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def encode_cursor(doc: Dict[str, Any], sort: SortSpec) -> str:
+    """Build an opaque token from the sort-key values of the last returned doc."""
+    values = [_get_field(doc, field) for field, _ in _with_tiebreaker(sort)]
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: SortSpec) -> List[Any]:
+    spec = _with_tiebreaker(sort)
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(spec):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """
+    Filter selecting the documents strictly after `values` in `sort` order:
+      (k1 > v1) OR (k1 == v1 AND k2 > v2) OR ...
+    Null/missing keys sort first ascending and last descending, as in Mongo.
+    """
+    spec = _with_tiebreaker(sort)
+    branches = []
+    for i, (field, direction) in enumerate(spec):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        branch = {spec[j][0]: values[j] for j in range(i)}
+        branch.update(after)
+        branches.append(branch)
+    if not branches:
+        # Nothing sorts after this key; matches no document
+        return {"_id": {"$in": []}}
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[Dict[str, Any]]:
+    """Condition for `field` strictly after `value`; None when nothing can be."""
+    if direction > 0:
+        # $gt null matches nothing: every non-null value comes after null
+        return {field: {"$ne": None}} if value is None else {field: {"$gt": value}}
+    if value is None:
+        return None
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    sort: SortSpec = CREATED_AT_DESC,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one keyset page. Returns (docs, next_cursor); next_cursor is None
+    on the last page. Reads limit + 1 docs to detect whether more exist.
+
+    `skip` only exists for legacy page-number callers and is ignored once a
+    cursor is supplied.
+    """
+    spec = _with_tiebreaker(sort)
+    find_query = query
+    if cursor:
+        after = keyset_filter(spec, decode_cursor(cursor, spec))
+        find_query = {"$and": [query, after]} if query else after
+        skip = 0
+
+    # Inclusion projections must still carry the sort keys for the next cursor
+    if projection:
+        projection = dict(projection)
+        if any(value for field, value in projection.items() if field != "_id"):
+            projection.update({field: 1 for field, _ in spec})
+
+    find = collection.find(find_query, projection).sort(spec)
+    if skip:
+        find = find.skip(skip)
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], spec)
+    return docs, next_cursor
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def stream_ndjson(
+    cursor,
+    transform: Callable[[Dict[str, Any]], Dict[str, Any]] = lambda doc: doc,
+    filename: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Stream a Motor cursor as newline-delimited JSON, one document per line,
+    without materialising the result set.
+    """
+    async def _lines() -> AsyncIterator[bytes]:
+        async for doc in cursor:
+            item = jsonable_encoder(transform(doc), custom_encoder={ObjectId: str})
+            yield (json.dumps(item) + "\n").encode("utf-8")
+
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(_lines(), media_type="application/x-ndjson", headers=headers)
+
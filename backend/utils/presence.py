@@ -0,0 +1,111 @@
+"""
+Write-behind persistence of interview room presence.
+
+The Socket.IO handlers keep the live participant list in memory
+(`active_rooms`); this writer records the latest list per room and
+flushes every dirty room to Mongo as a single `$set` of `participants`,
+all rooms in one bulk_write, every PRESENCE_FLUSH_INTERVAL_SECONDS and on
+shutdown. A flapping connection therefore costs one write per interval
+instead of several per reconnect. The interval is the durability window:
+at most that much presence history is lost if the process dies.
+"""
+import os
+import asyncio
+import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+PRESENCE_FLUSH_INTERVAL_SECONDS = float(os.getenv("PRESENCE_FLUSH_INTERVAL_SECONDS", "2"))
+
+
+def _interview_oid(room_id: str):
+    interview_id = room_id.replace("interview_", "")
+    try:
+        return ObjectId(interview_id)
+    except Exception:
+        return interview_id
+
+
+class PresenceWriter:
+    def __init__(self, db_getter, interval: float = PRESENCE_FLUSH_INTERVAL_SECONDS):
+        self._db_getter = db_getter
+        self.interval = interval
+        # room_id -> latest $set for that room (later marks replace earlier ones)
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.flushes = 0
+        self.writes = 0
+        self.coalesced = 0
+
+    def mark(self, room_id: str, participants: List[Dict[str, Any]], **fields: Any):
+        """Record the current participant list of a room for the next flush."""
+        if room_id in self._dirty:
+            self.coalesced += 1
+        self._dirty[room_id] = {
+            "participants": participants,
+            "updated_at": datetime.datetime.utcnow(),
+            # room_status etc. set by an earlier mark survive a later one
+            **{k: v for k, v in self._dirty.get(room_id, {}).items() if k not in ("participants", "updated_at")},
+            **fields,
+        }
+        if self.interval <= 0:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                if self.interval > 0:
+                    await asyncio.sleep(self.interval)
+                else:
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Presence flush failed: {e}")
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        pending, self._dirty = self._dirty, {}
+        db = await self._db_getter()
+        if db is None:
+            # Keep the data; anything marked since takes precedence
+            self._dirty = {**pending, **self._dirty}
+            return
+        ops = [UpdateOne({"_id": _interview_oid(room_id)}, {"$set": fields}) for room_id, fields in pending.items()]
+        try:
+            await db.interviews.bulk_write(ops, ordered=False)
+        except Exception:
+            self._dirty = {**pending, **self._dirty}
+            raise
+        self.flushes += 1
+        self.writes += len(ops)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "pending_rooms": len(self._dirty),
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,258 @@
+"""
+Resume full-text index.
+
+Text is extracted from uploaded resumes in a process pool, tokenized, and
+stored per candidate in `resume_index` as term frequencies plus a multikey
+`terms` array. Search fetches the docs containing any query term through
+that index and ranks them with BM25.
+"""
+import io
+import os
+import re
+import math
+import multiprocessing
+import time
+import asyncio
+import zipfile
+import datetime
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from bson import ObjectId
+
+from utils.storage import get_storage
+
+EXTRACT_WORKERS = int(os.getenv("RESUME_EXTRACT_WORKERS", "2"))
+# Stored text is only used for snippets
+MAX_STORED_CHARS = 20000
+# Upper bound on docs scored per query
+MAX_CANDIDATES = 5000
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Corpus size / average length change slowly; recompute at most this often
+CORPUS_STATS_TTL = 60.0
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the to was were will with "
+    "i me my we our you your he she they them this these those".split()
+)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+# -------------------------
+# Extraction (worker processes)
+# -------------------------
+def _pdf_text(data: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("pypdf not installed - cannot index PDF resumes")
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join((page.extract_text() or "") for page in reader.pages)
+
+
+def _docx_text(data: bytes) -> str:
+    # A .docx is a zip; the body text lives in <w:t> runs of word/document.xml
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for para in root.iter(f"{_W_NS}p"):
+        paragraphs.append("".join(node.text or "" for node in para.iter(f"{_W_NS}t")))
+    return "\n".join(paragraphs)
+
+
+def extract_text(data: bytes, ext: str) -> str:
+    ext = ext.lower()
+    if ext == ".pdf":
+        return _pdf_text(data)
+    if ext == ".docx":
+        return _docx_text(data)
+    raise RuntimeError(f"Unsupported resume format: {ext or 'unknown'}")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase, strip accents, split into terms. '+' and '#' are kept so
+    c++ / c# survive; dots are dropped ('node.js' -> 'nodejs') since terms
+    are also Mongo field names.
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    terms = []
+    for raw in _TOKEN.findall(text):
+        term = raw.replace(".", "")
+        if len(term) < 2 or term in _STOPWORDS:
+            continue
+        terms.append(term)
+    return terms
+
+
+def _extract_and_count(data: bytes, ext: str) -> Tuple[str, Dict[str, int], int]:
+    text = extract_text(data, ext)
+    terms = tokenize(text)
+    return text, dict(Counter(terms)), len(terms)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# (expires_at, doc count, average length)
+_corpus_stats: Optional[Tuple[float, int, float]] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a threaded asyncio/Motor process can inherit held locks
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# -------------------------
+# Indexing
+# -------------------------
+def resume_key(profile: Dict[str, Any]) -> Optional[str]:
+    """Storage key for a profile's resume (older profiles only carry the URL)."""
+    if profile.get("resume_key"):
+        return profile["resume_key"]
+    url = profile.get("resume_url") or ""
+    return url[len("/static/"):] if url.startswith("/static/") else None
+
+
+async def index_resume(db, user_id: ObjectId, key: str, sha256: Optional[str] = None, force: bool = False) -> str:
+    """
+    Extract and index one resume. Skips work when the stored entry already
+    has this content hash. Returns "indexed", "unchanged" or "failed".
+    """
+    if sha256 and not force:
+        existing = await db.resume_index.find_one({"_id": user_id}, {"sha256": 1, "error": 1})
+        if existing and existing.get("sha256") == sha256 and not existing.get("error"):
+            return "unchanged"
+
+    try:
+        data = await get_storage().read(key)
+        text, tf, length = await asyncio.get_running_loop().run_in_executor(
+            _get_pool(), _extract_and_count, data, os.path.splitext(key)[1]
+        )
+    except Exception as e:
+        print(f"[ERROR] Resume indexing failed for {user_id}: {e}")
+        await db.resume_index.update_one(
+            {"_id": user_id},
+            {"$set": {"error": str(e), "sha256": sha256, "indexed_at": datetime.datetime.utcnow()},
+             "$unset": {"terms": "", "tf": ""}},
+            upsert=True,
+        )
+        return "failed"
+
+    await db.resume_index.replace_one(
+        {"_id": user_id},
+        {
+            "sha256": sha256,
+            "key": key,
+            "terms": list(tf),
+            "tf": tf,
+            "length": length,
+            "text": text[:MAX_STORED_CHARS],
+            "indexed_at": datetime.datetime.utcnow(),
+        },
+        upsert=True,
+    )
+    return "indexed"
+
+
+async def backfill(db, force: bool = False, concurrency: int = EXTRACT_WORKERS) -> Dict[str, int]:
+    """Index every profile that has a resume; unchanged resumes are skipped unless `force`."""
+    counts = {"indexed": 0, "unchanged": 0, "failed": 0, "missing": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(profile, key):
+        try:
+            counts[await index_resume(db, profile["user_id"], key, profile.get("resume_sha256"), force)] += 1
+        finally:
+            semaphore.release()
+
+    # At most `concurrency` tasks exist at a time; the cursor is only advanced when a slot frees up
+    tasks = set()
+    projection = {"user_id": 1, "resume_url": 1, "resume_key": 1, "resume_sha256": 1}
+    async for profile in db.profiles.find({"resume_url": {"$nin": [None, ""]}}, projection):
+        key = resume_key(profile)
+        if not key:
+            counts["missing"] += 1
+            continue
+        await semaphore.acquire()
+        task = asyncio.create_task(_one(profile, key))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    return counts
+
+
+# -------------------------
+# Search
+# -------------------------
+def _snippet(text: str, terms: List[str], width: int = 160) -> str:
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(t) for t in terms) if p >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    snippet = " ".join(text[start:start + width].split())
+    return ("…" if start else "") + snippet
+
+
+async def _get_corpus_stats(db) -> Tuple[int, float]:
+    global _corpus_stats
+    now = time.monotonic()
+    if _corpus_stats is None or _corpus_stats[0] <= now:
+        stats = await db.resume_index.aggregate([
+            {"$match": {"terms": {"$exists": True}}},
+            {"$group": {"_id": None, "n": {"$sum": 1}, "avg_len": {"$avg": "$length"}}},
+        ]).to_list(length=1)
+        n_docs = stats[0]["n"] if stats else 0
+        avg_len = (stats[0]["avg_len"] if stats else 0) or 1
+        _corpus_stats = (now + CORPUS_STATS_TTL, n_docs, avg_len)
+    return _corpus_stats[1], _corpus_stats[2]
+
+
+async def search(db, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """BM25-ranked resumes matching any term of `query`."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    projection = {"length": 1, "text": 1, **{f"tf.{t}": 1 for t in terms}}
+    docs = await db.resume_index.find({"terms": {"$in": terms}}, projection).to_list(length=MAX_CANDIDATES)
+    if not docs:
+        return []
+
+    n_docs, avg_len = await _get_corpus_stats(db)
+    n_docs = max(n_docs, len(docs))
+
+    # Every doc containing a term is in `docs`, so df is exact
+    df = Counter(t for doc in docs for t in (doc.get("tf") or {}))
+    idf = {t: math.log(1 + (n_docs - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+
+    scored = []
+    for doc in docs:
+        tf = doc.get("tf") or {}
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * (doc.get("length") or 0) / avg_len)
+        score = sum(idf[t] * tf[t] * (BM25_K1 + 1) / (tf[t] + norm) for t in terms if t in tf)
+        scored.append((score, doc))
+    scored.sort(key=lambda item: item[0], reverse=True)
+
+    return [
+        {
+            "user_id": str(doc["_id"]),
+            "score": round(score, 4),
+            "matched_terms": [t for t in terms if t in (doc.get("tf") or {})],
+            "snippet": _snippet(doc.get("text") or "", terms),
+        }
+        for score, doc in scored[:limit]
+    ]
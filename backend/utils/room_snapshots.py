@@ -0,0 +1,135 @@
+"""
+Periodic snapshots of live interview room state for warm restarts.
+
+socket_handlers.snapshot_rooms() produces a compact picture of every live
+room (participants, cached interview fields, state version). It is saved
+every ROOM_SNAPSHOT_INTERVAL_SECONDS when something changed, and on
+shutdown, to a local JSON file (default, survives `reload=True` restarts)
+or to the `room_snapshots` collection (ROOM_SNAPSHOT_STORE=mongo, for
+hosts without a persistent disk). In Mongo each instance keeps its own
+document, keyed by ROOM_SNAPSHOT_INSTANCE_ID (default: the hostname), and
+restores only that one; several workers on one host each need a distinct
+id. lifespan restores it at startup so rejoining clients are answered from
+memory instead of all re-reading Mongo at once.
+"""
+import os
+import socket
+import asyncio
+import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from bson import json_util
+from bson.json_util import JSONOptions
+
+# Naive UTC datetimes, like the rest of the backend
+_JSON_OPTIONS = JSONOptions(tz_aware=False)
+
+ROOM_SNAPSHOT_STORE = os.getenv("ROOM_SNAPSHOT_STORE", "file").lower()  # file | mongo | off
+ROOM_SNAPSHOT_PATH = Path(os.getenv(
+    "ROOM_SNAPSHOT_PATH", str(Path(__file__).resolve().parent.parent / ".room_snapshot.json")
+))
+# Must be stable across restarts of the same instance, so not the pid
+ROOM_SNAPSHOT_INSTANCE_ID = os.getenv("ROOM_SNAPSHOT_INSTANCE_ID") or socket.gethostname()
+ROOM_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("ROOM_SNAPSHOT_INTERVAL_SECONDS", "5"))
+# Older snapshots describe rooms that have certainly moved on
+ROOM_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("ROOM_SNAPSHOT_MAX_AGE_SECONDS", "600"))
+
+
+class FileSnapshotStore:
+    name = "file"
+
+    def __init__(self, path: Path = ROOM_SNAPSHOT_PATH):
+        self.path = path
+
+    def _write(self, text: str):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    async def save(self, snapshot: Dict[str, Any]):
+        await asyncio.to_thread(self._write, json_util.dumps(snapshot, json_options=_JSON_OPTIONS))
+
+    async def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            text = await asyncio.to_thread(self.path.read_text, encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        return json_util.loads(text, json_options=_JSON_OPTIONS)
+
+
+class MongoSnapshotStore:
+    name = "mongo"
+
+    def __init__(self, db_getter, instance_id: str = ROOM_SNAPSHOT_INSTANCE_ID):
+        self._db_getter = db_getter
+        self.instance_id = instance_id
+
+    async def save(self, snapshot: Dict[str, Any]):
+        db = await self._db_getter()
+        await db.room_snapshots.replace_one({"_id": self.instance_id}, snapshot, upsert=True)
+
+    async def load(self) -> Optional[Dict[str, Any]]:
+        db = await self._db_getter()
+        return await db.room_snapshots.find_one({"_id": self.instance_id}, {"_id": 0})
+
+
+class RoomSnapshotter:
+    def __init__(self, store, collect: Callable[[float], Dict[str, Any]], interval: float = ROOM_SNAPSHOT_INTERVAL_SECONDS):
+        self.store = store
+        self._collect = collect
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._last_signature = None
+        self.saves = 0
+
+    async def restore(self) -> Optional[Dict[str, Any]]:
+        """The last snapshot, or None when there is none or it is too old."""
+        snapshot = await self.store.load()
+        if not snapshot:
+            return None
+        age = (datetime.datetime.utcnow() - snapshot["saved_at"]).total_seconds()
+        if age > ROOM_SNAPSHOT_MAX_AGE_SECONDS:
+            print(f"⚠️ Ignoring room snapshot from {int(age)}s ago")
+            return None
+        self._last_signature = snapshot.get("signature")
+        return snapshot
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                print(f"[ERROR] Room snapshot failed: {e}")
+
+    async def save(self):
+        snapshot = self._collect(ROOM_SNAPSHOT_MAX_AGE_SECONDS)
+        # Versions move on every change, so an equal signature means nothing to write
+        if snapshot["signature"] == self._last_signature:
+            return
+        snapshot["saved_at"] = datetime.datetime.utcnow()
+        await self.store.save(snapshot)
+        self._last_signature = snapshot["signature"]
+        self.saves += 1
+
+
+def create_room_snapshotter(db_getter, collect: Callable[[float], Dict[str, Any]]) -> Optional[RoomSnapshotter]:
+    if ROOM_SNAPSHOT_STORE == "off":
+        return None
+    store = MongoSnapshotStore(db_getter) if ROOM_SNAPSHOT_STORE == "mongo" else FileSnapshotStore()
+    return RoomSnapshotter(store, collect)
@@ -0,0 +1,142 @@
+"""
+Periodic sweep of stale interview rooms and abandoned interviews.
+
+Clients that vanish leave `room_status: "active"`, `status: "in_progress"`
+and dangling `participants` behind, and per-room dicts in socket_handlers
+(sync locks, connection sets, cached interview fields) are otherwise never
+emptied. Every ROOM_SWEEP_INTERVAL_SECONDS the sweeper:
+
+- prunes that in-memory state (socket_handlers.sweep_rooms),
+- marks rooms without sockets and without presence changes for
+  ROOM_IDLE_SECONDS as idle, in one update_many,
+- completes interviews still in progress ROOM_SWEEP_GRACE_SECONDS past
+  started_at + duration, with one conditional update each, so only the
+  ones this sweep actually completed get a `completed` event.
+
+Rooms with sockets on this process are never touched in Mongo.
+"""
+import os
+import asyncio
+import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import ObjectId
+
+from utils.interview_events import event_log
+
+ROOM_SWEEP_INTERVAL_SECONDS = float(os.getenv("ROOM_SWEEP_INTERVAL_SECONDS", "60"))
+ROOM_IDLE_SECONDS = float(os.getenv("ROOM_IDLE_SECONDS", "3600"))
+ROOM_SWEEP_GRACE_SECONDS = float(os.getenv("ROOM_SWEEP_GRACE_SECONDS", "900"))
+DEFAULT_DURATION_MINUTES = 30
+
+
+def _interview_ids(room_ids: List[str]) -> List[Any]:
+    """Both forms of each id: interviews may be keyed by string or ObjectId."""
+    ids: List[Any] = []
+    for room_id in room_ids:
+        interview_id = room_id.replace("interview_", "")
+        ids.append(interview_id)
+        if ObjectId.is_valid(interview_id):
+            ids.append(ObjectId(interview_id))
+    return ids
+
+
+class RoomSweeper:
+    def __init__(self, db_getter, live_rooms: Callable[[], List[str]],
+                 sweep_memory: Callable[[float], Dict[str, int]],
+                 state_sizes: Callable[[], Dict[str, int]],
+                 on_closed: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 interval: float = ROOM_SWEEP_INTERVAL_SECONDS):
+        self._db_getter = db_getter
+        self._live_rooms = live_rooms
+        self._sweep_memory = sweep_memory
+        self._state_sizes = state_sizes
+        self._on_closed = on_closed
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.sweeps = 0
+        self.last_sweep_at: Optional[datetime.datetime] = None
+        self.last: Dict[str, int] = {}
+        self.totals: Dict[str, int] = {}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[ERROR] Room sweep failed: {e}")
+
+    async def sweep(self) -> Dict[str, int]:
+        now = datetime.datetime.utcnow()
+        reclaimed = dict(self._sweep_memory(ROOM_IDLE_SECONDS))
+        reclaimed.update(idle_rooms=0, closed_interviews=0)
+
+        db = await self._db_getter()
+        if db is not None:
+            live_ids = _interview_ids(self._live_rooms())
+            idle_cutoff = now - datetime.timedelta(seconds=ROOM_IDLE_SECONDS)
+            result = await db.interviews.update_many(
+                {"room_status": "active", "updated_at": {"$lt": idle_cutoff}, "_id": {"$nin": live_ids}},
+                {"$set": {"room_status": "idle", "participants": [], "updated_at": now}},
+            )
+            reclaimed["idle_rooms"] = result.modified_count
+
+            # Only interviews started at least grace ago can be overdue
+            started_before = now - datetime.timedelta(seconds=ROOM_SWEEP_GRACE_SECONDS)
+            candidates = await db.interviews.find(
+                {"status": "in_progress", "started_at": {"$lt": started_before}, "_id": {"$nin": live_ids}},
+                {"started_at": 1, "duration": 1, "room_id": 1},
+            ).to_list(length=None)
+            overdue = [
+                doc for doc in candidates
+                if doc["started_at"] + datetime.timedelta(minutes=doc.get("duration") or DEFAULT_DURATION_MINUTES) < started_before
+            ]
+            if overdue:
+                fields = {"status": "completed", "completed_at": now, "room_status": "completed",
+                          "participants": [], "auto_closed": True, "updated_at": now}
+                # status re-checked per doc: a submit or the deadline scheduler may have completed it since the find
+                results = await asyncio.gather(*[
+                    db.interviews.update_one({"_id": doc["_id"], "status": "in_progress"}, {"$set": fields})
+                    for doc in overdue
+                ])
+                for doc, result in zip(overdue, results):
+                    if not result.modified_count:
+                        continue
+                    reclaimed["closed_interviews"] += 1
+                    event_log.append(doc["_id"], "completed", {"reason": "expired"})
+                    if self._on_closed is not None and doc.get("room_id"):
+                        self._on_closed(doc["room_id"], {"status": "completed"})
+
+        self.sweeps += 1
+        self.last_sweep_at = now
+        self.last = reclaimed
+        for key, count in reclaimed.items():
+            self.totals[key] = self.totals.get(key, 0) + count
+        if any(reclaimed.values()):
+            print(f"🧹 Room sweep reclaimed {reclaimed}; in memory: {self._state_sizes()}")
+        return reclaimed
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "idle_seconds": ROOM_IDLE_SECONDS,
+            "sweeps": self.sweeps,
+            "last_sweep_at": self.last_sweep_at.isoformat() if self.last_sweep_at else None,
+            "last": self.last,
+            "totals": self.totals,
+            "in_memory": self._state_sizes(),
+        }
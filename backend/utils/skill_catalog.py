@@ -0,0 +1,137 @@
+"""
+In-process skill catalog.
+
+The whole `skills` collection is small and read far more often than it is
+written, so each worker keeps it in memory: name -> id and id -> name maps,
+the name-sorted list served by the list endpoints, and a prefix trie for
+autocomplete. Writers bump a version stamp in `cache_versions`; every
+worker compares it at most once per SKILL_CATALOG_CHECK_SECONDS and
+reloads when it moved.
+"""
+import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# How stale another worker's writes may be before this one notices (seconds)
+SKILL_CATALOG_CHECK_SECONDS = float(os.getenv("SKILL_CATALOG_CHECK_SECONDS", "5"))
+
+_VERSION_ID = "skills"
+
+
+def normalize_skill(name: str) -> str:
+    return " ".join((name or "").split()).lower()
+
+
+class _TrieNode:
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Names with a word starting at this prefix
+        self.names: List[str] = []
+
+
+class SkillCatalog:
+    def __init__(self, skills: List[Dict[str, Any]], version: int):
+        self.version = version
+        self.skills = sorted(skills, key=lambda s: s.get("name") or "")
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self._root = _TrieNode()
+        for skill in self.skills:
+            name = normalize_skill(skill.get("name") or "")
+            if not name:
+                continue
+            self.by_name.setdefault(name, skill)
+            self.by_id[str(skill["_id"])] = skill
+            # Index every word start so "learn" finds "machine learning"
+            words = name.split(" ")
+            for i in range(len(words)):
+                self._insert(" ".join(words[i:]), name)
+
+    def _insert(self, key: str, name: str):
+        node = self._root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if not node.names or node.names[-1] != name:
+                node.names.append(name)
+
+    def id_for(self, name: str) -> Optional[ObjectId]:
+        skill = self.by_name.get(normalize_skill(name))
+        return skill["_id"] if skill else None
+
+    def name_for(self, skill_id: Any) -> Optional[str]:
+        skill = self.by_id.get(str(skill_id))
+        return skill.get("name") if skill else None
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Skills with a word starting with `prefix`; whole-name prefix matches first."""
+        prefix = normalize_skill(prefix)
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        names = sorted(set(node.names), key=lambda n: (not n.startswith(prefix), len(n), n))
+        return [self.by_name[n] for n in names[:limit]]
+
+
+_catalog: Optional[SkillCatalog] = None
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def _current_version(db) -> int:
+    doc = await db.cache_versions.find_one({"_id": _VERSION_ID}, {"version": 1})
+    return (doc or {}).get("version", 0)
+
+
+async def load_skill_catalog(db, version: Optional[int] = None) -> SkillCatalog:
+    global _catalog, _checked_at
+    if version is None:
+        version = await _current_version(db)
+    skills = await db.skills.find().to_list(length=None)
+    _catalog = SkillCatalog(skills, version)
+    _checked_at = time.monotonic()
+    return _catalog
+
+
+async def get_skill_catalog(db) -> SkillCatalog:
+    """The local catalog, reloaded first if another worker bumped the version."""
+    global _checked_at
+    if _catalog is not None and time.monotonic() - _checked_at < SKILL_CATALOG_CHECK_SECONDS:
+        return _catalog
+    async with _lock:
+        if _catalog is not None and time.monotonic() - _checked_at < SKILL_CATALOG_CHECK_SECONDS:
+            return _catalog
+        version = await _current_version(db)
+        if _catalog is not None and _catalog.version == version:
+            _checked_at = time.monotonic()
+            return _catalog
+        return await load_skill_catalog(db, version)
+
+
+async def skills_changed(db):
+    """Call after writing to `skills`: bumps the shared version and reloads this worker."""
+    try:
+        doc = await db.cache_versions.find_one_and_update(
+            {"_id": _VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        async with _lock:
+            await load_skill_catalog(db, doc["version"])
+    except Exception as e:
+        print(f"[ERROR] Skill catalog refresh failed: {e}")
+
+
+def catalog_skill_out(skill: Dict[str, Any]) -> Dict[str, Any]:
+    """API shape of a catalog entry (copy, `_id` -> `id`)."""
+    out = {k: v for k, v in skill.items() if k != "_id"}
+    out["id"] = str(skill["_id"])
+    return out
@@ -0,0 +1,83 @@
+"""
+Batch skill resolution for job criteria.
+
+A list of skill names becomes skill ids with one `$in` lookup on the
+normalized name plus, only when some are new, one unordered upsert
+bulk_write (safe under the unique index on skills.name: a duplicate key
+only means a concurrent request created that skill first). The
+criteria_skills join table is updated by diff in a single bulk_write.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from bson import ObjectId
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from utils.skill_catalog import normalize_skill, skills_changed
+
+DUPLICATE_KEY = 11000
+
+
+async def _lookup(db, names: List[str]) -> Dict[str, ObjectId]:
+    return {s["name"]: s["_id"] async for s in db["skills"].find({"name": {"$in": names}}, {"name": 1})}
+
+
+async def resolve_skills(db, names: Iterable[str]) -> List[ObjectId]:
+    """Skill ids for `names` in input order (deduplicated), creating missing skills."""
+    wanted = list(dict.fromkeys(n for n in (normalize_skill(n) for n in names) if n))
+    if not wanted:
+        return []
+
+    ids = await _lookup(db, wanted)
+    created = False
+    # A second round only runs if a name lost a race and still cannot be found
+    for _ in range(2):
+        missing = [n for n in wanted if n not in ids]
+        if not missing:
+            break
+        upserted = await _upsert(db, missing)
+        ids.update({missing[i]: _id for i, _id in upserted.items()})
+        created = created or bool(upserted)
+        if len(ids) < len(wanted):
+            ids.update(await _lookup(db, [n for n in wanted if n not in ids]))
+    if created:
+        await skills_changed(db)
+
+    return [ids[n] for n in wanted if n in ids]
+
+
+async def _upsert(db, names: List[str]) -> Dict[int, ObjectId]:
+    """Create `names`; returns {index in names: new _id} for the ones this call inserted."""
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"name": n},
+            {"$setOnInsert": {"name": n, "created_at": now, "updated_at": now}},
+            upsert=True,
+        )
+        for n in names
+    ]
+    try:
+        result = await db["skills"].bulk_write(ops, ordered=False)
+        return result.upserted_ids
+    except BulkWriteError as e:
+        # Unordered: every other upsert still ran; the duplicates are picked up by the re-read
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
+        return {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+
+
+async def sync_criteria_skills(db, criteria_id: ObjectId, old_ids: Iterable[Any], new_ids: Iterable[Any]):
+    """Bring criteria_skills from `old_ids` to `new_ids`, touching only the difference."""
+    old, new = set(old_ids or []), list(dict.fromkeys(new_ids or []))
+    removed = [sid for sid in old if sid not in set(new)]
+    added = [sid for sid in new if sid not in old]
+
+    ops: List[Any] = []
+    if removed:
+        ops.append(DeleteMany({"criteria_id": criteria_id, "skill_id": {"$in": removed}}))
+    now = datetime.utcnow()
+    ops.extend(InsertOne({"criteria_id": criteria_id, "skill_id": sid, "created_at": now}) for sid in added)
+    if ops:
+        await db["criteria_skills"].bulk_write(ops, ordered=True)
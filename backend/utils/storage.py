@@ -0,0 +1,171 @@
+"""
+Where uploaded files end up. Backends receive a finished temp file and
+publish it under a key such as "avatars/<sha256>.png"; publishing is atomic
+so readers never see a half-written object.
+
+STORAGE_BACKEND selects the backend:
+  local (default)  files under backend/static, served by the /static mount
+  s3               any S3-compatible store (AWS, MinIO); needs boto3
+"""
+import os
+import abc
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+STATIC_DIR = BASE_DIR / "static"
+
+
+class StorageBackend(abc.ABC):
+    name = "base"
+
+    @abc.abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Whether an object is stored under `key`."""
+
+    @abc.abstractmethod
+    async def publish(self, temp_path: str, key: str, content_type: str) -> None:
+        """Move a finished temp file to `key`. The temp file is consumed."""
+
+    @abc.abstractmethod
+    async def read(self, key: str) -> bytes:
+        """The stored object's bytes."""
+
+    @abc.abstractmethod
+    def url_for(self, key: str) -> str:
+        """Public URL clients fetch `key` from."""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path for `key`, when the backend keeps files on local disk."""
+        return None
+
+    def temp_dir(self) -> Optional[str]:
+        """Where uploads are staged; same filesystem as the store when possible."""
+        return None
+
+
+class LocalDiskStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: Path = STATIC_DIR, url_prefix: str = "/static"):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        # Sibling of the root (not inside it) so staged files are never
+        # reachable through the /static mount
+        self._tmp = self.root.parent / f".{self.root.name}_uploads"
+        self._tmp.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Storage key escapes root: {key}")
+        return path
+
+    def temp_dir(self) -> str:
+        # Staging next to the root keeps os.replace a same-filesystem rename
+        return str(self._tmp)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.local_path(key).exists)
+
+    async def publish(self, temp_path: str, key: str, content_type: str) -> None:
+        target = self.local_path(key)
+
+        def _move():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, target)
+
+        await asyncio.to_thread(_move)
+
+    async def read(self, key: str) -> bytes:
+        return await asyncio.to_thread(self.local_path(key).read_bytes)
+
+    def url_for(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible object store. Point S3_ENDPOINT_URL at MinIO for local
+    development and tests; leave it unset for AWS.
+    """
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        region: Optional[str] = None,
+        public_url: Optional[str] = None,
+    ):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+        )
+        base = public_url or (f"{endpoint_url.rstrip('/')}/{bucket}" if endpoint_url else f"https://{bucket}.s3.amazonaws.com")
+        self.public_url = base.rstrip("/")
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            await asyncio.to_thread(self._client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def publish(self, temp_path: str, key: str, content_type: str) -> None:
+        # A PUT only becomes visible once complete, so no rename step is needed
+        try:
+            await asyncio.to_thread(
+                self._client.upload_file, temp_path, self.bucket, key,
+                ExtraArgs={"ContentType": content_type},
+            )
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    async def read(self, key: str) -> bytes:
+        def _get():
+            return self._client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+        return await asyncio.to_thread(_get)
+
+    def url_for(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if os.getenv("STORAGE_BACKEND", "local").lower() == "s3":
+            _storage = S3Storage(
+                bucket=os.getenv("S3_BUCKET", "uploads"),
+                endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                access_key=os.getenv("S3_ACCESS_KEY") or None,
+                secret_key=os.getenv("S3_SECRET_KEY") or None,
+                region=os.getenv("S3_REGION") or None,
+                public_url=os.getenv("S3_PUBLIC_URL") or None,
+            )
+        else:
+            _storage = LocalDiskStorage()
+    return _storage
@@ -0,0 +1,141 @@
+"""
+Shared upload pipeline for avatars, resumes and certificates.
+
+Uploads are streamed to a temp file in chunks (disk writes run in a worker
+thread), hashed on the way through, capped at a per-kind size limit and then
+published under a content-addressed key, so identical files are stored once.
+"""
+import os
+import re
+import asyncio
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from utils.storage import StorageBackend, get_storage
+
+CHUNK_BYTES = 1024 * 1024
+
+AVATAR_MAX_BYTES = int(os.getenv("UPLOAD_AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+DOCUMENT_MAX_BYTES = int(os.getenv("UPLOAD_DOCUMENT_MAX_BYTES", str(10 * 1024 * 1024)))
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+RESUME_EXTS = (".pdf", ".doc", ".docx")
+CERTIFICATE_EXTS = (".pdf", ".png", ".jpg", ".jpeg", ".webp")
+
+
+@dataclass
+class StoredFile:
+    key: str
+    url: str
+    sha256: str
+    size: int
+    filename: str
+    content_type: str
+    deduplicated: bool
+
+
+def _extension(filename: Optional[str], allowed: Iterable[str], default: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,8}", ext) or ext not in allowed:
+        return default
+    return ext
+
+
+async def save_upload(
+    upload: UploadFile,
+    prefix: str,
+    max_bytes: int,
+    allowed_exts: Iterable[str],
+    default_ext: str,
+    storage: Optional[StorageBackend] = None,
+) -> StoredFile:
+    """
+    Store `upload` under "<prefix>/<sha256><ext>". Raises 413 once the upload
+    passes `max_bytes`; nothing is published in that case.
+    """
+    storage = storage or get_storage()
+    ext = _extension(upload.filename, allowed_exts, default_ext)
+    content_type = upload.content_type or "application/octet-stream"
+
+    tmp = await asyncio.to_thread(
+        tempfile.NamedTemporaryFile, dir=storage.temp_dir(), suffix=ext, delete=False
+    )
+    digest = hashlib.sha256()
+    size = 0
+    published = False
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File exceeds {max_bytes // (1024 * 1024)} MB limit",
+                )
+            digest.update(chunk)
+            await asyncio.to_thread(tmp.write, chunk)
+        await asyncio.to_thread(tmp.close)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        sha256 = digest.hexdigest()
+        key = f"{prefix}/{sha256}{ext}"
+        deduplicated = await storage.exists(key)
+        if not deduplicated:
+            await storage.publish(tmp.name, key, content_type)
+            published = True
+
+        return StoredFile(
+            key=key,
+            url=storage.url_for(key),
+            sha256=sha256,
+            size=size,
+            filename=upload.filename or f"upload{ext}",
+            content_type=content_type,
+            deduplicated=deduplicated,
+        )
+    finally:
+        if not published:
+            await asyncio.to_thread(_discard, tmp)
+
+
+async def store_bytes(
+    data: bytes, key: str, content_type: str, storage: Optional[StorageBackend] = None
+) -> str:
+    """Publish small derived files (thumbnails etc.) under `key`; returns its URL."""
+    storage = storage or get_storage()
+
+    def _stage() -> str:
+        with tempfile.NamedTemporaryFile(dir=storage.temp_dir(), delete=False) as tmp:
+            tmp.write(data)
+            return tmp.name
+
+    temp_path = await asyncio.to_thread(_stage)
+    try:
+        await storage.publish(temp_path, key, content_type)
+    except BaseException:
+        await asyncio.to_thread(_remove, temp_path)
+        raise
+    return storage.url_for(key)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _discard(tmp):
+    try:
+        tmp.close()
+    except OSError:
+        pass
+    _remove(tmp.name)
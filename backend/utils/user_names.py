@@ -0,0 +1,94 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+
+# How long a resolved user name stays valid (seconds)
+USER_NAME_CACHE_TTL = float(os.getenv("USER_NAME_CACHE_TTL", "60"))
+# Least recently used entries (including negative lookups) are evicted past this
+USER_NAME_CACHE_SIZE = int(os.getenv("USER_NAME_CACHE_SIZE", "5000"))
+
+# Only the fields needed to build a display name
+_NAME_PROJECTION = {"full_name": 1, "name": 1, "email": 1}
+
+# str(user_id) -> (expires_at, user doc or None when the user does not exist)
+_cache: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _remember(key: str, expires_at: float, user: Optional[Dict[str, Any]]) -> None:
+    _cache[key] = (expires_at, user)
+    _cache.move_to_end(key)
+    while len(_cache) > USER_NAME_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _id_variants(user_id: Any) -> list:
+    """
+    Users created through /auth/register have ObjectId _ids while the seeded
+    admin uses a hex string, and other collections store both forms, so match
+    on either representation.
+    """
+    variants = [user_id]
+    if isinstance(user_id, ObjectId):
+        variants.append(str(user_id))
+    elif isinstance(user_id, str) and ObjectId.is_valid(user_id):
+        variants.append(ObjectId(user_id))
+    return variants
+
+
+async def resolve_users(db, user_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve many user ids to their name fields with a single `$in` query.
+
+    Returns a dict keyed by str(user_id); unknown users are omitted.
+    Results (including misses) are cached for USER_NAME_CACHE_TTL seconds.
+    """
+    now = time.monotonic()
+    found: Dict[str, Dict[str, Any]] = {}
+    missing: Dict[str, Any] = {}
+
+    for uid in user_ids:
+        if uid is None or uid == "":
+            continue
+        key = str(uid)
+        if key in found or key in missing:
+            continue
+        cached = _cache.get(key)
+        if cached and cached[0] > now:
+            _cache.move_to_end(key)
+            if cached[1] is not None:
+                found[key] = cached[1]
+            continue
+        if cached:
+            del _cache[key]
+        missing[key] = uid
+
+    if missing:
+        lookup = []
+        for uid in missing.values():
+            lookup.extend(_id_variants(uid))
+
+        expires_at = now + USER_NAME_CACHE_TTL
+        async for user in db.users.find({"_id": {"$in": lookup}}, _NAME_PROJECTION):
+            key = str(user["_id"])
+            _remember(key, expires_at, user)
+            found[key] = user
+        for key in missing:
+            if key not in found:
+                _remember(key, expires_at, None)
+
+    return found
+
+
+def display_name(user: Optional[Dict[str, Any]], default: Optional[str] = None) -> Optional[str]:
+    """full_name, then name, then email - the order used across the API."""
+    if not user:
+        return default
+    return user.get("full_name") or user.get("name") or user.get("email") or default
+
+
+def invalidate_user(user_id: Any) -> None:
+    """Drop a cached entry after the user's name or email changes."""
+    _cache.pop(str(user_id), None)
@@ -476,6 +476,7 @@ const CandidateJobs = ({ onNavigate }) => {
                                   method: 'POST', 
                                   headers: { 
                                     'Content-Type': 'application/json',
+                                    'Idempotency-Key': `apply-${jobId}-${payload.candidate_id}`,
                                     ...authHeaders()
                                   }, 
                                   body: JSON.stringify(payload) 
@@ -3,6 +3,13 @@ import io from 'socket.io-client';
 import axios from "axios";
 import "../styles/InterviewRoom.css";
 
+// Phase lengths; the server times its question deadline from the same values
+const READING_SECONDS = 20;
+const ANSWERING_SECONDS = 40;
+
+// Server timestamps are naive UTC ISO strings
+const parseServerTime = (iso) => Date.parse(/Z|[+-]\d\d:\d\d$/.test(iso) ? iso : `${iso}Z`);
+
 const InterviewRoom = ({ interviewId, onNavigate, user }) => {
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
@@ -22,6 +29,8 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
     const timerRef = useRef(null);
     const mediaRecorderRef = useRef(null);
     const audioChunksRef = useRef([]);
+    // Live transcription over Socket.IO: { roomId, questionIndex, started, pending }
+    const liveStreamRef = useRef(null);
     const isSubmittingRef = useRef(false);
     const currentAnswerRef = useRef('');
     const interviewStartTimeRef = useRef(null);
@@ -30,12 +39,27 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
 
     // ✅ Step 1 — Create a ref
     const currentQuestionIndexRef = useRef(0);
+    // Room state version from the last room_joined; lets a rejoin skip unchanged questions
+    const stateVersionRef = useRef(null);
+    // Server clock estimate from clock_sync: serverNow = Date.now() + offsetMs
+    const clockRef = useRef({ offsetMs: 0, rttMs: null });
+    const clockTimerRef = useRef(null);
+    // Current question's start on the server clock (ms); phases are timed from it
+    const questionStartRef = useRef(null);
 
     const API_BASE = 'http://localhost:8000';
     const SOCKET_URL = 'http://localhost:8000';
 
+    // Server-clock time from the clock_sync offset, so every client counts down to the same instant
+    const serverNow = () => Date.now() + clockRef.current.offsetMs;
+    const secondsUntil = (endsAt) => Math.max(0, Math.ceil((endsAt - serverNow()) / 1000));
+    const rememberQuestionStart = (iso) => {
+        const start = iso ? parseServerTime(iso) : NaN;
+        questionStartRef.current = Number.isNaN(start) ? serverNow() : start;
+    };
+
     // Timer function - defined first
-    const startSyncedTimer = useCallback((durationSeconds, onComplete, phase) => {
+    const startSyncedTimer = useCallback((durationSeconds, onComplete, phase, endsAt = null) => {
         console.log(`[TIMER] Starting ${phase} timer for ${durationSeconds}s`);
 
         // Clear any existing timer
@@ -44,12 +68,13 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
             timerRef.current = null;
         }
 
-        const startTime = Date.now();
-        currentPhaseStartRef.current = startTime;
+        // Phase end on the server clock; without one, count the full duration from now
+        const deadline = endsAt ?? serverNow() + durationSeconds * 1000;
+        currentPhaseStartRef.current = Date.now();
         currentPhaseRef.current = phase;
 
         // Update immediately
-        setTimeLeft(durationSeconds);
+        setTimeLeft(secondsUntil(deadline));
 
         // Use setInterval for reliable timing that works with recording
         timerRef.current = setInterval(() => {
@@ -59,8 +84,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                 return;
             }
 
-            const elapsed = Math.floor((Date.now() - startTime) / 1000);
-            const remaining = Math.max(0, durationSeconds - elapsed);
+            const remaining = secondsUntil(deadline);
 
             setTimeLeft(remaining);
 
@@ -111,7 +135,11 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
             // ✅ Step 3 — submitAnswer MUST use the ref, not the state
             fetch(`${API_BASE}/api/interview-rooms/${interviewId}/submit-answer`, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: {
+                    'Content-Type': 'application/json',
+                    // One answer per question: a retried submit replays the first response
+                    'Idempotency-Key': `submit-${interviewId}-${currentQuestionIndexRef.current}`,
+                },
                 body: JSON.stringify({
                     question_index: currentQuestionIndexRef.current, // ✅ FIX: Use ref instead of state
                     answer: finalAnswer,
@@ -160,11 +188,12 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
         setTranscribing(false);
         isSubmittingRef.current = false;
 
-        startSyncedTimer(20, () => {
+        const questionStart = questionStartRef.current ?? serverNow();
+        startSyncedTimer(READING_SECONDS, () => {
             if (mountedRef.current) {
                 startAnsweringPhase();
             }
-        }, 'reading');
+        }, 'reading', questionStart + READING_SECONDS * 1000);
     }, [startSyncedTimer]);
 
     // Answering phase
@@ -173,12 +202,13 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
 
         setInterviewState('answering');
 
-        startSyncedTimer(40, () => {
+        const questionStart = questionStartRef.current ?? serverNow();
+        startSyncedTimer(ANSWERING_SECONDS, () => {
             if (mountedRef.current) {
                 console.log('[INTERVIEW] Auto-submitting answer due to timer completion');
                 submitAnswer();
             }
-        }, 'answering');
+        }, 'answering', questionStart + (READING_SECONDS + ANSWERING_SECONDS) * 1000);
     }, [startSyncedTimer]);
 
     // Recording functions
@@ -203,9 +233,33 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
             mediaRecorderRef.current = mediaRecorder;
             audioChunksRef.current = [];
 
+            // Stream the answer as it is spoken; the chunks are still kept for the upload fallback
+            const socket = socketRef.current;
+            if (socket?.connected && roomData) {
+                liveStreamRef.current = {
+                    roomId: roomData.roomId,
+                    questionIndex: currentQuestionIndexRef.current,
+                    started: false,
+                    pending: []
+                };
+                socket.emit('audio_stream_start', {
+                    roomId: roomData.roomId,
+                    questionIndex: currentQuestionIndexRef.current,
+                    mimeType: 'audio/webm;codecs=opus',
+                    language: 'en'
+                });
+            }
+
             mediaRecorder.ondataavailable = (e) => {
                 if (e.data.size > 0) {
                     audioChunksRef.current.push(e.data);
+                    const live = liveStreamRef.current;
+                    if (live?.started) {
+                        socketRef.current?.emit('audio_chunk', { roomId: live.roomId, chunk: e.data });
+                    } else if (live) {
+                        // Held until audio_stream_started; the first chunk carries the container header
+                        live.pending.push(e.data);
+                    }
                 }
             };
 
@@ -224,6 +278,25 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
         }
     };
 
+    // Resolves with the final transcript, or null when the upload fallback should be used
+    const finishLiveStream = (live) => {
+        return new Promise((resolve) => {
+            const socket = socketRef.current;
+            if (!socket?.connected) {
+                resolve(null);
+                return;
+            }
+            socket.timeout(30000).emit('audio_stream_end', { roomId: live.roomId }, (err, resp) => {
+                if (err || !resp || resp.error) {
+                    console.warn('[TRANSCRIPTION] Live stream failed, uploading instead:', err || resp?.error);
+                    resolve(null);
+                    return;
+                }
+                resolve(resp.text || '');
+            });
+        });
+    };
+
     const stopRecording = () => {
         return new Promise((resolve) => {
             if (!mediaRecorderRef.current || !recording) {
@@ -241,7 +314,16 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                     const audioBlob = new Blob(audioChunksRef.current, { type: "audio/webm" });
                     console.log('[RECORDING] Audio blob size:', audioBlob.size);
 
-                    if (audioBlob.size > 0) {
+                    const live = liveStreamRef.current;
+                    liveStreamRef.current = null;
+                    const streamedText = live?.started ? await finishLiveStream(live) : null;
+
+                    if (streamedText !== null) {
+                        console.log('[TRANSCRIPTION] Live stream final:', streamedText);
+                        const newAnswer = currentAnswerRef.current + (currentAnswerRef.current && streamedText ? ' ' : '') + streamedText;
+                        setAnswer(newAnswer);
+                        currentAnswerRef.current = newAnswer;
+                    } else if (audioBlob.size > 0) {
                         const formData = new FormData();
                         formData.append("file", audioBlob, "audio.webm");
 
@@ -347,6 +429,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                     // ✅ Step 2 — Update both state and ref on initial load
                     setCurrentQuestionIndex(stateData.current_question_index || 0);
                     currentQuestionIndexRef.current = stateData.current_question_index || 0;
+                    rememberQuestionStart(stateData.question_started_at);
                     startReadingPhase();
                 } else {
                     console.log('[INTERVIEW] ❌ Interview still not in progress, status:', stateData.status);
@@ -363,7 +446,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
 
             const resp = await fetch(`${API_BASE}/api/interview-rooms/${interviewId}/start-interview`, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' }
+                headers: { 'Content-Type': 'application/json', 'Idempotency-Key': `start-${interviewId}` }
             });
 
             if (!resp.ok) {
@@ -375,7 +458,8 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
             console.log('[INTERVIEW] Start response:', data);
 
             // CRITICAL FIX: Force emit interview_started event to ensure all clients receive it
-            if (socketRef.current?.connected && roomData) {
+            // (not for a repeated start: the server already broadcast that one)
+            if (!data.alreadyStarted && socketRef.current?.connected && roomData) {
                 console.log('[INTERVIEW] Emitting interview_started event to all clients');
                 socketRef.current.emit('interview_started', {
                     roomId: roomData.roomId,
@@ -397,6 +481,31 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
         }
     };
 
+    // NTP-style ping; the best (lowest RTT) of a short burst sets the offset
+    const syncClock = useCallback(async (socket, roomId, samples = 1) => {
+        let best = null;
+        for (let i = 0; i < samples && socket.connected; i++) {
+            const sample = await new Promise((resolve) => {
+                const t0 = Date.now();
+                socket.timeout(5000).emit('clock_sync', {
+                    t0,
+                    roomId,
+                    rtt: clockRef.current.rttMs,
+                    offset: clockRef.current.offsetMs,
+                }, (err, res) => {
+                    if (err || !res) return resolve(null);
+                    const t3 = Date.now();
+                    resolve({
+                        rttMs: (t3 - t0) - (res.t2 - res.t1),
+                        offsetMs: ((res.t1 - t0) + (res.t2 - t3)) / 2,
+                    });
+                });
+            });
+            if (sample && (!best || sample.rttMs < best.rttMs)) best = sample;
+        }
+        if (best) clockRef.current = best;
+    }, []);
+
     // FIXED: Enhanced socket connection
     const connectSocket = useCallback((roomInfo) => {
         if (hasJoinedRef.current && socketRef.current?.connected) {
@@ -425,13 +534,21 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                 userId: roomInfo.userId,
                 userName: roomInfo.userName,
                 userType: roomInfo.userType,
+                joinTicket: roomInfo.joinTicket,
+                stateVersion: stateVersionRef.current,
             });
+
+            syncClock(socket, roomInfo.roomId, 5);
+            clearInterval(clockTimerRef.current);
+            clockTimerRef.current = setInterval(() => syncClock(socket, roomInfo.roomId), 30000);
         });
 
         // CRITICAL FIX: Process ALL data from room_joined
         socket.on('room_joined', (data) => {
             console.log('[SOCKET] ✅ Room joined - questions:', data.interviewInfo?.questions?.length, 'currentIndex:', data.interviewInfo?.currentQuestionIndex);
             if (mountedRef.current) {
+                stateVersionRef.current = data.stateVersion || null;
+
                 // Update participants
                 if (data.participants) {
                     updateParticipants(data.participants);
@@ -455,6 +572,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                     if (data.interviewInfo.status === 'in_progress') {
                         console.log('[SOCKET] 🎬 Interview in progress, starting reading phase');
                         interviewStartTimeRef.current = data.interviewInfo.startedAt ? new Date(data.interviewInfo.startedAt) : new Date();
+                        rememberQuestionStart(data.interviewInfo.questionStartedAt);
                         startReadingPhase();
                     } else if (data.interviewInfo.status === 'completed') {
                         setInterviewState('complete');
@@ -478,6 +596,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                     // ✅ Step 2 — Update both state and ref
                     setCurrentQuestionIndex(data.currentQuestionIndex || 0);
                     currentQuestionIndexRef.current = data.currentQuestionIndex || 0;
+                    rememberQuestionStart(data.questionStartedAt);
                     startReadingPhase();
                 }
             }
@@ -542,11 +661,12 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                 setTranscribing(false);
                 isSubmittingRef.current = false;
 
-                startSyncedTimer(20, () => {
+                rememberQuestionStart(data.questionStartedAt);
+                startSyncedTimer(READING_SECONDS, () => {
                     if (mountedRef.current) {
                         startAnsweringPhase();
                     }
-                }, 'reading');
+                }, 'reading', questionStartRef.current + READING_SECONDS * 1000);
             }
         });
 
@@ -589,14 +709,18 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
             setCurrentQuestionIndex(nextIndex);
             currentQuestionIndexRef.current = nextIndex;
 
+            // Phase ends on the server clock, from the question's server start time
+            rememberQuestionStart(data.questionStartedAt);
+            const readingEndsAt = questionStartRef.current + READING_SECONDS * 1000;
+            const answeringEndsAt = readingEndsAt + ANSWERING_SECONDS * 1000;
+
             // Start reading phase immediately
             setInterviewState('reading');
-            setTimeLeft(20);
+            setTimeLeft(secondsUntil(readingEndsAt));
             console.log('[SOCKET] Starting reading phase for Q' + (nextIndex + 1));
 
             // ✅ CRITICAL FIX: Inline timer logic to avoid stale closures
-            const readingStartTime = Date.now();
-            currentPhaseStartRef.current = readingStartTime;
+            currentPhaseStartRef.current = Date.now();
             currentPhaseRef.current = 'reading';
 
             timerRef.current = setInterval(() => {
@@ -606,8 +730,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                     return;
                 }
 
-                const elapsed = Math.floor((Date.now() - readingStartTime) / 1000);
-                const remaining = Math.max(0, 20 - elapsed);
+                const remaining = secondsUntil(readingEndsAt);
                 setTimeLeft(remaining);
 
                 if (remaining <= 0) {
@@ -619,11 +742,10 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
 
                     // Start answering phase
                     setInterviewState('answering');
-                    setTimeLeft(40);
+                    setTimeLeft(secondsUntil(answeringEndsAt));
                     console.log('[SOCKET] Starting answering phase for Q' + (nextIndex + 1));
 
-                    const answeringStartTime = Date.now();
-                    currentPhaseStartRef.current = answeringStartTime;
+                    currentPhaseStartRef.current = Date.now();
                     currentPhaseRef.current = 'answering';
 
                     timerRef.current = setInterval(() => {
@@ -633,8 +755,7 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                             return;
                         }
 
-                        const elapsedAnswering = Math.floor((Date.now() - answeringStartTime) / 1000);
-                        const remainingAnswering = Math.max(0, 40 - elapsedAnswering);
+                        const remainingAnswering = secondsUntil(answeringEndsAt);
                         setTimeLeft(remainingAnswering);
 
                         if (remainingAnswering <= 0) {
@@ -651,6 +772,14 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
             }, 100);
         });
 
+        socket.on('audio_stream_started', (data) => {
+            const live = liveStreamRef.current;
+            if (!live || live.roomId !== data.roomId || live.questionIndex !== data.questionIndex) return;
+            live.started = true;
+            live.pending.forEach(chunk => socket.emit('audio_chunk', { roomId: live.roomId, chunk }));
+            live.pending = [];
+        });
+
         socket.on('error', (data) => {
             console.error('[SOCKET] ❌ Error:', data);
         });
@@ -658,8 +787,9 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
         socket.on('disconnect', (reason) => {
             console.log('[SOCKET] 🔌 Disconnected:', reason);
             hasJoinedRef.current = false;
+            clearInterval(clockTimerRef.current);
         });
-    }, [updateParticipants, startReadingPhase, deduplicateParticipants]);
+    }, [updateParticipants, startReadingPhase, deduplicateParticipants, syncClock]);
 
     // SIMPLIFIED: Initialize room
     useEffect(() => {
@@ -689,6 +819,25 @@ const InterviewRoom = ({ interviewId, onNavigate, user }) => {
                     field: stateData.field,
                 };
 
+                // Signed join ticket: lets join_room (and reconnects) skip the DB auth check
+                try {
+                    const joinResp = await fetch(`${API_BASE}/api/interview-rooms/validate-join`, {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({
+                            room_id: roomInfo.roomId,
+                            user_id: roomInfo.userId,
+                            user_type: roomInfo.userType,
+                        }),
+                    });
+                    if (joinResp.ok) {
+                        const joinData = await joinResp.json();
+                        roomInfo.joinTicket = joinData.joinTicket;
+                    }
+                } catch (ticketErr) {
+                    console.warn('[INIT] Join ticket unavailable, joining without it:', ticketErr);
+                }
+
                 setRoomData(roomInfo);
                 setQuestions(stateData.questions || []);
                 // ✅ Step 2 — Update both state and ref on initial load